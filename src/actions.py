@@ -0,0 +1,130 @@
+"""
+Agent action layout with precomputed decoding and legality tables.
+
+Actions: 0 = roll all dice, 1..32 = roll keeping the dice selected by hold
+mask ``action - 1`` (bit j keeps die j), 33..43 = score category
+``action - 33``. Everything here is NumPy-only so the environments can use
+it without importing torch.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from generala import GeneralaCategory, GeneralaRules
+
+DICE_COUNT = GeneralaRules.DICE_COUNT
+MAX_ROLLS = GeneralaRules.MAX_ROLLS
+NUM_CATEGORIES = len(GeneralaRules.CATEGORIES)
+HOLD_ACTIONS = 2**DICE_COUNT
+SCORE_OFFSET = 1 + HOLD_ACTIONS
+ACTION_DIM = SCORE_OFFSET + NUM_CATEGORIES
+# dice (5), held (5), roll number one-hot (3), filled categories (11)
+STATE_DIM = DICE_COUNT + DICE_COUNT + MAX_ROLLS + NUM_CATEGORIES
+
+# HOLD_MASKS[i] is hold mask i as booleans per die position.
+HOLD_MASKS = np.array(
+    [[(i >> j) & 1 for j in range(DICE_COUNT)] for i in range(HOLD_ACTIONS)],
+    dtype=bool,
+)
+# ACTION_KEEPS[a] is the position mask kept by action a < SCORE_OFFSET
+# (ROLL keeps nothing).
+ACTION_KEEPS = np.concatenate([np.zeros((1, DICE_COUNT), dtype=bool), HOLD_MASKS])
+# Kept die positions per roll/hold action, for decoding list-based games.
+HOLD_POSITIONS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(int(j) for j in np.flatnonzero(keep)) for keep in ACTION_KEEPS
+)
+# Category scored by each action, None for roll/hold actions.
+ACTION_CATEGORIES: Tuple[Optional[GeneralaCategory], ...] = (None,) * SCORE_OFFSET + tuple(
+    GeneralaRules.CATEGORIES
+)
+
+# ACTION_MASK_TABLE[can_roll, filled_mask] is the legal-action row for a
+# player with that filled-category bitmask.
+ACTION_MASK_TABLE = np.empty((2, 1 << NUM_CATEGORIES, ACTION_DIM), dtype=bool)
+ACTION_MASK_TABLE[:, :, :SCORE_OFFSET] = np.array([False, True])[:, None, None]
+ACTION_MASK_TABLE[:, :, SCORE_OFFSET:] = ~(
+    (np.arange(1 << NUM_CATEGORIES)[:, None] >> np.arange(NUM_CATEGORIES)) & 1
+).astype(bool)
+ACTION_MASK_TABLE.setflags(write=False)
+
+
+# Canonical holds. Different hold actions keep the same multiset when dice
+# repeat (any two of three 3s, or ROLL and hold mask 0); the canonical
+# action is the lowest-numbered one keeping that multiset. Tables are
+# indexed by packed dice (generala.pack_dice) and cover every action, with
+# score actions mapping to themselves.
+_PACK_SHIFTS = 3 * np.arange(DICE_COUNT)
+
+
+def pack_dice_array(dice: np.ndarray) -> np.ndarray:
+    """Packed form (as in generala.pack_dice) of an (N, 5) array of dice."""
+    return (np.asarray(dice, dtype=np.int64) << _PACK_SHIFTS).sum(axis=1)
+
+
+def _build_canonical_actions() -> np.ndarray:
+    canonical = np.tile(np.arange(ACTION_DIM, dtype=np.int8), (1 << 3 * DICE_COUNT, 1))
+    hands = np.stack(
+        np.meshgrid(*[np.arange(1, 7)] * DICE_COUNT, indexing="ij"), axis=-1
+    ).reshape(-1, DICE_COUNT)
+    # Kept multiset of every (hand, action) as base-8 face counts
+    keys = (np.int64(8) ** (hands - 1)) @ ACTION_KEEPS.T.astype(np.int64)
+    first_equal = (keys[:, :, None] == keys[:, None, :]).argmax(axis=2)
+    canonical[pack_dice_array(hands), :SCORE_OFFSET] = first_equal
+    return canonical
+
+
+CANONICAL_ACTIONS = _build_canonical_actions()
+UNIQUE_ACTION_MASKS = CANONICAL_ACTIONS == np.arange(ACTION_DIM)
+CANONICAL_ACTIONS.setflags(write=False)
+UNIQUE_ACTION_MASKS.setflags(write=False)
+
+
+def canonical_action(packed_dice: int, action: int) -> int:
+    """The representative of the actions equivalent to ``action``."""
+    return int(CANONICAL_ACTIONS[packed_dice, action])
+
+
+def unique_hold_actions(packed_dice: int) -> List[int]:
+    """One roll/hold action per distinct multiset that can be kept."""
+    return np.flatnonzero(UNIQUE_ACTION_MASKS[packed_dice, :SCORE_OFFSET]).tolist()
+
+
+def action_mask(
+    roll_number: int, filled_mask: int, packed_dice: Optional[int] = None
+) -> np.ndarray:
+    """(44,) legal-action row for one player.
+
+    With ``packed_dice`` only the canonical hold of each kept multiset is
+    legal. Without it the row is a read-only view into ACTION_MASK_TABLE.
+    """
+    mask = ACTION_MASK_TABLE[int(roll_number < MAX_ROLLS), filled_mask]
+    if packed_dice is not None:
+        mask = mask & UNIQUE_ACTION_MASKS[packed_dice]
+    return mask
+
+
+def build_action_masks(
+    roll_numbers: np.ndarray,
+    filled: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    dice: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """(N, 44) bool legal-action masks.
+
+    ``roll_numbers`` has shape (N,) and ``filled`` is the (N, 11) matrix of
+    filled categories of the player to move. Passing the (N, 5) ``dice``
+    keeps only the canonical hold of each kept multiset.
+    """
+    roll_numbers = np.asarray(roll_numbers)
+    filled = np.asarray(filled, dtype=bool)
+    if filled.shape != (len(roll_numbers), NUM_CATEGORIES):
+        raise ValueError(
+            f"Filled categories must have shape ({len(roll_numbers)}, {NUM_CATEGORIES}), got {filled.shape}"
+        )
+    if out is None:
+        out = np.empty((len(roll_numbers), ACTION_DIM), dtype=bool)
+    out[:, :SCORE_OFFSET] = (roll_numbers < MAX_ROLLS)[:, None]
+    np.logical_not(filled, out=out[:, SCORE_OFFSET:])
+    if dice is not None:
+        out &= UNIQUE_ACTION_MASKS[pack_dice_array(dice)]
+    return out
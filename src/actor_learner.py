@@ -0,0 +1,206 @@
+"""
+Self-play actor processes for actor-learner training.
+
+Each actor owns a CPU copy of the Q-network and plays epsilon-greedy
+self-play games, pushing whole episodes (as NumPy arrays) onto a
+multiprocessing queue. The learner drains that queue into its replay
+memory, trains continuously and periodically broadcasts its weights
+through a model kept in shared memory; actors reload it whenever its
+version counter moves.
+"""
+import copy
+import queue
+import time
+from multiprocessing.sharedctypes import Synchronized, SynchronizedArray
+from multiprocessing.synchronize import Event, Lock
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+
+from agent import GeneralaQAgent
+from dice import DiceRNG
+from env import ACTION_DIM, STATE_DIM, GeneralaEnv
+
+Episode = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+# How long a blocking drain waits between checks that some actor is alive
+DRAIN_POLL_SECONDS = 1.0
+
+
+def collect_episode(
+    env: GeneralaEnv, agent: GeneralaQAgent, epsilon: float, debug: Optional[int] = None
+) -> Episode:
+    """Play one self-play game with ``agent``.
+
+    Returns ``(states, actions, rewards, next_states, dones)`` arrays. A
+    scoring step's next state is the scorer's own view before the turn
+    passes; the last transition is terminal and rewards the acting
+    player's final total score / 500. ``debug`` is an episode number to
+    print every step under.
+    """
+    state = env.reset().copy()
+    game = env.game
+    states: List[np.ndarray] = []
+    actions: List[int] = []
+    rewards: List[float] = []
+    next_states: List[np.ndarray] = []
+    done = False
+    player = game.current_player
+    while not done:
+        action = agent.act(game, epsilon)
+        player = game.current_player
+        if debug is not None:
+            mask = agent.get_action_mask(game)
+            print(
+                f"[Ep{debug} Step{len(actions)}] Player {player} | Roll {game.roll_number} | Action: {action} | Mask: {mask}"
+            )
+        obs, reward, done, info = env.step(action)
+        states.append(state)
+        actions.append(action)
+        rewards.append(reward)
+        next_states.append(info.get("player_obs", obs).copy())
+        state = obs.copy()
+    # Normalize (max possible ~500)
+    rewards[-1] = game.scoreboards[player].total_score() / 500.0
+    next_states[-1][:] = 0.0
+    dones = np.zeros(len(actions), dtype=bool)
+    dones[-1] = True
+    return (
+        np.stack(states),
+        np.array(actions, dtype=np.int64),
+        np.array(rewards, dtype=np.float32),
+        np.stack(next_states),
+        dones,
+    )
+
+
+def _actor_main(
+    actor_id: int,
+    shared_model: nn.Module,
+    hidden_layers: List[int],
+    version: Synchronized,
+    lock: Lock,
+    episodes: "mp.Queue",
+    stop: Event,
+    counts: SynchronizedArray,
+    epsilon: Tuple[float, float, float],
+    seed: np.random.SeedSequence,
+) -> None:
+    torch.set_num_threads(1)
+    torch.manual_seed(int(seed.generate_state(1)[0]))
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=hidden_layers)
+    env = GeneralaEnv(["A", "B"], rng=DiceRNG(seed))
+    eps_start, eps_end, eps_decay = epsilon
+    seen = -1
+    while not stop.is_set():
+        if version.value != seen:
+            with lock:
+                seen = version.value
+                agent.model.load_state_dict(shared_model.state_dict())
+        # Epsilon follows the number of episodes all actors have played
+        played = sum(counts[0::2])
+        episode = collect_episode(env, agent, eps_end + (eps_start - eps_end) * eps_decay**played)
+        while not stop.is_set():
+            try:
+                episodes.put(episode, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        with counts.get_lock():
+            counts[2 * actor_id] += 1
+            counts[2 * actor_id + 1] += len(episode[1])
+
+
+class ActorPool:
+    """``num_actors`` self-play processes fed from a shared-memory model.
+
+    ``epsilon`` is ``(start, end, decay)`` for the schedule
+    ``end + (start - end) * decay**episodes_played`` over all actors.
+    ``counts`` holds each actor's episodes and transitions played so far.
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        hidden_layers: List[int],
+        num_actors: int,
+        epsilon: Tuple[float, float, float] = (1.0, 0.05, 0.9995),
+        seed: Optional[int] = None,
+        queue_size: int = 256,
+    ) -> None:
+        if num_actors <= 0:
+            raise ValueError(f"Need at least one actor, got {num_actors}")
+        ctx = mp.get_context("spawn")
+        self.num_actors = num_actors
+        self.shared_model = copy.deepcopy(model).cpu().share_memory()
+        self._version = ctx.Value("q", 0)
+        self._lock = ctx.Lock()
+        self._episodes = ctx.Queue(maxsize=queue_size)
+        self._stop = ctx.Event()
+        self.counts = ctx.Array("q", 2 * num_actors)
+        seeds = np.random.SeedSequence(seed).spawn(num_actors)
+        self._processes = [
+            ctx.Process(
+                target=_actor_main,
+                args=(
+                    i, self.shared_model, hidden_layers, self._version, self._lock,
+                    self._episodes, self._stop, self.counts, epsilon, seeds[i],
+                ),
+                daemon=True,
+            )
+            for i in range(num_actors)
+        ]
+
+    def start(self) -> None:
+        for process in self._processes:
+            process.start()
+
+    def broadcast(self, model: nn.Module) -> None:
+        """Publish ``model``'s weights; actors pick them up before their next game."""
+        with self._lock, torch.no_grad():
+            for shared, param in zip(self.shared_model.state_dict().values(), model.state_dict().values()):
+                shared.copy_(param)
+            self._version.value += 1
+
+    def drain(self, block: bool = False, max_episodes: Optional[int] = None) -> List[Episode]:
+        """Episodes waiting in the queue; with ``block`` wait for at least one.
+
+        A blocking drain raises RuntimeError once every actor has exited
+        with nothing left to hand over.
+        """
+        drained: List[Episode] = []
+        while block and not drained:
+            try:
+                drained.append(self._episodes.get(timeout=DRAIN_POLL_SECONDS))
+            except queue.Empty:
+                if not any(process.is_alive() for process in self._processes):
+                    codes = [process.exitcode for process in self._processes]
+                    raise RuntimeError(f"All actors have exited (exit codes {codes})")
+        while max_episodes is None or len(drained) < max_episodes:
+            try:
+                drained.append(self._episodes.get_nowait())
+            except queue.Empty:
+                break
+        return drained
+
+    def actor_counts(self) -> Sequence[Tuple[int, int]]:
+        """``(episodes, transitions)`` played by each actor."""
+        counts = self.counts[:]
+        return [(counts[2 * i], counts[2 * i + 1]) for i in range(self.num_actors)]
+
+    def close(self) -> None:
+        self._stop.set()
+        deadline = time.monotonic() + 5.0
+        for process in self._processes:
+            # Keep the queue moving so actors blocked on put can exit
+            while process.is_alive() and time.monotonic() < deadline:
+                self.drain()
+                process.join(timeout=0.05)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._episodes.close()
+        self._episodes.join_thread()
@@ -1,9 +1,63 @@
+import warnings
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+import numpy as np
 from generala import GeneralaGame, GeneralaAction, GeneralaCategory, GeneralaRules
+from actions import (
+    ACTION_MASK_TABLE,
+    HOLD_MASKS,
+    HOLD_POSITIONS,
+    MAX_ROLLS,
+    UNIQUE_ACTION_MASKS,
+)
+from collections import OrderedDict, namedtuple
+from env import encode_observation
 from typing import List, Optional
 
+# Precomputed torch views of the action tables (see actions.py)
+HOLD_MASK_TENSOR = torch.from_numpy(HOLD_MASKS.copy())
+ACTION_MASK_TENSOR = torch.from_numpy(ACTION_MASK_TABLE.copy())
+UNIQUE_ACTION_MASK_TENSOR = torch.from_numpy(UNIQUE_ACTION_MASKS.copy())
+_HOLD_MASK_ROWS = tuple(map(tuple, HOLD_MASKS.astype(int).tolist()))
+_ACTION_MASK_INTS = ACTION_MASK_TABLE.astype(np.int8)
+
+QCacheInfo = namedtuple("QCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Checkpoints are tagged with the action layout they were trained under.
+# Layout 2 maps score action a to category a - SCORE_OFFSET; untagged
+# checkpoints predate it and picked the i-th still-open category instead.
+ACTION_LAYOUT = 2
+
+
+def save_checkpoint(model: nn.Module, path: str) -> None:
+    """``torch.save`` ``model``'s state dict tagged with ACTION_LAYOUT."""
+    state_dict = model.state_dict()
+    # Kept in the state dict's metadata, which load_state_dict ignores
+    state_dict._metadata[""]["action_layout"] = ACTION_LAYOUT  # type: ignore[attr-defined]
+    torch.save(state_dict, path)
+
+
+def load_checkpoint(path: str, map_location="cpu") -> dict:
+    """State dict saved at ``path``; warns when it predates ACTION_LAYOUT."""
+    state_dict = torch.load(path, map_location=map_location)
+    metadata = getattr(state_dict, "_metadata", None) or {}
+    if metadata.get("", {}).get("action_layout") != ACTION_LAYOUT:
+        warnings.warn(
+            f"{path} has no action layout tag, so it may predate score actions "
+            "mapping to category action - 33 and pick the wrong categories; "
+            "retrain it with train_qagent.py",
+            stacklevel=2,
+        )
+    return state_dict
+
+
+def _as_tensor(x, dtype: torch.dtype, device) -> torch.Tensor:
+    # Table rows are read-only NumPy views, which torch refuses to share
+    if isinstance(x, np.ndarray) and not x.flags.writeable:
+        x = x.copy()
+    return torch.as_tensor(x, dtype=dtype, device=device)
+
 
 class GeneralaQNetwork(nn.Module):
     def __init__(self, state_dim: int, action_dim: int, hidden_layers: list = [128, 128]):
@@ -24,11 +78,42 @@ class GeneralaQNetwork(nn.Module):
 class GeneralaQAgent:
     HOLD_ACTIONS = 32  # 2^5 possible hold combinations for 5 dice
 
-    def __init__(self, state_dim: int, action_dim: int, device: str = "cpu", hidden_layers: list = [128, 128]):
+    def __init__(
+        self,
+        state_dim: int,
+        action_dim: int,
+        device: str = "cpu",
+        hidden_layers: list = [128, 128],
+        cache_size: Optional[int] = None,
+    ):
         self.model = GeneralaQNetwork(state_dim, action_dim, hidden_layers)
         self.device = device
         self.model.to(device)
         self.action_dim = action_dim
+        self.hidden_layers = list(hidden_layers)
+        # Optional bounded LRU of state key -> Q-vector (see q_values)
+        self.cache_size = cache_size
+        self._q_cache: "OrderedDict[int, torch.Tensor]" = OrderedDict()
+        self._cache_token: Optional[tuple] = None
+        self._cache_params: tuple = (None, [])
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    @classmethod
+    def from_state_dict(
+        cls,
+        state_dict: dict,
+        hidden_layers: list,
+        device: str = "cpu",
+        cache_size: Optional[int] = None,
+    ) -> "GeneralaQAgent":
+        # Input and output sizes are read off the first and last Linear layers
+        weights = [v for k, v in state_dict.items() if k.endswith("weight")]
+        agent = cls(
+            weights[0].shape[1], weights[-1].shape[0], device, hidden_layers, cache_size
+        )
+        agent.model.load_state_dict(state_dict)
+        return agent
 
     @staticmethod
     def state_to_tensor(game: GeneralaGame) -> torch.Tensor:
@@ -39,55 +124,136 @@ class GeneralaQAgent:
         roll_onehot = [0, 0, 0]
         roll_idx = min(max(game.roll_number - 1, 0), 2)
         roll_onehot[roll_idx] = 1
-        categories = [
-            1 if v is not None else 0
-            for v in game.scoreboards[game.current_player].scores.values()
-        ]
+        filled = game.scoreboards[game.current_player].filled_mask
+        categories = [(filled >> i) & 1 for i in range(game.num_categories)]
         state = dice + held + roll_onehot + categories
         return torch.tensor(state, dtype=torch.float32)
 
     @staticmethod
     def all_hold_masks():
-        # Returns a list of all possible hold masks (one-hot, length 5)
-        return [
-            [(i >> j) & 1 for j in range(GeneralaRules.DICE_COUNT)]
-            for i in range(GeneralaQAgent.HOLD_ACTIONS)
-        ]
+        # All possible hold masks (one-hot, length 5), as fresh lists
+        return [list(row) for row in _HOLD_MASK_ROWS]
 
     @staticmethod
     def decode_hold_action(game: GeneralaGame, hold_action_idx: int) -> List[int]:
         # Given a hold action index (1-32), return the dice to hold
-        mask = GeneralaQAgent.all_hold_masks()[hold_action_idx - 1]  # 0 is ROLL
-        return [d for d, m in zip(game.dice, mask) if m]
+        dice = game.dice
+        return [dice[j] for j in HOLD_POSITIONS[hold_action_idx]]
 
     @staticmethod
-    def get_action_mask(game: GeneralaGame) -> List[int]:
+    def _mask_index(game: GeneralaGame) -> tuple:
         # Action order: [ROLL, HOLD_00000, HOLD_00001, ..., HOLD_11111, SCORE...]
-        mask = []
-        # ROLL: only if rolls left
-        mask.append(int(game.roll_number <= GeneralaRules.MAX_ROLLS))
-        # HOLD actions: only if roll_number < MAX_ROLLS (i.e., before the 3rd roll)
-        mask.extend(
-            [int(game.roll_number < GeneralaRules.MAX_ROLLS)]
-            * GeneralaQAgent.HOLD_ACTIONS
+        # ROLL and HOLD only before the last roll, SCORE only for open categories
+        filled = game.scoreboards[game.current_player].filled_mask
+        return int(game.roll_number < MAX_ROLLS), filled
+
+    @staticmethod
+    def get_action_mask(game: GeneralaGame, unique_holds: bool = False) -> List[int]:
+        # unique_holds keeps one hold action per distinct kept multiset
+        mask = _ACTION_MASK_INTS[GeneralaQAgent._mask_index(game)]
+        if unique_holds:
+            mask = mask & UNIQUE_ACTION_MASKS[game.core.dice]
+        return mask.tolist()
+
+    @staticmethod
+    def state_key(game: GeneralaGame) -> int:
+        # Everything the observation encodes, packed into one int: dice and
+        # held dice (15 bits each), roll number (2 bits), filled mask (11 bits).
+        # Dice stay in order because the network's input is order-dependent.
+        core = game.core
+        return (
+            core.dice
+            | core.held << 15
+            | core.roll_number << 30
+            | core.cards[core.current_player].filled << 32
         )
-        # SCORE: one for each category, only if not already filled
-        available = [
-            score is None
-            for score in game.scoreboards[game.current_player].scores.values()
-        ]
-        mask.extend(available)
-        return mask
-
-    def act(self, game: GeneralaGame, epsilon: float = 0.0) -> int:
-        state = self.state_to_tensor(game).to(self.device)
-        mask = torch.tensor(
-            self.get_action_mask(game), dtype=torch.bool, device=self.device
+
+    def _weights_token(self) -> tuple:
+        # In-place parameter updates (optimizer steps, load_state_dict, copy_
+        # under no_grad) bump the tensors' version counters; swapping the
+        # model changes its id. Writes through ``param.data`` get a fresh
+        # counter and go unnoticed, so callers must invalidate_cache() after.
+        if self._cache_params[0] is not self.model:
+            self._cache_params = (self.model, list(self.model.parameters()))
+        return id(self.model), sum(p._version for p in self._cache_params[1])
+
+    def invalidate_cache(self) -> None:
+        """Drop cached Q-values.
+
+        Must be called after any weight write that bypasses the version
+        counters, such as ``param.data.copy_(...)``; update parameters
+        in place under ``torch.no_grad()`` instead to keep the cache valid.
+        """
+        self._q_cache.clear()
+        self._cache_token = None
+
+    def cache_info(self) -> QCacheInfo:
+        return QCacheInfo(
+            self._cache_hits, self._cache_misses, self.cache_size, len(self._q_cache)
         )
-        q_values = self.model(state)
-        q_values[~mask] = -float("inf")  # Mask out invalid actions
+
+    def q_values(self, game: GeneralaGame) -> torch.Tensor:
+        """Q-vector for the player to move, served from the LRU cache when enabled."""
+        if not self.cache_size:
+            return self._predict(game)
+        token = self._weights_token()
+        if token != self._cache_token:
+            self._q_cache.clear()
+            self._cache_token = token
+        key = self.state_key(game)
+        cache = self._q_cache
+        q_values = cache.get(key)
+        if q_values is not None:
+            cache.move_to_end(key)
+            self._cache_hits += 1
+            return q_values
+        self._cache_misses += 1
+        q_values = cache[key] = self._predict(game)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return q_values
+
+    def _predict(self, game: GeneralaGame) -> torch.Tensor:
+        with torch.no_grad():
+            state = torch.from_numpy(encode_observation(game)).to(self.device)
+            return self.model(state.unsqueeze(0))[0]  # exported models expect a batch
+
+    def act(
+        self, game: GeneralaGame, epsilon: float = 0.0, unique_holds: bool = True
+    ) -> int:
+        mask = ACTION_MASK_TENSOR[self._mask_index(game)].to(self.device)
+        # Mask out invalid actions without touching the (possibly cached) Q-values
+        q_values = self.q_values(game).masked_fill(~mask, -float("inf"))
         if torch.rand(1).item() < epsilon:
+            # Explore over distinct holds so repeated dice are not oversampled
+            if unique_holds:
+                mask = mask & UNIQUE_ACTION_MASK_TENSOR[game.core.dice].to(self.device)
             valid_indices = mask.nonzero(as_tuple=True)[0]
             return valid_indices[torch.randint(len(valid_indices), (1,))].item()
         else:
             return torch.argmax(q_values).item()
+
+    def act_batch(
+        self, states, masks, epsilon: float = 0.0, explore_masks=None
+    ) -> torch.Tensor:
+        """Epsilon-greedy actions for many games with one forward pass.
+
+        ``states`` is an (N, state_dim) array or tensor of observations and
+        ``masks`` an (N, action_dim) bool array or tensor of legal actions.
+        Exploring rows sample uniformly from ``explore_masks`` instead when
+        given (for example masks built with unique holds only).
+        Returns an (N,) int64 tensor of actions on the agent's device.
+        """
+        states = _as_tensor(states, torch.float32, self.device)
+        masks = _as_tensor(masks, torch.bool, self.device)
+        with torch.inference_mode():
+            q_values = self.model(states).masked_fill(~masks, -float("inf"))
+            actions = q_values.argmax(dim=1)
+            if epsilon > 0.0:
+                # Uniform over legal actions: argmax of random keys, illegal ones pushed below 0
+                if explore_masks is not None:
+                    masks = _as_tensor(explore_masks, torch.bool, self.device)
+                keys = torch.rand(masks.shape, device=self.device).masked_fill(~masks, -1.0)
+                explore = torch.rand(len(actions), device=self.device) < epsilon
+                actions = torch.where(explore, keys.argmax(dim=1), actions)
+        return actions
@@ -5,9 +5,13 @@ from generala import (
     GeneralaGame,
     GeneralaRules,
 )
-from typing import List
+from typing import List, Optional
+import os
 import sys
-from agent import GeneralaQAgent
+from actions import HOLD_POSITIONS
+from env import ACTION_DIM, SCORE_OFFSET, STATE_DIM, GeneralaEnv
+
+Q_CACHE_SIZE = 100_000
 
 # Placeholder functions for CLI interaction
 
@@ -211,31 +215,77 @@ def play_generala_cli() -> None:
         print("🤝 It's a tie!")
 
 
-def play_generala_cli_vs_agent(checkpoint_path: str = None) -> None:
-    import torch
+def load_cli_agent(checkpoint_path: Optional[str] = None, opponent: str = "qagent"):
+    # An untrained agent without a checkpoint (None for MCTS, whose rollouts
+    # are then random); None when the checkpoint fails to load, so callers
+    # never mistake fresh weights for trained ones.
+    # torch is only imported when the agent needs it: .npz weights and
+    # checkpoint-free MCTS run on NumPy alone, so they start without torch
+    if not checkpoint_path and opponent == "mcts":
+        return None
+    if checkpoint_path and checkpoint_path.endswith(".npz"):
+        from numpy_agent import NumpyQAgent
 
-    print("Welcome to Generala! 🎲")
-    human_name = input("Enter your name: ")
-    agent_name = "QAgent"
-    player_names = [human_name, agent_name]
-    game = GeneralaGame(player_names)
-    game.start_turn()
-    # Setup agent
-    state_dim = (
-        5 + 5 + 3 + len(game.scoreboards[0].scores)
-    )  # dice, held, roll_onehot(3), categories
-    num_categories = len(game.scoreboards[0].scores)
-    action_dim = (
-        1 + GeneralaQAgent.HOLD_ACTIONS + num_categories
-    )  # ROLL + HOLDs + SCOREs
-    agent = GeneralaQAgent(state_dim, action_dim)
+        try:
+            numpy_agent = NumpyQAgent.load(checkpoint_path)
+            print(f"[INFO] Loaded NumPy QAgent weights from {checkpoint_path}")
+            return numpy_agent
+        except Exception as e:
+            print(f"[WARNING] Failed to load checkpoint: {e}")
+            return None
+    from agent import GeneralaQAgent, load_checkpoint
+
+    # Positions repeat a lot within a game, so Q-values are cached
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, cache_size=Q_CACHE_SIZE)
     if checkpoint_path:
+        from export_model import hidden_layers_from_state_dict, load_inference_model
+
         try:
-            checkpoint = torch.load(checkpoint_path, map_location=agent.device)
-            agent.model.load_state_dict(checkpoint)
+            if opponent == "mcts":
+                # Rollout workers rebuild the eager network from its weights
+                checkpoint = load_checkpoint(checkpoint_path, map_location=agent.device)
+                agent = GeneralaQAgent.from_state_dict(
+                    checkpoint,
+                    hidden_layers_from_state_dict(checkpoint),
+                    cache_size=Q_CACHE_SIZE,
+                )
+            else:
+                # Exported (TorchScript/int8) models and plain checkpoints both work
+                agent.model = load_inference_model(checkpoint_path)
             print(f"[INFO] Loaded QAgent checkpoint from {checkpoint_path}")
         except Exception as e:
             print(f"[WARNING] Failed to load checkpoint: {e}")
+            if opponent == "mcts":
+                print("[WARNING] MCTS rollouts need a .pth state dict or .npz weights")
+            return None
+    return agent
+
+
+def play_generala_cli_vs_agent(checkpoint_path: Optional[str] = None, opponent: str = "qagent") -> None:
+    print("Welcome to Generala! 🎲")
+    human_name = input("Enter your name: ")
+    agent_name = "MCTS" if opponent == "mcts" else "QAgent"
+    player_names = [human_name, agent_name]
+    # The agent's moves go through the same environment the trainer uses
+    env = GeneralaEnv(player_names)
+    env.reset()
+    game = env.game
+    agent = load_cli_agent(checkpoint_path, opponent)
+    search_agent = None
+    if opponent == "mcts":
+        from mcts import MCTSAgent
+
+        # A loaded checkpoint drives the rollouts; otherwise they are random
+        search_agent = MCTSAgent(
+            rollouts=4000,
+            time_limit=2.0,
+            num_workers=os.cpu_count() or 1,
+            rollout_turns=0,
+            policy_agent=agent,
+        )
+    elif agent is None:
+        # Play on with an untrained network rather than abort the game
+        agent = load_cli_agent(None, opponent)
     agent_actions_log = []
     while not game.finished:
         print_scoreboard(game.scoreboards, game.player_names)
@@ -247,16 +297,18 @@ def play_generala_cli_vs_agent(checkpoint_path: str = None) -> None:
         while True:
             print(f"\n🎲 Current dice: ", " ".join(f"[{d}]" for d in game.dice))
             if is_agent:
-                action_idx = agent.act(game, epsilon=1.0)  # Force random for debug
-                mask = agent.get_action_mask(game)
+                if search_agent is not None:
+                    action_idx = search_agent.act(game)
+                else:
+                    action_idx = agent.act(game, epsilon=1.0)  # Force random for debug
                 if action_idx == 0:
                     action = GeneralaAction.ROLL
-                elif 1 <= action_idx <= 32:
+                elif action_idx < SCORE_OFFSET:
                     action = GeneralaAction.HOLD
                 else:
                     action = "score"
                 print(
-                    f"🤖 QAgent chooses: {action if isinstance(action, str) else action.value}"
+                    f"🤖 {agent_name} chooses: {action if isinstance(action, str) else action.value}"
                 )
                 # Log the action for debugging
                 agent_actions_log.append(
@@ -268,48 +320,36 @@ def play_generala_cli_vs_agent(checkpoint_path: str = None) -> None:
                         "action": action if isinstance(action, str) else action.value,
                     }
                 )
-            else:
-                action = prompt_action(
-                    game.roll_number,
-                    GeneralaRules.MAX_ROLLS,
-                )
+                if action == GeneralaAction.HOLD:
+                    held = [game.dice[j] for j in HOLD_POSITIONS[action_idx]]
+                    print(f"🤖 {agent_name} holds: {held}")
+                _, _, _, info = env.step(action_idx)
+                if action != "score":
+                    continue
+                category = info["category"]
+                print(f"🤖 {agent_name} scores in: {category.value}")
+                if info["served"]:
+                    print("🏆 Generala served! You win!")
+                else:
+                    print(f"✅ Scored {info['score']} in {category.value}\n")
+                break  # the environment has already passed the turn
+            action = prompt_action(
+                game.roll_number,
+                GeneralaRules.MAX_ROLLS,
+            )
             if action == GeneralaAction.ROLL:
                 if game.roll_number >= GeneralaRules.MAX_ROLLS:
                     print("No rolls left.")
-                    if is_agent:
-                        # Force agent to score if it tries to roll with no rolls left
-                        action = "score"
-                    else:
-                        continue
-                if action == GeneralaAction.ROLL:
-                    if is_agent:
-                        held = []  # Agent: roll all dice
-                    else:
-                        held = prompt_dice_to_hold(game.dice, game.roll_number)
-                    game.roll(held)
                     continue
-            # Handle agent HOLD actions (1-32) ONLY if agent chose a hold action
-            if (
-                is_agent
-                and isinstance(action_idx, int)
-                and 1 <= action_idx <= 32
-                and action == GeneralaAction.HOLD
-            ):
-                held = agent.decode_hold_action(game, action_idx)
-                print(f"🤖 QAgent holds: {held}")
+                held = prompt_dice_to_hold(game.dice, game.roll_number)
                 game.roll(held)
                 continue
             if action == GeneralaAction.HOLD:
-                if is_agent:
-                    held = []  # Should not be used, but fallback
-                else:
-                    held = prompt_dice_to_hold(game.dice, game.roll_number)
+                held = prompt_dice_to_hold(game.dice, game.roll_number)
                 game.roll(held)
                 continue
             if action == "show_score":
                 print_scoreboard(game.scoreboards, game.player_names)
-                if is_agent:
-                    break  # Agent never chooses this
                 continue
             if action == "score":
                 available = [
@@ -319,36 +359,18 @@ def play_generala_cli_vs_agent(checkpoint_path: str = None) -> None:
                     ].scores.items()
                     if score is None
                 ]
-                if is_agent:
-                    # Agent: pick category with highest Q value among available
-                    mask = agent.get_action_mask(game)
-                    q_values = (
-                        agent.model(agent.state_to_tensor(game)).detach().tolist()
-                    )
-                    best = None
-                    best_val = -float("inf")
-                    for i, cat in enumerate(available):
-                        idx = 2 + list(
-                            game.scoreboards[game.current_player].scores.keys()
-                        ).index(cat)
-                        if mask[idx] and q_values[idx] > best_val:
-                            best = cat
-                            best_val = q_values[idx]
-                    category = best if best is not None else available[0]
-                    print(f"🤖 QAgent scores in: {category.value}")
-                else:
-                    print("Available categories:")
-                    for i, cat in enumerate(available):
-                        print(f"{i+1}. {cat.value.capitalize()}")
-                    choice = input("Choose a category by number: ")
-                    try:
-                        idx = int(choice) - 1
-                        if 0 <= idx < len(available):
-                            category = available[idx]
-                        else:
-                            category = available[0]
-                    except Exception:
+                print("Available categories:")
+                for i, cat in enumerate(available):
+                    print(f"{i+1}. {cat.value.capitalize()}")
+                choice = input("Choose a category by number: ")
+                try:
+                    idx = int(choice) - 1
+                    if 0 <= idx < len(available):
+                        category = available[idx]
+                    else:
                         category = available[0]
+                except Exception:
+                    category = available[0]
                 result = game.score(category)
                 if result == "WIN":
                     print("🏆 Generala served! You win!")
@@ -356,8 +378,8 @@ def play_generala_cli_vs_agent(checkpoint_path: str = None) -> None:
                     print(f"✅ Scored {result} in {category.value}\n")
                 else:
                     print(f"Invalid score returned: {result}\n")
+                game.next_player()
                 break
-        game.next_player()
     print("\n🎉 Final Scoreboards:")
     print_scoreboard(game.scoreboards, game.player_names)
     winners, totals = game.get_winner()
@@ -365,8 +387,10 @@ def play_generala_cli_vs_agent(checkpoint_path: str = None) -> None:
         print(f"🏆 {winners[0]} wins!")
     else:
         print("🤝 It's a tie!")
+    if search_agent is not None:
+        search_agent.close()
     # Log all agent actions at the end
-    print("\n[QAgent Actions Log]")
+    print(f"\n[{agent_name} Actions Log]")
     for entry in agent_actions_log:
         print(
             f"Round {entry['round']} | Roll {entry['roll_number']} | Dice: {entry['dice']} | ActionIdx: {entry['action_idx']} | Action: {entry['action']}"
@@ -378,16 +402,18 @@ def main():
 
     print("1. Play Human vs Human")
     print("2. Play Human vs QAgent")
+    print("3. Play Human vs MCTS")
     choice = input("Choose game mode: ")
     checkpoint_path = None
-    if choice.strip() == "2":
+    if choice.strip() in ("2", "3"):
         if len(sys.argv) > 1:
             checkpoint_path = sys.argv[1]
         else:
             use_ckpt = input("Load QAgent checkpoint? (y/n): ").strip().lower()
             if use_ckpt == "y":
                 checkpoint_path = input("Enter checkpoint path: ").strip()
-        play_generala_cli_vs_agent(checkpoint_path)
+        opponent = "mcts" if choice.strip() == "3" else "qagent"
+        play_generala_cli_vs_agent(checkpoint_path, opponent)
     else:
         play_generala_cli()
 
@@ -0,0 +1,150 @@
+"""
+Seedable dice source for Generala built on numpy.random.Generator
+"""
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from validation import validate_dice_list, validate_held_dice_count
+
+DICE_COUNT = 5
+
+
+class DiceRNG:
+    """Reproducible dice roller.
+
+    Each instance owns its own PCG64 stream. Use ``spawn`` to derive
+    statistically independent children (one per game or worker) from a
+    single seed, so parallel runs can be replayed exactly.
+
+    Single-game rolls are served from a pre-drawn buffer to avoid paying
+    the Generator call overhead for every die; ``reroll`` handles many
+    games with a single draw.
+
+    ``get_state``/``set_state`` and ``copy`` only touch the buffer and a
+    saved generator state, so branching a search is cheap; the underlying
+    bit generator is rebuilt lazily when a branch actually needs new draws.
+    """
+
+    __slots__ = (
+        "seed_sequence",
+        "buffer_size",
+        "_generator",
+        "_pending_state",
+        "_fill_state",
+        "_buffer",
+        "_pos",
+    )
+
+    def __init__(
+        self,
+        seed: Union[None, int, np.random.SeedSequence] = None,
+        buffer_size: int = 4096,
+    ) -> None:
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self._generator: Optional[np.random.Generator] = np.random.Generator(
+            np.random.PCG64(self.seed_sequence)
+        )
+        # Bit generator state to apply before the next draw (set by restores)
+        self._pending_state: Optional[Dict[str, Any]] = None
+        # Bit generator state right after the current buffer was drawn
+        self._fill_state: Optional[Dict[str, Any]] = None
+        self.buffer_size = buffer_size
+        self._buffer: List[int] = []
+        self._pos = 0
+
+    @property
+    def generator(self) -> np.random.Generator:
+        if self._pending_state is not None:
+            if self._generator is None:
+                self._generator = np.random.Generator(np.random.PCG64())
+            self._generator.bit_generator.state = self._pending_state
+            self._pending_state = None
+        assert self._generator is not None
+        return self._generator
+
+    def get_state(self) -> Tuple[List[int], int, Dict[str, Any]]:
+        """Everything needed to replay the upcoming rolls exactly."""
+        if self._pending_state is not None:
+            return self._buffer, self._pos, self._pending_state
+        fill_state = self._fill_state
+        if fill_state is None:
+            fill_state = self._fill_state = dict(self.generator.bit_generator.state)
+        return self._buffer, self._pos, fill_state
+
+    def set_state(self, state: Tuple[List[int], int, Dict[str, Any]]) -> None:
+        # The buffer list is never mutated in place, so it can be shared
+        self._buffer, self._pos, self._fill_state = state
+        self._pending_state = self._fill_state
+
+    def copy(self) -> "DiceRNG":
+        """Independent roller that will produce the same rolls as this one."""
+        rng = DiceRNG.__new__(DiceRNG)
+        rng.seed_sequence = self.seed_sequence
+        rng.buffer_size = self.buffer_size
+        rng._generator = None
+        rng.set_state(self.get_state())
+        return rng
+
+    def spawn(self, n: int) -> List["DiceRNG"]:
+        """Create ``n`` independent child streams."""
+        return [
+            DiceRNG(child, self.buffer_size) for child in self.seed_sequence.spawn(n)
+        ]
+
+    def _refill(self) -> None:
+        self._buffer = self.generator.integers(
+            1, 7, size=self.buffer_size, dtype=np.int8
+        ).tolist()
+        self._pos = 0
+        self._fill_state = None
+
+    def roll(self, held: Optional[List[int]] = None) -> List[int]:
+        """Drop-in replacement for GeneralaRules.roll_dice."""
+        if held is None:
+            held = []
+
+        # Input validation
+        validate_held_dice_count(held, DICE_COUNT)
+        validate_dice_list(held, allow_empty=True)
+
+        n = DICE_COUNT - len(held)
+        if self._pos + n > len(self._buffer):
+            self._refill()
+        start = self._pos
+        self._pos += n
+        return held + self._buffer[start : self._pos]
+
+    def roll_batch(self, n_games: int) -> np.ndarray:
+        """Roll all five dice for ``n_games`` games, shape (n_games, 5)."""
+        self._fill_state = None
+        return self.generator.integers(1, 7, size=(n_games, DICE_COUNT), dtype=np.int8)
+
+    def reroll(
+        self,
+        dice: np.ndarray,
+        held_mask: np.ndarray,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Reroll every die whose ``held_mask`` entry is False.
+
+        ``dice`` and ``held_mask`` have shape (N, 5); held dice keep their
+        position. Pass ``out=dice`` to update in place.
+        """
+        dice = np.asarray(dice)
+        held_mask = np.asarray(held_mask, dtype=bool)
+        if dice.shape != held_mask.shape:
+            raise ValueError(
+                f"Dice and held mask shapes differ: {dice.shape} vs {held_mask.shape}"
+            )
+        self._fill_state = None
+        fresh = self.generator.integers(1, 7, size=dice.shape, dtype=dice.dtype)
+        if out is None:
+            return np.where(held_mask, dice, fresh)
+        if out is not dice:
+            np.copyto(out, dice)
+        np.copyto(out, fresh, where=~held_mask)
+        return out
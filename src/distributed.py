@@ -0,0 +1,173 @@
+"""
+Data-parallel learner support over torch.distributed (gloo, CPU).
+
+train_qagent.py --distributed is meant to be started by torchrun, one
+process per rank, on one machine or several. Run the script by path from
+the repository root, with the root on PYTHONPATH for its ``src.`` imports
+(``-m src.train_qagent`` cannot resolve the flat imports inside src/):
+
+    PYTHONPATH=. torchrun --nproc-per-node 4 src/train_qagent.py --distributed
+    PYTHONPATH=. torchrun --nnodes 2 --node-rank 0 --master-addr HOST --nproc-per-node 8 \
+        src/train_qagent.py --distributed
+
+Every rank plays its own games into its own replay shard; the online
+network is wrapped in DistributedDataParallel, so gradients are averaged
+across ranks and every optimizer step (and therefore every soft target
+update) is identical on all of them.
+
+Running this module benchmarks one rank's play-and-learn loop at several
+world sizes on the local machine.
+"""
+import argparse
+import os
+import socket
+import time
+from typing import List, Tuple
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim as optim
+from torch.nn.parallel import DistributedDataParallel
+
+from actor_learner import collect_episode
+from agent import GeneralaQAgent
+from dice import DiceRNG
+from env import ACTION_DIM, STATE_DIM, GeneralaEnv
+from replay import ReplayMemory
+
+
+def init_distributed(backend: str = "gloo") -> Tuple[int, int]:
+    """Join the process group torchrun describes; returns ``(rank, world_size)``.
+
+    Each rank gets its own exploration stream; rank 0 keeps the default
+    seed so a one-rank run matches a plain run.
+    """
+    if "RANK" not in os.environ:
+        raise RuntimeError("Distributed mode needs the RANK/WORLD_SIZE environment torchrun sets")
+    dist.init_process_group(backend)
+    torch.set_num_threads(1)
+    rank = dist.get_rank()
+    torch.manual_seed(torch.initial_seed() + rank)
+    return rank, dist.get_world_size()
+
+
+def wrap_model(model: nn.Module) -> DistributedDataParallel:
+    """DDP wrapper; construction copies rank 0's weights to every rank."""
+    return DistributedDataParallel(model)
+
+
+def all_ranks(flag: bool) -> bool:
+    """True when ``flag`` holds on every rank (a collective call)."""
+    value = torch.tensor([int(flag)])
+    dist.all_reduce(value, op=dist.ReduceOp.MIN)
+    return bool(value.item())
+
+
+def max_across_ranks(value: int) -> int:
+    """Largest ``value`` over all ranks (a collective call)."""
+    tensor = torch.tensor([value])
+    dist.all_reduce(tensor, op=dist.ReduceOp.MAX)
+    return int(tensor.item())
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _benchmark_rank(
+    rank: int,
+    world_size: int,
+    port: int,
+    hidden_layers: List[int],
+    batch_size: int,
+    steps: int,
+    results: "mp.Queue",
+) -> None:
+    os.environ.update(
+        MASTER_ADDR="127.0.0.1", MASTER_PORT=str(port), RANK=str(rank), WORLD_SIZE=str(world_size)
+    )
+    init_distributed()
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=hidden_layers)
+    model = wrap_model(agent.model)
+    target = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=hidden_layers).model
+    target.load_state_dict(agent.model.state_dict())
+    optimizer = optim.Adam(model.parameters(), lr=1e-3)
+    memory = ReplayMemory(10000, STATE_DIM)
+    env = GeneralaEnv(["A", "B"], rng=DiceRNG(rank))
+    while len(memory) < batch_size:
+        memory.push_episode(*map(torch.from_numpy, collect_episode(env, agent, 1.0)))
+    all_ranks(True)
+    start = time.perf_counter()
+    play = 0.0
+    for _ in range(steps):
+        # Same per-episode cycle as train_qagent.py: one game, one update
+        played = time.perf_counter()
+        memory.push_episode(*map(torch.from_numpy, collect_episode(env, agent, 0.1)))
+        play += time.perf_counter() - played
+        states, actions, rewards, next_states, dones = memory.sample(batch_size)
+        q_values = model(states).gather(1, actions)
+        with torch.no_grad():
+            next_actions = agent.model(next_states).argmax(1, keepdim=True)
+            next_q = target(next_states).gather(1, next_actions)
+            expected = rewards + 0.99 * next_q * (~dones)
+        loss = nn.functional.mse_loss(q_values, expected)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    elapsed = time.perf_counter() - start
+    # Every rank must end with the same weights
+    checksum = torch.stack([p.detach().sum() for p in agent.model.parameters()]).sum().reshape(1)
+    gathered = [torch.zeros(1) for _ in range(world_size)]
+    dist.all_gather(gathered, checksum)
+    if rank == 0:
+        results.put((elapsed, play, len(set(float(c) for c in gathered)) == 1))
+    dist.destroy_process_group()
+
+
+def benchmark(world_size: int, hidden_layers: List[int], batch_size: int, steps: int) -> dict:
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    mp.start_processes(
+        _benchmark_rank,
+        args=(world_size, _free_port(), hidden_layers, batch_size, steps, results),
+        nprocs=world_size,
+        start_method="spawn",
+    )
+    elapsed, play, consistent = results.get()
+    return {
+        "ranks": world_size,
+        "episodes_per_s": world_size * steps / elapsed,
+        "samples_per_s": world_size * steps * batch_size / elapsed,
+        "play_share": play / elapsed,
+        "consistent": consistent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data-parallel QAgent training on this machine.")
+    parser.add_argument("--ranks", default="1,2,4,8", help="Comma-separated world sizes")
+    parser.add_argument("--steps", type=int, default=200, help="Episodes (and updates) per rank")
+    parser.add_argument("--batch-size", type=int, default=64, help="Per-rank batch size")
+    parser.add_argument("--hidden-layers", default="128,128")
+    args = parser.parse_args()
+
+    hidden_layers = [int(x) for x in args.hidden_layers.split(",") if x.strip()]
+    print(f"{os.cpu_count()} CPUs, {args.steps} episodes + updates per rank, batch {args.batch_size} per rank")
+    print(f"{'ranks':>6} {'episodes/s':>11} {'samples/s':>10} {'speedup':>8} {'play %':>7} {'in sync':>8}")
+    baseline = None
+    for world_size in (int(r) for r in args.ranks.split(",") if r.strip()):
+        result = benchmark(world_size, hidden_layers, args.batch_size, args.steps)
+        baseline = baseline or result["episodes_per_s"]
+        print(
+            f"{result['ranks']:>6} {result['episodes_per_s']:>11.1f} {result['samples_per_s']:>10.0f} "
+            f"{result['episodes_per_s'] / baseline:>7.2f}x {100 * result['play_share']:>6.1f}% "
+            f"{str(result['consistent']):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Gym-style single-game environment around GeneralaGame.
+
+This is the one place that turns action indices into game moves, so the
+trainer, the evaluator and the CLI all share the same decoding and reward.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from actions import (
+    ACTION_CATEGORIES,
+    ACTION_DIM,
+    ACTION_MASK_TABLE,
+    DICE_COUNT,
+    HOLD_POSITIONS,
+    MAX_ROLLS,
+    SCORE_OFFSET,
+    STATE_DIM,
+    UNIQUE_ACTION_MASKS,
+)
+from dice import DiceRNG
+from generala import GeneralaGame, unpack_dice
+
+REWARD_SCALE = 50.0
+
+# Filled-category bitmask -> its 11 observation entries
+_FILLED_BITS = (~ACTION_MASK_TABLE[0, :, SCORE_OFFSET:]).astype(np.float32)
+
+
+def encode_observation(game: GeneralaGame, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """GeneralaQAgent.state_to_tensor as float32 NumPy, written into ``out``."""
+    if out is None:
+        out = np.empty(STATE_DIM, dtype=np.float32)
+    core = game.core
+    dice = unpack_dice(core.dice)
+    held = unpack_dice(core.held)
+    out[:13] = 0.0
+    out[: len(dice)] = dice
+    out[DICE_COUNT : DICE_COUNT + len(held)] = held
+    out[2 * DICE_COUNT + min(max(core.roll_number - 1, 0), MAX_ROLLS - 1)] = 1.0
+    out[13:] = _FILLED_BITS[core.cards[core.current_player].filled]
+    return out
+
+
+class GeneralaEnv:
+    """``reset()`` / ``step(action)`` interface over one GeneralaGame.
+
+    Actions: 0 = roll all dice, 1..32 = roll keeping the dice selected by
+    hold mask ``action - 1`` (bit j keeps die j), 33..43 = score category
+    ``action - 33``. Observations follow GeneralaQAgent.state_to_tensor
+    and are written into a preallocated float32 buffer that the next call
+    overwrites.
+
+    A scoring step rewards the points written on the board divided by 50
+    (a served Generala counts as its 50 points) and passes the turn; any
+    other step rewards 0.
+    """
+
+    def __init__(
+        self,
+        player_names: Optional[List[str]] = None,
+        rng: Optional[DiceRNG] = None,
+    ) -> None:
+        self.player_names = player_names if player_names is not None else ["A", "B"]
+        self.rng = rng
+        self.game = GeneralaGame(self.player_names, rng=rng)
+        self.obs = np.zeros(STATE_DIM, dtype=np.float32)
+
+    def reset(self) -> np.ndarray:
+        self.game = GeneralaGame(self.player_names, rng=self.rng)
+        self.game.start_turn()
+        return self._observe(self.obs)
+
+    def _observe(self, out: np.ndarray) -> np.ndarray:
+        return encode_observation(self.game, out)
+
+    def action_mask(self, unique_holds: bool = False) -> np.ndarray:
+        """(44,) bool mask of legal actions for the player to move.
+
+        With ``unique_holds`` only one hold action per distinct kept
+        multiset is legal. Otherwise the mask is a read-only table row.
+        """
+        core = self.game.core
+        mask = ACTION_MASK_TABLE[
+            int(core.roll_number < MAX_ROLLS), core.cards[core.current_player].filled
+        ]
+        if unique_holds:
+            mask = mask & UNIQUE_ACTION_MASKS[core.dice]
+        return mask
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, Dict[str, Any]]:
+        """Apply ``action`` for the player to move.
+
+        Returns ``(observation, reward, done, info)``. ``info["player"]``
+        is the player that acted. After a scoring step ``info["score"]``
+        holds the points scored, ``info["category"]`` where they went,
+        ``info["served"]`` whether it was a served Generala, and
+        ``info["player_obs"]`` a copy of the acting player's observation
+        before the turn passed.
+        """
+        game = self.game
+        player = game.current_player
+        info: Dict[str, Any] = {"player": player}
+        if 0 <= action < SCORE_OFFSET:
+            if game.roll_number >= MAX_ROLLS:
+                raise ValueError("No rolls left")
+            dice = unpack_dice(game.core.dice)
+            game.roll([dice[j] for j in HOLD_POSITIONS[action]])
+            return self._observe(self.obs), 0.0, False, info
+
+        if not SCORE_OFFSET <= action < ACTION_DIM:
+            raise ValueError(f"Action must be between 0 and {ACTION_DIM - 1}, got {action}")
+        category = ACTION_CATEGORIES[action]
+        result = game.score(category)
+        score = 50 if result == "WIN" else result
+        info["score"] = score
+        info["category"] = category
+        info["served"] = result == "WIN"
+        info["player_obs"] = self._observe(np.empty(STATE_DIM, dtype=np.float32))
+        if not game.finished:
+            game.next_player()
+        return self._observe(self.obs), score / REWARD_SCALE, game.finished, info
+
+
+def sample_states(num_states: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Observations and legal-action masks from uniformly random games."""
+    env = GeneralaEnv(rng=DiceRNG(seed))
+    rng = np.random.default_rng(seed)
+    states = np.empty((num_states, STATE_DIM), dtype=np.float32)
+    masks = np.empty((num_states, ACTION_DIM), dtype=bool)
+    obs = env.reset()
+    for i in range(num_states):
+        states[i] = obs
+        masks[i] = env.action_mask()
+        obs, _, done, _ = env.step(int(rng.choice(np.flatnonzero(masks[i]))))
+        if done:
+            obs = env.reset()
+    return states, masks
@@ -0,0 +1,317 @@
+"""
+Parallel evaluation of Generala Q-agents with confidence intervals.
+
+Games are played in chunks. A chunk steps a VecGeneralaEnv of ``batch``
+games in lockstep and picks the moves of every game with one batched
+``act_batch`` call per step, so a worker process never plays a game on
+its own. Chunks keep being handed to a process pool until the 95%
+confidence interval of the mean score is at most ``target_ci_width``
+wide (after ``min_games``) or ``max_games`` have been played.
+
+With a baseline the agent takes one seat and the baseline the others,
+rotating seats from game to game; the report then includes the agent's
+win rate. Without one the agent plays every seat and a game's score is
+the mean over players, as in train_qagent.evaluate_model.
+"""
+import argparse
+import itertools
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from actions import NUM_CATEGORIES, SCORE_OFFSET
+from dice import DiceRNG
+from generala import SCORE_WIN, GeneralaRules
+from vec_env import VecGeneralaEnv
+
+BASELINES = ("random", "greedy")
+Z_95 = 1.959964
+
+# Per-process policies, set by _init_worker
+_worker_policy: Any = None
+_worker_baseline: Any = None
+
+
+def _load(config: Any) -> Any:
+    # Baseline names and NumPy agents are used as is; a checkpoint path is
+    # loaded here and a (state dict, hidden layers) tuple rebuilt as a torch
+    # agent, so only those workers import torch.
+    if config is None or config in BASELINES:
+        return config
+    if isinstance(config, str):
+        from inference_server import load_policy
+
+        return load_policy(config)
+    if isinstance(config, tuple):
+        import torch
+
+        from agent import GeneralaQAgent
+
+        torch.set_num_threads(1)
+        state_dict, hidden_layers = config
+        return GeneralaQAgent.from_state_dict(state_dict, hidden_layers)
+    return config
+
+
+def _portable(policy: Any) -> Any:
+    # What to send to worker processes for ``policy``
+    from_torch = hasattr(policy, "model") and hasattr(policy, "hidden_layers")
+    if from_torch:
+        state_dict = {k: v.cpu() for k, v in policy.model.state_dict().items()}
+        return state_dict, policy.hidden_layers
+    return policy
+
+
+def _init_worker(policy_config: Any, baseline_config: Any) -> None:
+    global _worker_policy, _worker_baseline
+    _worker_policy = _load(policy_config)
+    _worker_baseline = _load(baseline_config)
+
+
+def _policy_actions(policy: Any, states: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    actions = policy.act_batch(states, masks, 0.0)
+    if hasattr(actions, "cpu"):
+        actions = actions.cpu().numpy()
+    return np.asarray(actions)
+
+
+def _baseline_actions(
+    baseline: Any,
+    env: VecGeneralaEnv,
+    rows: np.ndarray,
+    states: np.ndarray,
+    masks: np.ndarray,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    if baseline == "random":
+        return np.where(masks, rng.random(masks.shape), -1.0).argmax(axis=1)
+    if baseline == "greedy":
+        # Score the best open category straight away, never reroll
+        scores = GeneralaRules.score_batch_unchecked(env.dice[rows], env.roll_number[rows])
+        scores = np.where(scores == SCORE_WIN, 50, scores).astype(np.float32)
+        scores = np.where(masks[:, SCORE_OFFSET:], scores, -1.0)
+        return scores.argmax(axis=1) + SCORE_OFFSET
+    return _policy_actions(baseline, states, masks)
+
+
+def play_games(
+    policy: Any,
+    baseline: Any,
+    games: int,
+    seed: np.random.SeedSequence,
+    num_players: int = 2,
+) -> Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]:
+    """Play ``games`` games side by side.
+
+    Returns the agent's score per game, the outcome per game (1 win,
+    0.5 tie, 0 loss; None without a baseline) and the agent's
+    per-category scores, shaped (games, NUM_CATEGORIES).
+    """
+    # Spawn from a copy: SeedSequence.spawn advances the original
+    dice_seed, policy_seed = np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key).spawn(2)
+    env = VecGeneralaEnv(games, num_players, rng=DiceRNG(dice_seed))
+    rng = np.random.default_rng(policy_seed)
+    seats = np.arange(games) % num_players
+    scores = np.zeros(games)
+    outcomes = np.zeros(games)
+    categories = np.zeros((games, NUM_CATEGORIES))
+    finished = np.zeros(games, dtype=bool)
+    states = env.reset()
+    while not finished.all():
+        masks = env.action_masks()
+        # Finished slots restart automatically; any legal move will do there
+        actions = masks.argmax(axis=1)
+        agent_turn = ~finished
+        if baseline is not None:
+            agent_turn &= env.current_player == seats
+            rows = np.flatnonzero(~finished & ~agent_turn)
+            if len(rows):
+                actions[rows] = _baseline_actions(baseline, env, rows, states[rows], masks[rows], rng)
+        rows = np.flatnonzero(agent_turn)
+        if len(rows):
+            actions[rows] = _policy_actions(policy, states[rows], masks[rows])
+        movers = env.current_player.copy()
+        states, _, dones, info = env.step(actions)
+        rows = np.flatnonzero(dones & ~finished)
+        if not len(rows):
+            continue
+        finished[rows] = True
+        totals = info["final_totals"][rows]
+        if baseline is None:
+            scores[rows] = totals.mean(axis=1)
+            categories[rows] = info["final_scores"][rows].mean(axis=1)
+            continue
+        own = seats[rows]
+        scores[rows] = totals[np.arange(len(rows)), own]
+        categories[rows] = info["final_scores"][rows, own]
+        others = np.where(np.arange(num_players) == own[:, None], np.iinfo(np.int32).min, totals)
+        best_other = others.max(axis=1)
+        outcome = np.where(scores[rows] > best_other, 1.0, np.where(scores[rows] == best_other, 0.5, 0.0))
+        # A served Generala wins outright for whoever scored it
+        served = info["served"][rows]
+        outcomes[rows] = np.where(served, (movers[rows] == own).astype(float), outcome)
+    return scores, outcomes if baseline is not None else None, categories
+
+
+def _worker_play(games: int, seed: np.random.SeedSequence, num_players: int) -> tuple:
+    return play_games(_worker_policy, _worker_baseline, games, seed, num_players)
+
+
+def _interval(values: np.ndarray) -> Dict[str, float]:
+    n = len(values)
+    mean = float(values.mean())
+    std_error = float(values.std(ddof=1) / math.sqrt(n)) if n > 1 else float("inf")
+    return {
+        "mean": mean,
+        "std_error": std_error,
+        "ci_low": mean - Z_95 * std_error,
+        "ci_high": mean + Z_95 * std_error,
+        "ci_width": 2 * Z_95 * std_error,
+    }
+
+
+def summarize(
+    scores: np.ndarray, outcomes: Optional[np.ndarray], categories: np.ndarray
+) -> Dict[str, Any]:
+    """Mean score with its standard error and normal 95% CI, the win rate
+    (with its own CI) when there are outcomes, and per-category score
+    statistics (mean, standard deviation, share of zero scores)."""
+    summary: Dict[str, Any] = {"games": len(scores), **_interval(scores)}
+    if outcomes is not None:
+        win = _interval(outcomes)
+        summary.update(
+            win_rate=win["mean"],
+            win_rate_ci=(max(win["ci_low"], 0.0), min(win["ci_high"], 1.0)),
+        )
+    summary["categories"] = {
+        category.value: {
+            "mean": float(categories[:, i].mean()),
+            "std": float(categories[:, i].std()),
+            "zero_rate": float((categories[:, i] == 0).mean()),
+        }
+        for i, category in enumerate(GeneralaRules.CATEGORIES)
+    }
+    return summary
+
+
+def evaluate(
+    policy: Any,
+    baseline: Any = None,
+    max_games: int = 10000,
+    min_games: int = 500,
+    target_ci_width: Optional[float] = None,
+    num_workers: int = 0,
+    batch: int = 256,
+    seed: Optional[int] = None,
+    num_players: int = 2,
+) -> Dict[str, Any]:
+    """Play up to ``max_games`` games of ``policy`` and summarize them.
+
+    ``policy`` is anything with ``act_batch`` (GeneralaQAgent, NumpyQAgent)
+    or a checkpoint path; ``baseline`` is None (self-play), "random",
+    "greedy" or another policy. With ``num_workers`` > 0 chunks of
+    ``batch`` games run on that many processes, otherwise in this one.
+    Stops early once the 95% CI of the mean score is at most
+    ``target_ci_width`` wide and ``min_games`` have been played.
+    """
+    if max_games <= 0:
+        raise ValueError(f"max_games must be positive, got {max_games}")
+    chunk_sizes = [min(batch, max_games - start) for start in range(0, max_games, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    results: List[tuple] = []
+
+    def done() -> bool:
+        played = sum(len(r[0]) for r in results)
+        if target_ci_width is None or played < max(min_games, 2):
+            return False
+        return _interval(np.concatenate([r[0] for r in results]))["ci_width"] <= target_ci_width
+
+    start = time.perf_counter()
+    if num_workers <= 0:
+        policy, baseline = _load(policy), _load(baseline)
+        for games, chunk_seed in zip(chunk_sizes, seeds):
+            results.append(play_games(policy, baseline, games, chunk_seed, num_players))
+            if done():
+                break
+    else:
+        chunks = iter(zip(chunk_sizes, seeds))
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(_portable(policy), _portable(baseline)),
+        ) as pool:
+            pending: Set[Future] = set()
+
+            def submit(count: int) -> None:
+                for games, chunk_seed in itertools.islice(chunks, count):
+                    pending.add(pool.submit(_worker_play, games, chunk_seed, num_players))
+
+            # Two chunks per worker keep every process busy between checks
+            submit(2 * num_workers)
+            while pending:
+                completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(f.result() for f in completed)
+                if done():
+                    for future in pending:
+                        future.cancel()
+                    break
+                submit(len(completed))
+    elapsed = time.perf_counter() - start
+
+    scores = np.concatenate([r[0] for r in results])
+    outcomes = None if baseline is None else np.concatenate([r[1] for r in results])
+    summary = summarize(scores, outcomes, np.concatenate([r[2] for r in results]))
+    summary["elapsed"] = elapsed
+    summary["games_per_s"] = len(scores) / elapsed
+    return summary
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"{summary['games']} games in {summary['elapsed']:.1f}s ({summary['games_per_s']:.0f} games/s)",
+        f"Mean score {summary['mean']:.2f} +/- {summary['std_error']:.2f} (s.e.), "
+        f"95% CI [{summary['ci_low']:.2f}, {summary['ci_high']:.2f}]",
+    ]
+    if "win_rate" in summary:
+        low, high = summary["win_rate_ci"]
+        lines.append(f"Win rate vs baseline {100 * summary['win_rate']:.1f}% (95% CI {100 * low:.1f}-{100 * high:.1f}%)")
+    lines.append(f"{'category':<16} {'mean':>7} {'std':>7} {'zero %':>7}")
+    for name, stats in summary["categories"].items():
+        lines.append(
+            f"{name:<16} {stats['mean']:>7.2f} {stats['std']:>7.2f} {100 * stats['zero_rate']:>6.1f}%"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a Generala QAgent over many games in parallel.")
+    parser.add_argument("checkpoint", help=".npz weights, exported TorchScript model or .pth checkpoint")
+    parser.add_argument("--baseline", default=None, help="random, greedy or another checkpoint (default: self-play)")
+    parser.add_argument("--max-games", type=int, default=10000)
+    parser.add_argument("--min-games", type=int, default=500)
+    parser.add_argument("--target-ci-width", type=float, default=None, help="Stop once the 95%% CI of the mean score is this wide")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes (0 = play in this process)")
+    parser.add_argument("--batch", type=int, default=256, help="Games played side by side per chunk")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    summary = evaluate(
+        args.checkpoint,
+        args.baseline,
+        max_games=args.max_games,
+        min_games=args.min_games,
+        target_ci_width=args.target_ci_width,
+        num_workers=args.workers,
+        batch=args.batch,
+        seed=args.seed,
+        num_players=args.players,
+    )
+    print(format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Turn-level expectimax for Generala with memoized, bounded LRU caches.
+"""
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from generala import GeneralaGame, GeneralaRules
+from solver import ALL_OPEN, SCORE_OFFSET, hold_action_for_keep
+from transitions import multiset_probability
+
+# All outcomes of rolling n dice, as (sorted dice, probability).
+_OUTCOMES: Dict[int, List[Tuple[Tuple[int, ...], float]]] = {
+    n: [
+        (outcome, multiset_probability(outcome))
+        for outcome in combinations_with_replacement(range(1, 7), n)
+    ]
+    for n in range(GeneralaRules.DICE_COUNT + 1)
+}
+
+
+@lru_cache(maxsize=None)
+def _unique_keeps(dice: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+    # The 32 hold masks collapse to far fewer kept multisets once dice repeat
+    return sorted(
+        {
+            tuple(d for j, d in enumerate(dice) if bits >> j & 1)
+            for bits in range(2**GeneralaRules.DICE_COUNT)
+        }
+    )
+
+
+class TurnExpectimax:
+    """Expected-value-maximizing decisions for the current turn.
+
+    States are keyed on the sorted dice, the roll number and the
+    open-category mask, and cached in bounded LRU caches, so repeated
+    queries are answered from memory after warm-up.
+
+    ``future_values`` optionally maps an open-category mask to the
+    expected points of the rest of the game (for example
+    ``SolitaireSolver.turn_values``). Without it the engine maximizes the
+    score of this turn alone.
+    """
+
+    def __init__(
+        self,
+        cache_size: Optional[int] = 200_000,
+        future_values: Optional[Sequence[float]] = None,
+    ) -> None:
+        self.future_values = future_values
+        self._state_value = lru_cache(maxsize=cache_size)(self._state_value_uncached)
+        self._keep_value = lru_cache(maxsize=cache_size)(self._keep_value_uncached)
+
+    def _future(self, mask: int) -> float:
+        return 0.0 if self.future_values is None else float(self.future_values[mask])
+
+    def _best_score(
+        self, dice: Tuple[int, ...], roll_number: int, mask: int
+    ) -> Tuple[float, int]:
+        scores = GeneralaRules.score_all_categories_unchecked(dice, roll_number)
+        best_value, best_cat = -1.0, -1
+        for cat in range(len(scores)):
+            if not mask >> cat & 1:
+                continue
+            score = scores[cat]
+            if score == "WIN":
+                value = 50.0  # a served Generala ends the game
+            else:
+                value = score + self._future(mask & ~(1 << cat))
+            if value > best_value:
+                best_value, best_cat = value, cat
+        return best_value, best_cat
+
+    def _state_value_uncached(
+        self, dice: Tuple[int, ...], roll_number: int, mask: int
+    ) -> float:
+        value, _ = self._best_score(dice, roll_number, mask)
+        if roll_number < GeneralaRules.MAX_ROLLS:
+            for keep in _unique_keeps(dice):
+                value = max(value, self._keep_value(keep, roll_number + 1, mask))
+        return value
+
+    def _keep_value_uncached(
+        self, keep: Tuple[int, ...], roll_number: int, mask: int
+    ) -> float:
+        return sum(
+            prob * self._state_value(tuple(sorted(keep + outcome)), roll_number, mask)
+            for outcome, prob in _OUTCOMES[GeneralaRules.DICE_COUNT - len(keep)]
+        )
+
+    def evaluate(
+        self, dice: List[int], roll_number: int, open_mask: int
+    ) -> Tuple[Optional[Tuple[int, ...]], int, float]:
+        """Best decision as ``(keep, category, value)``.
+
+        ``keep`` is the multiset to hold before rerolling, or None when
+        scoring ``category`` (an index into GeneralaRules.CATEGORIES) is
+        best. ``value`` is the expected value of that decision.
+        """
+        if not open_mask:
+            raise ValueError("No open categories left")
+        dice_key = tuple(sorted(dice))
+        value, category = self._best_score(dice_key, roll_number, open_mask)
+        best_keep = None
+        if roll_number < GeneralaRules.MAX_ROLLS:
+            for keep in _unique_keeps(dice_key):
+                keep_value = self._keep_value(keep, roll_number + 1, open_mask)
+                if keep_value > value:
+                    value, best_keep = keep_value, keep
+        return best_keep, category, value
+
+    def best_action(self, game: GeneralaGame) -> int:
+        """Best action for the player to move, in the GeneralaQAgent layout."""
+        open_mask = ALL_OPEN & ~game.scoreboards[game.current_player].filled_mask
+        dice = game.dice
+        keep, category, _ = self.evaluate(dice, game.roll_number, open_mask)
+        if keep is None:
+            return SCORE_OFFSET + category
+        return hold_action_for_keep(dice, keep)
+
+    def cache_info(self) -> Dict[str, object]:
+        return {
+            "states": self._state_value.cache_info(),
+            "keeps": self._keep_value.cache_info(),
+        }
+
+    def clear_cache(self) -> None:
+        self._state_value.cache_clear()
+        self._keep_value.cache_clear()
@@ -0,0 +1,143 @@
+"""
+Export a trained GeneralaQNetwork for fast CPU inference.
+
+The default export is a frozen TorchScript trace of the network with every
+nn.Linear dynamically quantized to int8. load_inference_model falls back to
+the eager fp32 network when a file is a plain state-dict checkpoint or the
+TorchScript model cannot run here (for example without a quantized engine).
+An ``.npz`` export holds the fp32 weights for the torch-free numpy_agent.py.
+"""
+import argparse
+import warnings
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from agent import GeneralaQAgent, load_checkpoint
+from env import STATE_DIM, sample_states
+from numpy_agent import NumpyQNetwork
+
+
+@contextmanager
+def _quiet():
+    # TorchScript and eager-mode quantization are deprecated upstream but
+    # still the fastest CPU path for a small MLP.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", FutureWarning)
+        warnings.filterwarnings("ignore", message=".*quantize.*")
+        yield
+
+
+def hidden_layers_from_state_dict(state_dict: Dict[str, torch.Tensor]) -> List[int]:
+    weights = [v for k, v in state_dict.items() if k.endswith("weight")]
+    return [w.shape[0] for w in weights[:-1]]
+
+
+def quantize(model: nn.Module) -> nn.Module:
+    """Dynamically int8-quantized copy of ``model``'s Linear layers."""
+    with _quiet():
+        return torch.ao.quantization.quantize_dynamic(
+            model.eval(), {nn.Linear}, dtype=torch.qint8
+        )
+
+
+def export_model(model: nn.Module, path: str, int8: bool = True) -> torch.jit.ScriptModule:
+    """Trace, freeze and save ``model`` (quantized unless ``int8`` is False)."""
+    if int8:
+        model = quantize(model)
+    with _quiet():
+        with torch.inference_mode():
+            traced = torch.jit.trace(model.eval(), torch.zeros(1, STATE_DIM))
+        traced = torch.jit.freeze(traced)
+        torch.jit.save(traced, path)
+    return traced
+
+
+def load_inference_model(path: str) -> nn.Module:
+    """Load an exported model, or the eager fp32 network as a fallback.
+
+    ``path`` may be a file written by export_model or a state-dict
+    checkpoint saved by train_qagent.py.
+    """
+    try:
+        with _quiet():
+            model = torch.jit.load(path, map_location="cpu")
+            with torch.inference_mode():
+                model(torch.zeros(1, STATE_DIM))
+        return model
+    except (RuntimeError, ValueError):
+        pass  # not TorchScript, or it cannot run on this build
+    state_dict = load_checkpoint(path)
+    return GeneralaQAgent.from_state_dict(
+        state_dict, hidden_layers_from_state_dict(state_dict)
+    ).model.eval()
+
+
+def export_npz(model: nn.Module, path: str) -> None:
+    """Write ``model``'s Linear layers as a NumPy archive for numpy_agent.py."""
+    linears = [m for m in model.modules() if isinstance(m, nn.Linear)]
+    NumpyQNetwork(
+        [layer.weight.detach().cpu().numpy() for layer in linears],
+        [layer.bias.detach().cpu().numpy() for layer in linears],
+    ).save(path)
+
+
+def drift_report(
+    expected: np.ndarray, actual: np.ndarray, masks: np.ndarray
+) -> Dict[str, float]:
+    """How far ``actual`` Q-values and masked greedy decisions drift from ``expected``."""
+    error = np.abs(actual - expected)
+    agree = np.where(masks, expected, -np.inf).argmax(axis=1) == np.where(
+        masks, actual, -np.inf
+    ).argmax(axis=1)
+    return {
+        "states": len(expected),
+        "max_abs_error": float(error.max()),
+        "mean_abs_error": float(error.mean()),
+        "argmax_agreement": float(agree.mean()),
+    }
+
+
+def _predict(model: nn.Module, states: np.ndarray) -> np.ndarray:
+    with torch.inference_mode():
+        return model(torch.from_numpy(states)).numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a QAgent checkpoint for CPU inference.")
+    parser.add_argument("checkpoint", help="State-dict checkpoint saved by train_qagent.py")
+    parser.add_argument(
+        "output",
+        help="Path of the exported model: TorchScript, or NumPy weights if it ends in .npz",
+    )
+    parser.add_argument("--no-int8", action="store_true", help="Export fp32 TorchScript weights")
+    parser.add_argument("--eval-states", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=12345)
+    args = parser.parse_args()
+
+    state_dict = load_checkpoint(args.checkpoint)
+    reference = GeneralaQAgent.from_state_dict(
+        state_dict, hidden_layers_from_state_dict(state_dict)
+    ).model.eval()
+    states, masks = sample_states(args.eval_states, args.seed)
+    if args.output.endswith(".npz"):
+        export_npz(reference, args.output)
+        actual = NumpyQNetwork.load(args.output)(states)
+    else:
+        export_model(reference, args.output, int8=not args.no_int8)
+        actual = _predict(load_inference_model(args.output), states)
+    report = drift_report(_predict(reference, states), actual, masks)
+    print(f"Saved exported model to {args.output}")
+    print(
+        f"Drift over {report['states']} held-out states: "
+        f"max |dQ| {report['max_abs_error']:.4f}, mean |dQ| {report['mean_abs_error']:.4f}, "
+        f"greedy action agreement {100 * report['argmax_agreement']:.2f}%"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+from collections.abc import Mapping
 from enum import Enum, auto
 from collections import defaultdict
 import random
-from typing import List, Optional, Dict, Union
 
+import numpy as np
+from itertools import combinations_with_replacement, product
+from typing import Iterator, List, Optional, Dict, Tuple, Union
+
+from dice import DiceRNG
 from validation import (
     validate_dice_list,
     validate_dice_count,
@@ -59,64 +64,314 @@ class GeneralaRules:
         validate_dice_list(dice)
         validate_dice_count(dice, GeneralaRules.DICE_COUNT)
         validate_roll_number(roll_number, GeneralaRules.MAX_ROLLS)
-        
-        counts = {i: dice.count(i) for i in range(1, 7)}
-        bonus = (
-            5
-            if roll_number == 1
-            and category
-            in [
-                GeneralaCategory.ESCALERA,
-                GeneralaCategory.FULL,
-                GeneralaCategory.POKER,
-            ]
-            else 0
-        )
-        if category == GeneralaCategory.ONES:
-            return counts[1] * 1
-        elif category == GeneralaCategory.TWOS:
-            return counts[2] * 2
-        elif category == GeneralaCategory.THREES:
-            return counts[3] * 3
-        elif category == GeneralaCategory.FOURS:
-            return counts[4] * 4
-        elif category == GeneralaCategory.FIVES:
-            return counts[5] * 5
-        elif category == GeneralaCategory.SIXES:
-            return counts[6] * 6
-        elif category == GeneralaCategory.ESCALERA:
-            return (
-                20 + bonus if sorted(dice) in ([1, 2, 3, 4, 5], [2, 3, 4, 5, 6]) else 0
+
+        return _SCORE_TABLE[roll_number == 1][DICE_INDEX[tuple(dice)]][
+            _CATEGORY_INDEX[category]
+        ]
+
+    @staticmethod
+    def score_category_unchecked(
+        category: GeneralaCategory, dice: List[int], roll_number: int = 1
+    ) -> Union[int, str]:
+        """Table lookup without validation, for callers that own valid dice."""
+        return _SCORE_TABLE[roll_number == 1][DICE_INDEX[tuple(dice)]][
+            _CATEGORY_INDEX[category]
+        ]
+
+    @staticmethod
+    def score_all_categories(
+        dice: List[int], roll_number: int = 1
+    ) -> Tuple[Union[int, str], ...]:
+        """Scores for every category, in GeneralaRules.CATEGORIES order."""
+        validate_dice_list(dice)
+        validate_dice_count(dice, GeneralaRules.DICE_COUNT)
+        validate_roll_number(roll_number, GeneralaRules.MAX_ROLLS)
+
+        return _SCORE_TABLE[roll_number == 1][DICE_INDEX[tuple(dice)]]
+
+    @staticmethod
+    def score_all_categories_unchecked(
+        dice: List[int], roll_number: int = 1
+    ) -> Tuple[Union[int, str], ...]:
+        return _SCORE_TABLE[roll_number == 1][DICE_INDEX[tuple(dice)]]
+
+    @staticmethod
+    def score_batch(dice: np.ndarray, roll_numbers: np.ndarray) -> np.ndarray:
+        """Score N hands at once.
+
+        Takes an (N, 5) array of dice and an (N,) array of roll numbers and
+        returns an (N, 11) int16 matrix in GeneralaRules.CATEGORIES order. A
+        served Generala (five of a kind on the first roll) is reported as
+        SCORE_WIN in the GENERALA column.
+        """
+        dice = np.asarray(dice)
+        roll_numbers = np.asarray(roll_numbers)
+        if dice.ndim != 2 or dice.shape[1] != GeneralaRules.DICE_COUNT:
+            raise ValueError(
+                f"Dice must have shape (N, {GeneralaRules.DICE_COUNT}), got {dice.shape}"
+            )
+        if roll_numbers.shape != (dice.shape[0],):
+            raise ValueError(
+                f"Roll numbers must have shape ({dice.shape[0]},), got {roll_numbers.shape}"
             )
-        elif category == GeneralaCategory.FULL:
-            return 30 + bonus if sorted(counts.values())[-2:] == [2, 3] else 0
-        elif category == GeneralaCategory.POKER:
-            return 40 + bonus if 4 in counts.values() else 0
-        elif category == GeneralaCategory.GENERALA:
-            if 5 in counts.values():
-                if roll_number == 1:
-                    return "WIN"
-                return 50
-            return 0
-        elif category == GeneralaCategory.DOUBLE_GENERALA:
-            return 100 if 5 in counts.values() else 0
+        if not np.issubdtype(dice.dtype, np.integer) or not np.issubdtype(
+            roll_numbers.dtype, np.integer
+        ):
+            raise ValueError("Dice and roll numbers must be integer arrays")
+        if dice.size and (dice.min() < 1 or dice.max() > 6):
+            raise ValueError("All dice values must be integers between 1 and 6")
+        if roll_numbers.size and (
+            roll_numbers.min() < 1 or roll_numbers.max() > GeneralaRules.MAX_ROLLS
+        ):
+            raise ValueError(
+                f"Roll numbers must be between 1 and {GeneralaRules.MAX_ROLLS}"
+            )
+
+        return GeneralaRules.score_batch_unchecked(dice, roll_numbers)
+
+    @staticmethod
+    def score_batch_unchecked(dice: np.ndarray, roll_numbers: np.ndarray) -> np.ndarray:
+        first_roll = (np.asarray(roll_numbers) == 1).astype(np.intp)
+        return SCORE_ARRAY[first_roll, dice_multiset_indices(dice)]
+
+
+def _rule_score(
+    category: GeneralaCategory, dice: Tuple[int, ...], roll_number: int
+) -> Union[int, str]:
+    # Reference implementation of the scoring rules, only used to build the
+    # lookup tables below.
+    counts = {i: dice.count(i) for i in range(1, 7)}
+    bonus = (
+        5
+        if roll_number == 1
+        and category
+        in [
+            GeneralaCategory.ESCALERA,
+            GeneralaCategory.FULL,
+            GeneralaCategory.POKER,
+        ]
+        else 0
+    )
+    if category == GeneralaCategory.ONES:
+        return counts[1] * 1
+    elif category == GeneralaCategory.TWOS:
+        return counts[2] * 2
+    elif category == GeneralaCategory.THREES:
+        return counts[3] * 3
+    elif category == GeneralaCategory.FOURS:
+        return counts[4] * 4
+    elif category == GeneralaCategory.FIVES:
+        return counts[5] * 5
+    elif category == GeneralaCategory.SIXES:
+        return counts[6] * 6
+    elif category == GeneralaCategory.ESCALERA:
+        return (
+            20 + bonus if sorted(dice) in ([1, 2, 3, 4, 5], [2, 3, 4, 5, 6]) else 0
+        )
+    elif category == GeneralaCategory.FULL:
+        return 30 + bonus if sorted(counts.values())[-2:] == [2, 3] else 0
+    elif category == GeneralaCategory.POKER:
+        return 40 + bonus if 4 in counts.values() else 0
+    elif category == GeneralaCategory.GENERALA:
+        if 5 in counts.values():
+            if roll_number == 1:
+                return "WIN"
+            return 50
         return 0
+    elif category == GeneralaCategory.DOUBLE_GENERALA:
+        return 100 if 5 in counts.values() else 0
+    return 0
 
 
-class GeneralaScoreBoard:
+# Scoring only depends on the dice multiset and on whether it is the first
+# roll, so every score is computed once here: 252 sorted multisets x 11
+# categories x {later roll, first roll}.
+DICE_MULTISETS: List[Tuple[int, ...]] = list(
+    combinations_with_replacement(range(1, 7), GeneralaRules.DICE_COUNT)
+)
+_MULTISET_INDEX = {ms: i for i, ms in enumerate(DICE_MULTISETS)}
+# Every ordered roll maps straight to its multiset, so lookups skip the sort.
+DICE_INDEX: Dict[Tuple[int, ...], int] = {
+    roll: _MULTISET_INDEX[tuple(sorted(roll))]
+    for roll in product(range(1, 7), repeat=GeneralaRules.DICE_COUNT)
+}
+_CATEGORY_INDEX = {cat: i for i, cat in enumerate(GeneralaRules.CATEGORIES)}
+_SCORE_TABLE: Tuple[Tuple[Tuple[Union[int, str], ...], ...], ...] = tuple(
+    tuple(
+        tuple(_rule_score(cat, ms, roll_number) for cat in GeneralaRules.CATEGORIES)
+        for ms in DICE_MULTISETS
+    )
+    for roll_number in (2, 1)
+)
+
+# Sentinel used by the NumPy APIs for a served Generala ("WIN").
+SCORE_WIN = -1
+SCORE_ARRAY = np.array(
+    [
+        [[SCORE_WIN if s == "WIN" else s for s in scores] for scores in table]
+        for table in _SCORE_TABLE
+    ],
+    dtype=np.int16,
+)
+# DICE_INDEX is in itertools.product order, i.e. the base-6 number of the dice.
+_DICE_INDEX_ARRAY = np.fromiter(DICE_INDEX.values(), dtype=np.intp)
+_BASE6_WEIGHTS = 6 ** np.arange(GeneralaRules.DICE_COUNT - 1, -1, -1)
+
+
+def dice_multiset_indices(dice: np.ndarray) -> np.ndarray:
+    """Map an (N, 5) array of dice to indices into DICE_MULTISETS."""
+    return _DICE_INDEX_ARRAY[(np.asarray(dice) - 1) @ _BASE6_WEIGHTS]
+
+
+# Dice lists of up to five dice are packed into one small int, three bits per
+# die (0 marks an empty slot). Every valid list is enumerated up front so
+# packing and unpacking are single dict lookups.
+_UNPACKED_DICE: Dict[int, Tuple[int, ...]] = {}
+for _count in range(GeneralaRules.DICE_COUNT + 1):
+    for _dice in product(range(1, 7), repeat=_count):
+        _UNPACKED_DICE[sum(d << (3 * i) for i, d in enumerate(_dice))] = _dice
+_PACKED_DICE: Dict[Tuple[int, ...], int] = {
+    dice: packed for packed, dice in _UNPACKED_DICE.items()
+}
+# Packed five-dice hands straight to their DICE_MULTISETS index.
+PACKED_DICE_INDEX: Dict[int, int] = {
+    packed: DICE_INDEX[dice]
+    for packed, dice in _UNPACKED_DICE.items()
+    if len(dice) == GeneralaRules.DICE_COUNT
+}
+
+
+def pack_dice(dice: List[int]) -> int:
+    try:
+        return _PACKED_DICE[tuple(dice)]
+    except (KeyError, TypeError):
+        validate_held_dice_count(dice, GeneralaRules.DICE_COUNT)
+        validate_dice_list(dice, allow_empty=True)
+        raise
+
+
+def unpack_dice(packed: int) -> Tuple[int, ...]:
+    return _UNPACKED_DICE[packed]
+
+
+class ScoreCard:
+    """Compact per-player scores: values packed 16 bits per category into one
+    int, a filled-category bitmask and a running total."""
+
+    __slots__ = ("values", "filled", "total")
+
+    MAX_SCORE = 0xFFFF
+
     def __init__(self) -> None:
-        self.scores: Dict[GeneralaCategory, Optional[int]] = {
-            cat: None for cat in GeneralaRules.CATEGORIES
-        }
+        self.values = 0
+        self.filled = 0
+        self.total = 0
+
+    def set(self, index: int, score: int) -> None:
+        # Caller checks that the category is still open
+        self.values |= score << (16 * index)
+        self.filled |= 1 << index
+        self.total += score
+
+    def get(self, index: int) -> Optional[int]:
+        if self.filled >> index & 1:
+            return self.values >> (16 * index) & 0xFFFF
+        return None
+
+
+class GameCore:
+    """All mutable game state in a handful of slots; GeneralaGame is a view over it."""
+
+    __slots__ = (
+        "dice",
+        "held",
+        "roll_number",
+        "current_player",
+        "round",
+        "finished",
+        "cards",
+    )
+
+    def __init__(self, num_players: int) -> None:
+        self.dice = 0  # packed, see pack_dice
+        self.held = 0
+        self.roll_number = 1
+        self.current_player = 0
+        self.round = 0
+        self.finished = False
+        self.cards = [ScoreCard() for _ in range(num_players)]
+
+    def state(self) -> tuple:
+        """Immutable snapshot of the whole game; see ``load``."""
+        return (
+            self.dice,
+            self.held,
+            self.roll_number,
+            self.current_player,
+            self.round,
+            self.finished,
+            tuple([(card.values, card.filled, card.total) for card in self.cards]),
+        )
+
+    def load(self, state: tuple) -> None:
+        (
+            self.dice,
+            self.held,
+            self.roll_number,
+            self.current_player,
+            self.round,
+            self.finished,
+            cards,
+        ) = state
+        for card, (values, filled, total) in zip(self.cards, cards):
+            card.values = values
+            card.filled = filled
+            card.total = total
+
+
+class _ScoresView(Mapping):
+    """Read-only ``{category: score or None}`` view of a ScoreCard."""
+
+    __slots__ = ("_card",)
+
+    def __init__(self, card: ScoreCard) -> None:
+        self._card = card
+
+    def __getitem__(self, category: GeneralaCategory) -> Optional[int]:
+        return self._card.get(_CATEGORY_INDEX[category])
+
+    def __iter__(self) -> Iterator[GeneralaCategory]:
+        return iter(GeneralaRules.CATEGORIES)
+
+    def __len__(self) -> int:
+        return len(GeneralaRules.CATEGORIES)
+
+
+class GeneralaScoreBoard:
+    __slots__ = ("card",)
+
+    def __init__(self, card: Optional[ScoreCard] = None) -> None:
+        self.card = card if card is not None else ScoreCard()
+
+    @property
+    def scores(self) -> Mapping:
+        return _ScoresView(self.card)
+
+    @property
+    def filled_mask(self) -> int:
+        """Bit i is set once GeneralaRules.CATEGORIES[i] has been scored."""
+        return self.card.filled
 
     def set_score(self, category: GeneralaCategory, score: int) -> None:
-        if self.scores[category] is None:
-            self.scores[category] = score
-        else:
+        index = _CATEGORY_INDEX[category]
+        if self.card.filled >> index & 1:
             raise ValueError(f"Category '{category}' already scored.")
+        if not 0 <= score <= ScoreCard.MAX_SCORE:
+            raise ValueError(f"Score must be between 0 and {ScoreCard.MAX_SCORE}, got {score}")
+        self.card.set(index, score)
 
     def total_score(self) -> int:
-        return sum(score for score in self.scores.values() if score is not None)
+        return self.card.total
 
     def __str__(self) -> str:
         return "\n".join(
@@ -126,30 +381,121 @@ class GeneralaScoreBoard:
 
 
 class GeneralaGame:
-    def __init__(self, player_names: List[str]):
+    __slots__ = ("core", "player_names", "scoreboards", "num_categories", "rng")
+
+    def __init__(self, player_names: List[str], rng: Optional[DiceRNG] = None):
         validate_player_names(player_names)
         self.player_names = player_names
-        self.scoreboards = [GeneralaScoreBoard() for _ in player_names]
-        self.current_player = 0
-        self.round = 0
-        self.dice: List[int] = []
-        self.held: List[int] = []
-        self.roll_number = 1
-        self.finished = False
+        # Injected dice source; None falls back to GeneralaRules.roll_dice.
+        self.rng = rng
+        self.core = GameCore(len(player_names))
+        self.scoreboards = [GeneralaScoreBoard(card) for card in self.core.cards]
         self.num_categories = len(GeneralaRules.CATEGORIES)
 
+    @property
+    def dice(self) -> List[int]:
+        return list(_UNPACKED_DICE[self.core.dice])
+
+    @dice.setter
+    def dice(self, dice: List[int]) -> None:
+        self.core.dice = pack_dice(dice)
+
+    @property
+    def held(self) -> List[int]:
+        return list(_UNPACKED_DICE[self.core.held])
+
+    @held.setter
+    def held(self, held: List[int]) -> None:
+        self.core.held = pack_dice(held)
+
+    @property
+    def roll_number(self) -> int:
+        return self.core.roll_number
+
+    @roll_number.setter
+    def roll_number(self, roll_number: int) -> None:
+        self.core.roll_number = roll_number
+
+    @property
+    def current_player(self) -> int:
+        return self.core.current_player
+
+    @current_player.setter
+    def current_player(self, player: int) -> None:
+        self.core.current_player = player
+
+    @property
+    def round(self) -> int:
+        return self.core.round
+
+    @round.setter
+    def round(self, round_: int) -> None:
+        self.core.round = round_
+
+    @property
+    def finished(self) -> bool:
+        return self.core.finished
+
+    @finished.setter
+    def finished(self, finished: bool) -> None:
+        self.core.finished = finished
+
+    def snapshot(self) -> Tuple[tuple, object]:
+        """Capture the game and dice-stream state for a later ``restore``.
+
+        With an injected DiceRNG this is a small tuple of ints plus a
+        reference to the dice buffer; without one the global ``random`` state has to be
+        copied as well, which is much slower.
+        """
+        rng_state = random.getstate() if self.rng is None else self.rng.get_state()
+        return self.core.state(), rng_state
+
+    def restore(self, snapshot: Tuple[tuple, object]) -> None:
+        """Return to a ``snapshot``; the same snapshot can be restored many times."""
+        state, rng_state = snapshot
+        self.core.load(state)
+        if self.rng is None:
+            random.setstate(rng_state)  # type: ignore[arg-type]
+        else:
+            self.rng.set_state(rng_state)  # type: ignore[arg-type]
+
+    def clone(self) -> "GeneralaGame":
+        """Independent copy, including a copy of the injected dice stream.
+
+        Without an injected DiceRNG the clone keeps using the shared global
+        ``random`` module, so branches are not reproducible.
+        """
+        game = GeneralaGame.__new__(GeneralaGame)
+        game.player_names = self.player_names
+        game.num_categories = self.num_categories
+        game.rng = None if self.rng is None else self.rng.copy()
+        game.core = core = GameCore.__new__(GameCore)
+        core.cards = [ScoreCard() for _ in self.core.cards]
+        core.load(self.core.state())
+        game.scoreboards = [GeneralaScoreBoard(card) for card in core.cards]
+        return game
+
+    def _roll_dice(self, held: Optional[List[int]] = None) -> List[int]:
+        if self.rng is None:
+            return GeneralaRules.roll_dice(held)
+        return self.rng.roll(held)
+
     def start_turn(self):
-        self.dice = GeneralaRules.roll_dice()
-        self.held = []
-        self.roll_number = 1
+        core = self.core
+        core.dice = pack_dice(self._roll_dice())
+        core.held = 0
+        core.roll_number = 1
 
     def roll(self, held: Optional[List[int]] = None):
-        if self.roll_number >= GeneralaRules.MAX_ROLLS:
+        core = self.core
+        if core.roll_number >= GeneralaRules.MAX_ROLLS:
             raise Exception("No rolls left")
-        self.held = held if held is not None else []
-        self.dice = GeneralaRules.roll_dice(self.held)
-        self.roll_number += 1
-        return self.dice
+        held = held if held is not None else []
+        dice = self._roll_dice(held)
+        core.held = pack_dice(held)
+        core.dice = pack_dice(dice)
+        core.roll_number += 1
+        return dice
 
     def can_score(self):
         return self.roll_number > 0
@@ -157,24 +503,32 @@ class GeneralaGame:
     def score(self, category: GeneralaCategory):
         if not self.can_score():
             raise ValueError("Cannot score before making at least one roll")
-        
-        score = GeneralaRules.score_category(category, self.dice, self.roll_number)
+
+        core = self.core
+        try:
+            score = _SCORE_TABLE[core.roll_number == 1][PACKED_DICE_INDEX[core.dice]][
+                _CATEGORY_INDEX[category]
+            ]
+        except KeyError:
+            # Not a valid hand; let the checked path raise the proper error.
+            score = GeneralaRules.score_category(category, self.dice, self.roll_number)
         if score == "WIN":
-            self.scoreboards[self.current_player].set_score(category, 50)
-            self.finished = True
+            self.scoreboards[core.current_player].set_score(category, 50)
+            core.finished = True
             return "WIN"
         elif isinstance(score, int):
-            self.scoreboards[self.current_player].set_score(category, score)
+            self.scoreboards[core.current_player].set_score(category, score)
             return score
         else:
             raise Exception(f"Invalid score: {score}")
 
     def next_player(self):
-        self.current_player = (self.current_player + 1) % len(self.player_names)
-        if self.current_player == 0:
-            self.round += 1
-        if self.round >= self.num_categories:
-            self.finished = True
+        core = self.core
+        core.current_player = (core.current_player + 1) % len(self.player_names)
+        if core.current_player == 0:
+            core.round += 1
+        if core.round >= self.num_categories:
+            core.finished = True
         self.start_turn()
 
     def get_winner(self):
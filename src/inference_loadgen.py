@@ -0,0 +1,134 @@
+"""
+Load generator for inference_server.py.
+
+For each batching window it starts a server process, drives it with
+concurrent client processes (one connection each, one request in flight
+per connection, like independent game sessions) and reports latency
+percentiles and throughput.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from env import ACTION_DIM, STATE_DIM, sample_states
+from inference_server import Address, InferenceClient
+from numpy_agent import NumpyQNetwork
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inference_server.py")
+
+
+def _client(
+    args: Tuple[Address, int, int, int]
+) -> Tuple[float, float, List[float]]:
+    address, requests, warmup, seed = args
+    states, masks = sample_states(256, seed)
+    latencies = []
+    with InferenceClient(address) as client:
+        for i in range(warmup):
+            client.act(states[i % 256], masks[i % 256])
+        start = time.perf_counter()
+        for i in range(requests):
+            sent = time.perf_counter()
+            client.act(states[i % 256], masks[i % 256])
+            latencies.append(time.perf_counter() - sent)
+        end = time.perf_counter()
+    return start, end, latencies
+
+
+def _start_server(
+    checkpoint: str, window_ms: float, max_batch: int, unix_path: Optional[str]
+) -> Tuple[subprocess.Popen, Address]:
+    command = [
+        sys.executable, SERVER, checkpoint,
+        "--window-ms", str(window_ms), "--max-batch", str(max_batch),
+    ]
+    command += ["--unix", unix_path] if unix_path else ["--port", "0"]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    assert server.stdout is not None
+    line = server.stdout.readline()
+    if not line.startswith("Listening on "):
+        server.kill()
+        raise RuntimeError(f"Inference server failed to start: {line!r}")
+    address = line[len("Listening on "):].strip()
+    return server, address if unix_path else tuple(ast.literal_eval(address))
+
+
+def run_load(
+    checkpoint: str,
+    window_ms: float,
+    clients: int,
+    requests: int,
+    max_batch: int = 256,
+    unix_path: Optional[str] = None,
+) -> dict:
+    server, address = _start_server(checkpoint, window_ms, max_batch, unix_path)
+    try:
+        with Pool(clients) as pool:
+            results = pool.map(
+                _client, [(address, requests, 20, seed) for seed in range(clients)]
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+    latencies = np.concatenate([r[2] for r in results]) * 1000.0
+    elapsed = max(r[1] for r in results) - min(r[0] for r in results)
+    return {
+        "window_ms": window_ms,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput": len(latencies) / elapsed,
+    }
+
+
+def _random_weights(path: str, hidden_layers: List[int], seed: int = 0) -> None:
+    # He-initialized stand-in network for benchmarking without a checkpoint
+    rng = np.random.default_rng(seed)
+    sizes = [STATE_DIM] + hidden_layers + [ACTION_DIM]
+    weights = [
+        rng.normal(0.0, np.sqrt(2.0 / n_in), (n_out, n_in)).astype(np.float32)
+        for n_in, n_out in zip(sizes[:-1], sizes[1:])
+    ]
+    NumpyQNetwork(weights, [np.zeros(n, dtype=np.float32) for n in sizes[1:]]).save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference server at several batching windows.")
+    parser.add_argument("checkpoint", nargs="?", default=None, help="Model to serve; a random network if omitted")
+    parser.add_argument("--windows-ms", default="0,0.25,1,2,5", help="Comma-separated batching windows")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent connections")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per client")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--hidden-layers", default="128,128", help="Random network sizes when no checkpoint is given")
+    parser.add_argument("--unix", action="store_true", help="Use a Unix socket instead of localhost TCP")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = args.checkpoint
+        if checkpoint is None:
+            checkpoint = os.path.join(tmp, "random.npz")
+            _random_weights(checkpoint, [int(x) for x in args.hidden_layers.split(",") if x.strip()])
+        unix_path = os.path.join(tmp, "inference.sock") if args.unix else None
+        print(f"{args.clients} clients x {args.requests} requests, serving {checkpoint}")
+        print(f"{'window ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'req/s':>12}")
+        for window in (float(w) for w in args.windows_ms.split(",") if w.strip()):
+            result = run_load(
+                checkpoint, window, args.clients, args.requests, args.max_batch, unix_path
+            )
+            print(
+                f"{result['window_ms']:>10.2f} {result['p50_ms']:>10.3f} "
+                f"{result['p99_ms']:>10.3f} {result['throughput']:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
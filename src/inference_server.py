@@ -0,0 +1,270 @@
+"""
+Local Q-agent inference service with dynamic micro-batching.
+
+One process loads a checkpoint and serves greedy (or epsilon-greedy)
+actions over localhost TCP or a Unix socket. Requests that arrive within
+``window`` seconds of the first pending one are answered by a single
+batched forward pass. Everything runs offline.
+
+Wire format, little-endian and fixed-size: a request is the 24 float32
+observation values followed by the 44 legal-action mask bytes; the reply
+is the chosen action as an int32. A connection may send any number of
+requests one after another.
+"""
+import argparse
+import asyncio
+import socket
+import struct
+import threading
+from typing import Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from actions import ACTION_DIM, ACTION_MASK_TABLE, MAX_ROLLS, STATE_DIM
+from env import encode_observation
+from generala import GeneralaGame
+
+REQUEST_DTYPE = np.dtype([("state", "<f4", STATE_DIM), ("mask", "u1", ACTION_DIM)])
+REQUEST_SIZE = REQUEST_DTYPE.itemsize
+RESPONSE = struct.Struct("<i")
+
+Address = Union[Tuple[str, int], str]
+
+
+def load_policy(path: str) -> Any:
+    """Agent with ``act_batch`` for ``path``: NumPy weights (.npz), an
+    exported TorchScript model or a plain checkpoint."""
+    if path.endswith(".npz"):
+        from numpy_agent import NumpyQAgent
+
+        return NumpyQAgent.load(path)
+    from agent import GeneralaQAgent
+    from export_model import load_inference_model
+
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM)
+    agent.model = load_inference_model(path)
+    return agent
+
+
+class InferenceServer:
+    """Coalesces concurrent requests into batched ``policy.act_batch`` calls.
+
+    ``window`` is how long (in seconds) the first request of a batch waits
+    for company. Each connection has at most one request in flight, so a
+    batch is flushed early once every open connection is waiting (or
+    ``max_batch`` requests are pending). ``window=0`` batches only what is
+    already queued.
+    """
+
+    def __init__(
+        self,
+        policy: Any,
+        window: float = 0.001,
+        max_batch: int = 256,
+        epsilon: float = 0.0,
+    ) -> None:
+        self.policy = policy
+        self.window = window
+        self.max_batch = max_batch
+        self.epsilon = epsilon
+        self.address: Optional[Address] = None
+        self.batches = 0
+        self.requests = 0
+        self._connections = 0
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, unix_path: Optional[str] = None
+    ) -> Address:
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, unix_path)
+            self.address = unix_path
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        self._batcher = asyncio.ensure_future(self._run_batches())
+        return self.address
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        loop = asyncio.get_running_loop()
+        self._connections += 1
+        try:
+            while True:
+                request = await reader.readexactly(REQUEST_SIZE)
+                future = loop.create_future()
+                self._pending.append((request, future))
+                self._ready.set()
+                self._check_full()
+                writer.write(RESPONSE.pack(await future))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections -= 1
+            self._check_full()
+            writer.close()
+
+    def _check_full(self) -> None:
+        if self._pending and len(self._pending) >= min(self.max_batch, self._connections):
+            self._full.set()
+
+    async def _run_batches(self) -> None:
+        while True:
+            await self._ready.wait()
+            if self.window > 0 and not self._full.is_set():
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            self._full.clear()
+            self._check_full()
+            if not self._pending:
+                self._ready.clear()
+            records = np.frombuffer(b"".join(r for r, _ in batch), dtype=REQUEST_DTYPE)
+            try:
+                actions = self.policy.act_batch(
+                    records["state"], records["mask"].view(bool), self.epsilon
+                ).tolist()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), action in zip(batch, actions):
+                future.set_result(action)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise RuntimeError("InferenceServer.start() has not been awaited")
+        await self._server.serve_forever()
+
+    def start_in_thread(self, **kwargs: Any) -> Address:
+        """Run the server on a daemon thread's event loop; returns its address."""
+        started = threading.Event()
+        errors: List[BaseException] = []
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start(**kwargs))
+            except BaseException as e:
+                # Hand the failure (say, an address in use) to the caller
+                errors.append(e)
+                loop.close()
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+            # Cancel the batcher and any connection handlers before closing
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread.join()
+            raise errors[0]
+        assert self.address is not None
+        return self.address
+
+    def stop(self) -> None:
+        """Stop a server started with start_in_thread."""
+        loop, server = self._loop, self._server
+        if loop is not None and server is not None and loop.is_running():
+            def shutdown() -> None:
+                server.close()
+                loop.stop()
+
+            loop.call_soon_threadsafe(shutdown)
+            self._thread.join()
+
+
+class InferenceClient:
+    """Blocking client for one InferenceServer connection."""
+
+    def __init__(self, address: Address) -> None:
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(address)
+        self._request = np.zeros((), dtype=REQUEST_DTYPE)
+        self._reply = bytearray(RESPONSE.size)
+
+    def act(self, state: np.ndarray, mask: np.ndarray) -> int:
+        self._request["state"] = state
+        self._request["mask"] = mask
+        self.sock.sendall(self._request.tobytes())
+        view, received = memoryview(self._reply), 0
+        while received < RESPONSE.size:
+            n = self.sock.recv_into(view[received:])
+            if not n:
+                raise ConnectionError("Inference server closed the connection")
+            received += n
+        return RESPONSE.unpack(self._reply)[0]
+
+    def act_game(self, game: GeneralaGame) -> int:
+        """Action for the player to move in ``game``."""
+        core = game.core
+        mask = ACTION_MASK_TABLE[
+            int(core.roll_number < MAX_ROLLS), core.cards[core.current_player].filled
+        ]
+        return self.act(encode_observation(game), mask)
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self) -> "InferenceClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Generala QAgent actions with micro-batching.")
+    parser.add_argument("checkpoint", help=".npz weights, exported TorchScript model or .pth checkpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555, help="0 picks a free port")
+    parser.add_argument("--unix", default=None, help="Serve on this Unix socket path instead of TCP")
+    parser.add_argument("--window-ms", type=float, default=1.0, help="Batching window in milliseconds")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--epsilon", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        load_policy(args.checkpoint), args.window_ms / 1000.0, args.max_batch, args.epsilon
+    )
+
+    async def run() -> None:
+        address = await server.start(args.host, args.port, args.unix)
+        print(f"Listening on {address}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Monte Carlo tree search agent for Generala with process-parallel rollouts.
+
+The tree covers the decisions of the player to move until they score
+(open-loop: nodes are action sequences, and the dice are re-sampled on
+every simulation). Each simulation then plays the rest of the game, or a
+limited number of turns, with a rollout policy and is scored by the
+acting player's total (plus an optional network leaf value). Searches are root-parallel: every worker
+grows its own tree from the same position with its own dice stream, and
+the root statistics are summed. Holds that keep the same multiset of dice
+are searched and sampled as one action.
+"""
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from actions import ACTION_CATEGORIES, HOLD_POSITIONS, SCORE_OFFSET, action_mask
+from dice import DiceRNG
+from generala import GeneralaGame
+from numpy_agent import NumpyQAgent
+
+REWARD_SCALE = 100.0  # keeps UCB values around [0, 5]
+
+# Per-process rollout policy, set by _init_worker
+_worker_policy: Any = None
+
+
+def legal_actions(game: GeneralaGame, unique_holds: bool = False) -> List[int]:
+    """Legal actions in the GeneralaQAgent layout.
+
+    With ``unique_holds`` equivalent holds (same kept multiset) appear once.
+    """
+    filled = game.scoreboards[game.current_player].filled_mask
+    packed = game.core.dice if unique_holds else None
+    return np.flatnonzero(action_mask(game.roll_number, filled, packed)).tolist()
+
+
+def apply_action(game: GeneralaGame, action: int) -> None:
+    if action < SCORE_OFFSET:
+        dice = game.dice
+        game.roll([dice[j] for j in HOLD_POSITIONS[action]])
+    else:
+        game.score(ACTION_CATEGORIES[action])
+        if not game.finished:
+            game.next_player()
+
+
+class _Node:
+    __slots__ = ("children", "visits", "total")
+
+    def __init__(self) -> None:
+        self.children: Dict[int, "_Node"] = {}
+        self.visits = 0
+        self.total = 0.0
+
+
+def _policy_action(game: GeneralaGame, policy: Any, rng: random.Random) -> int:
+    if policy is not None:
+        action = policy.act(game, epsilon=0.0)
+        if action in legal_actions(game):
+            return action
+    return rng.choice(legal_actions(game, unique_holds=True))
+
+
+def _leaf_value(game: GeneralaGame, agent: Any, me: int, rng: random.Random) -> float:
+    # Let the opponents finish their turns, then read the network's best
+    # Q-value from the acting player's point of view.
+    while not game.finished and game.current_player != me:
+        apply_action(game, _policy_action(game, agent, rng))
+    if game.finished:
+        return 0.0
+    return float(agent.q_values(game)[legal_actions(game)].max())
+
+
+def _search(
+    game: GeneralaGame,
+    rollouts: Optional[int],
+    time_limit: Optional[float],
+    seed: int,
+    exploration: float,
+    rollout_turns: Optional[int],
+    value_scale: Optional[float],
+    policy: Any,
+) -> Dict[int, Tuple[int, float]]:
+    """Grow one tree; returns {root action: (visits, total reward)}."""
+    rng = random.Random(seed)
+    sim = game.clone()
+    sim.rng = DiceRNG(seed)  # never peek at the real dice stream
+    root_state = game.core.state()
+    me = game.current_player
+    root = _Node()
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    done = 0
+    while (rollouts is None or done < rollouts) and (
+        deadline is None or time.perf_counter() < deadline
+    ):
+        sim.core.load(root_state)
+        node, path = root, [root]
+        scored = 0  # turns the acting player has finished in this simulation
+        # Selection / expansion within the acting player's turn
+        while not scored and not sim.finished:
+            actions = legal_actions(sim, unique_holds=True)
+            untried = [a for a in actions if a not in node.children]
+            if untried:
+                action = rng.choice(untried)
+                node.children[action] = node = _Node()
+            else:
+                log_n = math.log(node.visits)
+                action = max(
+                    actions,
+                    key=lambda a: node.children[a].total / node.children[a].visits
+                    + exploration * math.sqrt(log_n / node.children[a].visits),
+                )
+                node = node.children[action]
+            path.append(node)
+            apply_action(sim, action)
+            scored = int(action >= SCORE_OFFSET)
+            if untried:
+                break
+        # Rollout: finish this turn, then ``rollout_turns`` more of ours
+        while not sim.finished and (
+            rollout_turns is None or scored <= rollout_turns
+        ):
+            player = sim.current_player
+            action = _policy_action(sim, policy, rng)
+            apply_action(sim, action)
+            if player == me and action >= SCORE_OFFSET:
+                scored += 1
+        reward = float(sim.scoreboards[me].total_score())
+        if value_scale is not None and policy is not None and not sim.finished:
+            reward += value_scale * _leaf_value(sim, policy, me, rng)
+        reward /= REWARD_SCALE
+        for visited in path:
+            visited.visits += 1
+            visited.total += reward
+        done += 1
+    return {a: (child.visits, child.total) for a, child in root.children.items()}
+
+
+def _without_rng(game: GeneralaGame) -> GeneralaGame:
+    rng, game.rng = game.rng, None
+    try:
+        return game.clone()
+    finally:
+        game.rng = rng
+
+
+def _init_worker(policy_config: Any) -> None:
+    # A (state dict, hidden layers, cache size) tuple is rebuilt as a torch
+    # agent; a NumpyQAgent arrives as is, so those workers never import torch.
+    global _worker_policy
+    if isinstance(policy_config, tuple):
+        from agent import GeneralaQAgent
+
+        state_dict, hidden_layers, cache_size = policy_config
+        _worker_policy = GeneralaQAgent.from_state_dict(
+            state_dict, hidden_layers, cache_size=cache_size
+        )
+    else:
+        _worker_policy = policy_config
+
+
+def _worker_search(
+    game: GeneralaGame,
+    rollouts: Optional[int],
+    time_limit: Optional[float],
+    seed: int,
+    exploration: float,
+    rollout_turns: Optional[int],
+    value_scale: Optional[float],
+) -> Dict[int, Tuple[int, float]]:
+    return _search(
+        game,
+        rollouts=rollouts,
+        time_limit=time_limit,
+        seed=seed,
+        exploration=exploration,
+        rollout_turns=rollout_turns,
+        value_scale=value_scale,
+        policy=_worker_policy,
+    )
+
+
+class MCTSAgent:
+    """Anytime MCTS player.
+
+    Give a ``rollouts`` count, a ``time_limit`` in seconds, or both (the
+    search stops at whichever comes first). With ``num_workers > 1`` the
+    budget is split across a process pool.
+
+    ``policy_agent`` (a GeneralaQAgent or NumpyQAgent) replaces the uniformly random
+    rollout policy. ``rollout_turns`` stops rollouts after that many more
+    of the acting player's turns; with a policy agent and ``value_scale``
+    set, a truncated rollout adds ``value_scale`` times the network's best
+    Q-value as an estimate of the points still to come.
+    """
+
+    def __init__(
+        self,
+        rollouts: Optional[int] = 2000,
+        time_limit: Optional[float] = None,
+        num_workers: int = 1,
+        exploration: float = 0.7,
+        rollout_turns: Optional[int] = None,
+        policy_agent: Any = None,
+        value_scale: Optional[float] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        if rollouts is None and time_limit is None:
+            raise ValueError("MCTSAgent needs a rollout count or a time limit")
+        self.rollouts = rollouts
+        self.time_limit = time_limit
+        self.num_workers = num_workers
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.policy_agent = policy_agent
+        self.value_scale = value_scale
+        self._rng = random.Random(seed)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if num_workers > 1:
+            policy_config = policy_agent
+            if policy_agent is not None and not isinstance(policy_agent, NumpyQAgent):
+                policy_config = (
+                    {k: v.cpu() for k, v in policy_agent.model.state_dict().items()},
+                    policy_agent.hidden_layers,
+                    policy_agent.cache_size,
+                )
+            self._pool = ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_worker,
+                initargs=(policy_config,),
+            )
+
+    def search(self, game: GeneralaGame) -> Dict[int, Tuple[int, float]]:
+        """Root statistics ``{action: (visits, mean final score)}``."""
+        seeds = [self._rng.getrandbits(63) for _ in range(self.num_workers)]
+        # Searches use their own dice streams, so the real one stays behind
+        game = game.clone() if game.rng is None else _without_rng(game)
+        if self._pool is None:
+            results = [
+                _search(
+                    game,
+                    self.rollouts,
+                    self.time_limit,
+                    seeds[0],
+                    self.exploration,
+                    self.rollout_turns,
+                    self.value_scale,
+                    self.policy_agent,
+                )
+            ]
+        else:
+            per_worker = None
+            if self.rollouts is not None:
+                per_worker = max(1, math.ceil(self.rollouts / self.num_workers))
+            futures = [
+                self._pool.submit(
+                    _worker_search,
+                    game,
+                    rollouts=per_worker,
+                    time_limit=self.time_limit,
+                    seed=seed,
+                    exploration=self.exploration,
+                    rollout_turns=self.rollout_turns,
+                    value_scale=self.value_scale,
+                )
+                for seed in seeds
+            ]
+            results = [f.result() for f in futures]
+        merged: Dict[int, List[float]] = {}
+        for result in results:
+            for action, (visits, total) in result.items():
+                stats = merged.setdefault(action, [0, 0.0])
+                stats[0] += visits
+                stats[1] += total
+        return {
+            a: (int(v), t / v * REWARD_SCALE if v else 0.0)
+            for a, (v, t) in merged.items()
+        }
+
+    def act(self, game: GeneralaGame, epsilon: float = 0.0) -> int:
+        actions = legal_actions(game, unique_holds=True)
+        if len(actions) == 1:
+            return actions[0]
+        if epsilon and self._rng.random() < epsilon:
+            return self._rng.choice(actions)
+        stats = self.search(game)
+        return max(stats, key=lambda a: stats[a][0])
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,105 @@
+"""
+Torch-free inference for trained GeneralaQNetwork weights.
+
+export_model.py writes a checkpoint's Linear layers to an ``.npz`` file
+(``weight_0``, ``bias_0``, ``weight_1``, ...). NumpyQAgent plays from that
+file with the same observation and action layout as GeneralaQAgent, so the
+CLI and worker processes never have to import torch.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from actions import ACTION_MASK_TABLE, MAX_ROLLS, UNIQUE_ACTION_MASKS
+from env import encode_observation
+from generala import GeneralaGame
+
+
+class NumpyQNetwork:
+    """ReLU MLP forward pass over float32 weights in PyTorch (out, in) layout."""
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray]) -> None:
+        if len(weights) != len(biases) or not weights:
+            raise ValueError("Need one bias per weight matrix and at least one layer")
+        # Stored transposed so a batch of rows multiplies on the left
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32).T for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyQNetwork":
+        with np.load(path) as data:
+            layers = sum(1 for name in data.files if name.startswith("weight_"))
+            return cls(
+                [data[f"weight_{i}"] for i in range(layers)],
+                [data[f"bias_{i}"] for i in range(layers)],
+            )
+
+    def save(self, path: str) -> None:
+        # Any, not np.ndarray: numpy's stubs type savez's **kwds alongside
+        # its bool allow_pickle keyword, so an ndarray dict does not check
+        arrays: Dict[str, Any] = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"weight_{i}"] = w.T
+            arrays[f"bias_{i}"] = b
+        np.savez(path, **arrays)
+
+    @property
+    def hidden_layers(self) -> List[int]:
+        return [len(b) for b in self.biases[:-1]]
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """Q-values for one (state_dim,) observation or an (N, state_dim) batch."""
+        x = np.asarray(x, dtype=np.float32)
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = x @ w
+            x += b
+            np.maximum(x, 0.0, out=x)
+        x = x @ self.weights[-1]
+        x += self.biases[-1]
+        return x
+
+
+class NumpyQAgent:
+    """GeneralaQAgent's act/act_batch on a NumpyQNetwork."""
+
+    def __init__(self, network: NumpyQNetwork, seed: Optional[int] = None) -> None:
+        self.network = network
+        self.rng = np.random.default_rng(seed)
+        self._obs = np.zeros(network.weights[0].shape[0], dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str, seed: Optional[int] = None) -> "NumpyQAgent":
+        return cls(NumpyQNetwork.load(path), seed)
+
+    def q_values(self, game: GeneralaGame) -> np.ndarray:
+        return self.network(encode_observation(game, self._obs))
+
+    def act(self, game: GeneralaGame, epsilon: float = 0.0, unique_holds: bool = True) -> int:
+        core = game.core
+        mask = ACTION_MASK_TABLE[
+            int(core.roll_number < MAX_ROLLS), core.cards[core.current_player].filled
+        ]
+        if epsilon and self.rng.random() < epsilon:
+            if unique_holds:
+                mask = mask & UNIQUE_ACTION_MASKS[core.dice]
+            return int(self.rng.choice(np.flatnonzero(mask)))
+        q_values = self.q_values(game)
+        return int(np.where(mask, q_values, -np.inf).argmax())
+
+    def act_batch(
+        self,
+        states: np.ndarray,
+        masks: np.ndarray,
+        epsilon: float = 0.0,
+        explore_masks: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Epsilon-greedy actions for an (N, state_dim) batch; see GeneralaQAgent.act_batch."""
+        masks = np.asarray(masks, dtype=bool)
+        actions = np.where(masks, self.network(states), -np.inf).argmax(axis=1)
+        if epsilon > 0.0:
+            if explore_masks is not None:
+                masks = np.asarray(explore_masks, dtype=bool)
+            keys = np.where(masks, self.rng.random(masks.shape), -1.0)
+            explore = self.rng.random(len(actions)) < epsilon
+            actions = np.where(explore, keys.argmax(axis=1), actions)
+        return actions
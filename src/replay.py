@@ -0,0 +1,333 @@
+"""
+Replay memory for DQN training backed by preallocated ring-buffer tensors.
+
+ReplayMemory samples uniformly; PrioritizedReplayMemory samples in
+proportion to each transition's last TD error through a SumTree. Either
+can store observations bit-packed (``compact=True``) for buffers of
+millions of transitions.
+"""
+import queue
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+
+from actions import DICE_COUNT, STATE_DIM
+
+Batch = Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]
+
+
+# Observation features are the dice and held dice (0..6, three bits each)
+# followed by 0/1 roll and filled-category flags (one bit each): 44 bits.
+_WIDTHS = [3] * (2 * DICE_COUNT) + [1] * (STATE_DIM - 2 * DICE_COUNT)
+_SHIFTS = torch.tensor(np.concatenate([[0], np.cumsum(_WIDTHS)[:-1]]), dtype=torch.int64)
+_MASKS = torch.tensor([(1 << w) - 1 for w in _WIDTHS], dtype=torch.int64)
+
+
+def pack_observations(states: torch.Tensor) -> torch.Tensor:
+    """One int64 code per (..., STATE_DIM) observation row."""
+    return (states.to(torch.int64) << _SHIFTS).sum(-1)
+
+
+def unpack_observations(codes: torch.Tensor) -> torch.Tensor:
+    """Inverse of pack_observations, as float32."""
+    return ((codes.unsqueeze(-1) >> _SHIFTS) & _MASKS).to(torch.float32)
+
+
+class ReplayMemory:
+    """Fixed-capacity transition store; the oldest transitions are overwritten.
+
+    States, actions, rewards, next states and done flags live in contiguous
+    CPU tensors. Whole episodes are inserted with one slice assignment per
+    field, and ``sample`` gathers a batch by index, shaped like the training
+    loop expects: actions, rewards and dones come back as (B, 1) columns.
+
+    ``append`` and indexing accept and return ``(state, action, reward,
+    next_state, done)`` tuples, so the class can stand in for a deque.
+
+    With ``prefetch=True`` a background thread keeps the next batch
+    gathered (and moved to ``device``) while the caller trains on the
+    current one.
+
+    With ``compact=True`` states and next states are kept as one int64
+    code each (see pack_observations) and only the sampled rows are
+    decoded, so a transition takes 22 bytes instead of 205.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        state_dim: int,
+        device: "str | torch.device" = "cpu",
+        prefetch: bool = False,
+        seed: Optional[int] = None,
+        compact: bool = False,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, got {capacity}")
+        if compact and state_dim != STATE_DIM:
+            raise ValueError(f"Compact storage needs {STATE_DIM}-value observations, got {state_dim}")
+        self.capacity = capacity
+        self.compact = compact
+        self.device = torch.device(device)
+        pin = self.device.type == "cuda"
+        shape = (capacity,) if compact else (capacity, state_dim)
+        dtype = torch.int64 if compact else torch.float32
+        self.states = torch.zeros(shape, dtype=dtype, pin_memory=pin)
+        self.next_states = torch.zeros(shape, dtype=dtype, pin_memory=pin)
+        self.actions = torch.zeros(capacity, dtype=torch.uint8 if compact else torch.int64, pin_memory=pin)
+        self.rewards = torch.zeros(capacity, dtype=torch.float32, pin_memory=pin)
+        self.dones = torch.zeros(capacity, dtype=torch.bool, pin_memory=pin)
+        self.size = 0
+        self.pos = 0
+        self._generator = torch.Generator()
+        if seed is not None:
+            self._generator.manual_seed(seed)
+        self._lock = threading.RLock()
+        self.prefetch = prefetch
+        self._prefetched: "queue.Queue[Batch]" = queue.Queue(maxsize=1)
+        self._prefetch_size: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> tuple:
+        if not -self.size <= index < self.size:
+            raise IndexError("replay memory index out of range")
+        # Index 0 is the oldest stored transition, as in a deque
+        i = (self.pos - self.size + index % self.size) % self.capacity
+        state, next_state = self.states[i], self.next_states[i]
+        if self.compact:
+            state, next_state = unpack_observations(state), unpack_observations(next_state)
+        return (state, int(self.actions[i]), float(self.rewards[i]), next_state, bool(self.dones[i]))
+
+    def append(self, transition: tuple) -> None:
+        state, action, reward, next_state, done = transition
+        self.push_episode(
+            torch.as_tensor(state).unsqueeze(0),
+            torch.tensor([action]),
+            torch.tensor([reward]),
+            torch.as_tensor(next_state).unsqueeze(0),
+            torch.tensor([done]),
+        )
+
+    def push_episode(
+        self,
+        states: torch.Tensor,
+        actions: torch.Tensor,
+        rewards: torch.Tensor,
+        next_states: torch.Tensor,
+        dones: torch.Tensor,
+    ) -> None:
+        """Insert ``len(states)`` transitions, wrapping around the ring."""
+        n = len(states)
+        if n > self.capacity:
+            # Only the newest ``capacity`` transitions would survive anyway
+            states, actions, rewards = states[-self.capacity :], actions[-self.capacity :], rewards[-self.capacity :]
+            next_states, dones = next_states[-self.capacity :], dones[-self.capacity :]
+            n = self.capacity
+        if self.compact:
+            states, next_states = pack_observations(states), pack_observations(next_states)
+        with self._lock:
+            first = min(n, self.capacity - self.pos)
+            for dst, src in (
+                (self.states, states),
+                (self.actions, actions),
+                (self.rewards, rewards),
+                (self.next_states, next_states),
+                (self.dones, dones),
+            ):
+                dst[self.pos : self.pos + first] = src[:first]
+                dst[: n - first] = src[first:]
+            self.pos = (self.pos + n) % self.capacity
+            self.size = min(self.size + n, self.capacity)
+
+    def _rows(self, idx: torch.Tensor) -> Batch:
+        states, next_states = self.states[idx], self.next_states[idx]
+        if self.compact:
+            states, next_states = unpack_observations(states), unpack_observations(next_states)
+        return (
+            states,
+            self.actions[idx].long().unsqueeze(1),
+            self.rewards[idx].unsqueeze(1),
+            next_states,
+            self.dones[idx].unsqueeze(1),
+        )
+
+    def _to_device(self, batch: tuple) -> tuple:
+        if self.device.type == "cuda":
+            batch = tuple(t.pin_memory() for t in batch)
+        return tuple(t.to(self.device, non_blocking=True) for t in batch)
+
+    def _gather(self, batch_size: int) -> Batch:
+        with self._lock:
+            idx = torch.randint(self.size, (batch_size,), generator=self._generator)
+            batch = self._rows(idx)
+        return self._to_device(batch)
+
+    def sample(self, batch_size: int) -> Batch:
+        """Uniformly sampled batch (with replacement) on ``device``."""
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay memory")
+        if not self.prefetch:
+            return self._gather(batch_size)
+        if self._thread is None or batch_size != self._prefetch_size:
+            self._start_prefetch(batch_size)
+        return self._prefetched.get()
+
+    def _start_prefetch(self, batch_size: int) -> None:
+        self.close()
+        self._prefetch_size = batch_size
+        self._stop.clear()
+        self._prefetched = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(
+            target=self._prefetch_loop, args=(batch_size,), daemon=True
+        )
+        self._thread.start()
+
+    def _prefetch_loop(self, batch_size: int) -> None:
+        while not self._stop.is_set():
+            batch = self._gather(batch_size)
+            while not self._stop.is_set():
+                try:
+                    self._prefetched.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def close(self) -> None:
+        """Stop the prefetch thread, if any."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+class SumTree:
+    """Array-backed binary tree whose internal nodes hold the sum of their leaves.
+
+    Leaves live at ``[size, 2 * size)`` with ``size`` the capacity rounded
+    up to a power of two, and node ``i`` has children ``2i`` and ``2i + 1``.
+    Batched updates and lookups walk all indices down (or up) one level at
+    a time, so both cost O(log N) NumPy steps per batch.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.size = 1 << self.depth
+        self.nodes = np.zeros(2 * self.size, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.nodes[1])
+
+    def __getitem__(self, leaves: np.ndarray) -> np.ndarray:
+        return self.nodes[np.asarray(leaves) + self.size]
+
+    def update(self, leaves: np.ndarray, values: np.ndarray) -> None:
+        """Set the given leaves; repeated leaves keep the last value."""
+        idx = np.asarray(leaves, dtype=np.int64) + self.size
+        values = np.broadcast_to(values, idx.shape)
+        # Fancy assignment does not promise last-wins on repeats, so dedupe
+        _, last = np.unique(idx[::-1], return_index=True)
+        last = len(idx) - 1 - last
+        idx = idx[last]
+        self.nodes[idx] = values[last]
+        for _ in range(self.depth):
+            # Repeated parents are written with identical sums, so no dedupe
+            idx >>= 1
+            self.nodes[idx] = self.nodes[2 * idx] + self.nodes[2 * idx + 1]
+
+    def find(self, prefix_sums: np.ndarray) -> np.ndarray:
+        """Leaf whose cumulative range contains each value in ``[0, total)``."""
+        u = np.array(prefix_sums, dtype=np.float64)
+        idx = np.ones(len(u), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * idx
+            left_sum = self.nodes[left]
+            right = u >= left_sum
+            u -= left_sum * right
+            idx = left + right
+        return idx - self.size
+
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """Proportional prioritized replay (Schaul et al., 2016).
+
+    Transition ``i`` is drawn with probability ``p_i^alpha / sum_k p_k^alpha``
+    where ``p_i`` is its last absolute TD error plus ``eps``; new
+    transitions get the largest priority seen so far so each is replayed
+    at least once. ``sample`` additionally returns importance-sampling
+    weights ``(N * P(i))^-beta`` scaled so the batch maximum is 1, and the
+    indices to pass back to ``update_priorities``.
+
+    Batches are always gathered synchronously: a prefetched batch would be
+    drawn before the previous batch's priorities and the caller's ``beta``
+    are updated, and its slots could be overwritten before its TD errors
+    come back.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        state_dim: int,
+        device: "str | torch.device" = "cpu",
+        prefetch: bool = False,
+        seed: Optional[int] = None,
+        compact: bool = False,
+        alpha: float = 0.6,
+        beta: float = 0.4,
+        eps: float = 1e-3,
+    ) -> None:
+        if prefetch:
+            raise ValueError("Prioritized replay cannot prefetch batches")
+        super().__init__(capacity, state_dim, device, prefetch, seed, compact)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+        self._rng = np.random.default_rng(seed)
+
+    def push_episode(
+        self,
+        states: torch.Tensor,
+        actions: torch.Tensor,
+        rewards: torch.Tensor,
+        next_states: torch.Tensor,
+        dones: torch.Tensor,
+    ) -> None:
+        n = min(len(states), self.capacity)
+        with self._lock:
+            slots = (self.pos + np.arange(n)) % self.capacity
+            super().push_episode(states, actions, rewards, next_states, dones)
+            self.tree.update(slots, self.max_priority**self.alpha)
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        """Re-prioritize sampled transitions from their absolute TD errors."""
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        with self._lock:
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+            self.tree.update(indices, priorities**self.alpha)
+
+    def _gather(self, batch_size: int) -> tuple:
+        with self._lock:
+            # One draw per equal-mass segment keeps batches spread out
+            total = self.tree.total
+            u = (np.arange(batch_size) + self._rng.random(batch_size)) * (total / batch_size)
+            idx = np.minimum(self.tree.find(np.minimum(u, np.nextafter(total, 0))), self.size - 1)
+            probs = self.tree[idx] / total
+            weights = (self.size * probs) ** -self.beta
+            weights /= weights.max()
+            batch = self._rows(torch.from_numpy(idx)) + (
+                torch.from_numpy(weights.astype(np.float32)).unsqueeze(1),
+            )
+        return self._to_device(batch) + (idx,)
+
+    def sample(self, batch_size: int) -> tuple:
+        """``(states, actions, rewards, next_states, dones, weights, indices)``;
+        ``weights`` is a (B, 1) tensor and ``indices`` a NumPy array."""
+        return super().sample(batch_size)
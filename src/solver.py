@@ -0,0 +1,180 @@
+"""
+Exact expected-score-optimal solitaire policy for Generala.
+
+There is no upper-section bonus, so between turns the only state that
+matters is the set of open categories (an 11-bit mask). Within a turn the
+state is the dice multiset and the roll number. The solver runs a dynamic
+program over all 2^11 masks using the keep -> outcome probabilities from
+transitions.py, and stores, for every (mask, roll, multiset), the optimal
+action and its expected value in a flat binary table that is memory-mapped
+on load.
+
+A served Generala ends the game, so it is valued as its 50 points with no
+future; every other score is worth its points plus the value of the
+remaining open categories.
+"""
+import argparse
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from generala import (
+    DICE_MULTISETS,
+    PACKED_DICE_INDEX,
+    SCORE_ARRAY,
+    SCORE_WIN,
+    GeneralaCategory,
+    GeneralaGame,
+    GeneralaRules,
+)
+from transitions import FIRST_ROLL_PROBS, KEEPS, load_transitions
+
+NUM_CATEGORIES = len(GeneralaRules.CATEGORIES)
+NUM_MASKS = 1 << NUM_CATEGORIES
+ALL_OPEN = NUM_MASKS - 1
+SCORE_OFFSET = 1 + 2**GeneralaRules.DICE_COUNT  # first score action in the agent layout
+KEEP_CODE_OFFSET = 16  # table codes below this are categories, above are keeps
+DEFAULT_TABLE_PATH = "generala_solver.npy"
+TABLE_DTYPE = np.dtype([("action", "<u2"), ("value", "<f4")])
+
+_GENERALA = GeneralaRules.CATEGORIES.index(GeneralaCategory.GENERALA)
+
+
+def solve() -> np.ndarray:
+    """Compute the optimal action and value for every state.
+
+    Returns a structured array of shape (2048, 3, 252) indexed by
+    (open-category mask, roll number - 1, multiset index). Values are the
+    expected points still to be scored from that state.
+    """
+    transitions = load_transitions()
+    sub_keeps = transitions.padded_hold_keeps()
+    table = np.zeros((NUM_MASKS, GeneralaRules.MAX_ROLLS, len(DICE_MULTISETS)), TABLE_DTYPE)
+    turn_values = np.zeros(NUM_MASKS)
+    scores = SCORE_ARRAY.astype(np.float64)  # [first roll][multiset][category]
+    served = SCORE_ARRAY[1, :, _GENERALA] == SCORE_WIN
+
+    # Masks with fewer open categories come first; each only depends on
+    # masks that are one category smaller.
+    for mask in sorted(range(1, NUM_MASKS), key=lambda m: bin(m).count("1")):
+        open_cats = [c for c in range(NUM_CATEGORIES) if mask >> c & 1]
+        future = turn_values[[mask & ~(1 << c) for c in open_cats]]
+        later = scores[0][:, open_cats] + future
+        first = scores[1][:, open_cats] + future
+        if mask >> _GENERALA & 1:
+            g = open_cats.index(_GENERALA)
+            first[:, g] = np.where(served, 50.0, first[:, g])
+
+        value = None
+        for roll in range(GeneralaRules.MAX_ROLLS, 0, -1):
+            options = first if roll == 1 else later
+            best_cat = options.argmax(axis=1)
+            best = options[np.arange(len(DICE_MULTISETS)), best_cat]
+            actions = np.asarray(open_cats, dtype=np.uint16)[best_cat]
+            if value is not None:
+                keep_values = transitions.expect(value)[sub_keeps]
+                best_keep = keep_values.argmax(axis=1)
+                keep_best = keep_values[np.arange(len(DICE_MULTISETS)), best_keep]
+                reroll = keep_best > best
+                best = np.where(reroll, keep_best, best)
+                keep_codes = sub_keeps[np.arange(len(DICE_MULTISETS)), best_keep]
+                actions = np.where(reroll, KEEP_CODE_OFFSET + keep_codes, actions)
+            table["action"][mask, roll - 1] = actions
+            table["value"][mask, roll - 1] = best
+            value = best
+        turn_values[mask] = FIRST_ROLL_PROBS @ value
+    return table
+
+
+def save_table(table: np.ndarray, path: str = DEFAULT_TABLE_PATH) -> None:
+    np.save(path, table)
+
+
+def load_table(path: str = DEFAULT_TABLE_PATH) -> np.ndarray:
+    table = np.load(path, mmap_mode="r")
+    if table.dtype != TABLE_DTYPE or table.shape != (
+        NUM_MASKS,
+        GeneralaRules.MAX_ROLLS,
+        len(DICE_MULTISETS),
+    ):
+        raise ValueError(f"{path} is not a Generala solver table")
+    return table
+
+
+def hold_action_for_keep(dice: List[int], keep: Tuple[int, ...]) -> int:
+    """Agent action index that keeps the ``keep`` multiset from ``dice``."""
+    if not keep:
+        return 0  # ROLL
+    wanted = list(keep)
+    bits = 0
+    for j, die in enumerate(dice):
+        if die in wanted:
+            wanted.remove(die)
+            bits |= 1 << j
+    return 1 + bits
+
+
+class SolitaireSolver:
+    """O(1) optimal single-player decisions from a precomputed table.
+
+    Loads the table from ``path`` (memory-mapped) if it exists, otherwise
+    solves the game and, when ``path`` is given, writes the table there.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_TABLE_PATH) -> None:
+        if path is not None and os.path.exists(path):
+            self.table = load_table(path)
+        else:
+            self.table = solve()
+            if path is not None:
+                save_table(self.table, path)
+        self._turn_values: Optional[np.ndarray] = None
+
+    @staticmethod
+    def open_mask(game: GeneralaGame) -> int:
+        return ALL_OPEN & ~game.scoreboards[game.current_player].filled_mask
+
+    def _lookup(self, game: GeneralaGame) -> np.void:
+        mask = self.open_mask(game)
+        if not mask:
+            raise ValueError("No open categories left")
+        return self.table[mask, game.roll_number - 1, PACKED_DICE_INDEX[game.core.dice]]
+
+    def best_action(self, game: GeneralaGame) -> int:
+        """Optimal action for the player to move, in the GeneralaQAgent layout."""
+        code = int(self._lookup(game)["action"])
+        if code < KEEP_CODE_OFFSET:
+            return SCORE_OFFSET + code
+        return hold_action_for_keep(game.dice, KEEPS[code - KEEP_CODE_OFFSET])
+
+    def value(self, game: GeneralaGame) -> float:
+        """Expected final total of the player to move under optimal play."""
+        total = game.scoreboards[game.current_player].total_score()
+        return total + float(self._lookup(game)["value"])
+
+    @property
+    def turn_values(self) -> np.ndarray:
+        """Expected points still to come at the start of a turn, per open mask."""
+        if self._turn_values is None:
+            self._turn_values = self.table["value"][:, 0, :] @ FIRST_ROLL_PROBS
+        return self._turn_values
+
+    def expected_score(self) -> float:
+        """Expected final total of a whole game played optimally."""
+        return float(self.turn_values[ALL_OPEN])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the optimal solitaire Generala table.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+    table = solve()
+    save_table(table, args.path)
+    solver = SolitaireSolver(args.path)
+    print(f"Saved solver table to {args.path}")
+    print(f"Optimal expected score: {solver.expected_score():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,16 @@ import torch
 import torch.optim as optim
 import torch.nn as nn
 import random
-from collections import deque
-from src.generala import GeneralaGame, GeneralaCategory, GeneralaRules
-from src.agent import GeneralaQAgent
+from src.env import ACTION_DIM, STATE_DIM, GeneralaEnv
+from src.agent import GeneralaQAgent, save_checkpoint
+from src.replay import PrioritizedReplayMemory, ReplayMemory
+from src.actor_learner import ActorPool, collect_episode
+from src.evaluate import evaluate
+from src.distributed import all_ranks, init_distributed, max_across_ranks, wrap_model
+import torch.distributed as dist
 import matplotlib.pyplot as plt
 import argparse
+import time
 
 
 # Parse hidden layers from string
@@ -16,8 +21,11 @@ def parse_hidden_layers(s):
 
 
 def soft_update(target, source, tau):
-    for target_param, param in zip(target.parameters(), source.parameters()):
-        target_param.data.copy_(tau * param.data + (1.0 - tau) * target_param.data)
+    # In place under no_grad rather than through .data, so the write bumps
+    # the version counters a Q-value cache on the target is keyed on
+    with torch.no_grad():
+        for target_param, param in zip(target.parameters(), source.parameters()):
+            target_param.copy_(tau * param + (1.0 - tau) * target_param)
 
 
 def get_reward(game, player_idx, prev_score):
@@ -26,39 +34,21 @@ def get_reward(game, player_idx, prev_score):
     return score - prev_score
 
 
-def evaluate_model(agent, device, eval_episodes=10):
-    total_scores = []
-    for _ in range(eval_episodes):
-        game = GeneralaGame(["A", "B"])
-        game.start_turn()
-        state = agent.state_to_tensor(game).to(device)
-        while not game.finished:
-            # Greedy action (epsilon=0)
-            action = agent.act(game, epsilon=0.0)
-            if action == 0:
-                held = []
-                game.roll(held)
-            elif 1 <= action <= 32:
-                held = agent.decode_hold_action(game, action)
-                game.roll(held)
-            else:
-                available = [
-                    cat
-                    for cat, score in game.scoreboards[
-                        game.current_player
-                    ].scores.items()
-                    if score is None
-                ]
-                idx = action - (1 + GeneralaQAgent.HOLD_ACTIONS)
-                category = available[idx] if 0 <= idx < len(available) else available[0]
-                game.score(category)
-                game.next_player()
-            state = agent.state_to_tensor(game).to(device)
-        score = sum(sb.total_score() for sb in game.scoreboards) / len(game.scoreboards)
-        total_scores.append(score)
-    avg_score = sum(total_scores) / len(total_scores)
-    print(f"[Eval] Average final score over {eval_episodes} episodes: {avg_score:.2f}")
-    return avg_score
+def evaluate_model(agent, device, eval_episodes=10, target_ci_width=None, num_workers=0):
+    # Batched self-play games, optionally over worker processes; stops early
+    # once the 95% CI of the mean score is target_ci_width wide
+    summary = evaluate(
+        agent,
+        max_games=eval_episodes,
+        min_games=min(eval_episodes, 100),
+        target_ci_width=target_ci_width,
+        num_workers=num_workers,
+    )
+    print(
+        f"[Eval] Average final score over {summary['games']} games: {summary['mean']:.2f} "
+        f"(95% CI {summary['ci_low']:.2f}-{summary['ci_high']:.2f})"
+    )
+    return summary["mean"]
 
 
 def main():
@@ -75,6 +65,22 @@ def main():
     parser.add_argument('--tau', type=float, default=0.005)
     parser.add_argument('--hidden-layers', type=str, default="128,128", help="Comma-separated hidden layer sizes, e.g. 128,128 or 256,256,128")
     parser.add_argument('--tag', type=str, default="", help="Optional tag for output files")
+    parser.add_argument('--prefetch', action='store_true', help="Sample the next replay batch on a background thread (uniform replay only)")
+    parser.add_argument('--compact-replay', action='store_true', help="Bit-pack replay observations (22 bytes per transition) for 1M+ transition buffers")
+    parser.add_argument('--replay', choices=["uniform", "prioritized"], default="uniform", help="Replay sampling scheme")
+    parser.add_argument('--per-alpha', type=float, default=0.6, help="Prioritized replay: priority exponent")
+    parser.add_argument('--per-beta', type=float, default=0.4, help="Prioritized replay: initial importance-sampling exponent, annealed to 1")
+    parser.add_argument('--actors', type=int, default=0, help="Self-play actor processes feeding a continuously training learner (0 = act and learn in turn)")
+    parser.add_argument('--broadcast-every', type=int, default=50, help="Actor-learner mode: learner updates between weight broadcasts")
+    parser.add_argument('--distributed', action='store_true', help="Data-parallel learner over torch.distributed (gloo); launch with PYTHONPATH=. torchrun --nproc-per-node N src/train_qagent.py --distributed. Each rank plays --episodes games into its own replay shard")
+    parser.add_argument('--report-every', type=float, default=10.0, help="Actor-learner mode: seconds between throughput reports")
+    parser.add_argument('--eval-games', type=int, default=1000, help="Most games per periodic evaluation")
+    parser.add_argument('--eval-ci-width', type=float, default=None, help="Stop an evaluation once the 95%% CI of the mean score is this wide")
+    parser.add_argument('--eval-workers', type=int, default=0, help="Processes for periodic evaluation (0 = in the training process)")
+    ratio = parser.add_mutually_exclusive_group()
+    ratio.add_argument('--updates-per-episode', type=int, default=None, help="Gradient updates per collected episode (default 1; unlimited with --actors)")
+    ratio.add_argument('--updates-per-step', type=float, default=None, help="Gradient updates per collected environment step, e.g. 0.25")
+    parser.add_argument('--collect-steps', type=int, default=0, help="Environment steps to collect between training phases (0 = after every episode)")
     args = parser.parse_args()
 
     EPISODES = args.episodes
@@ -89,169 +95,217 @@ def main():
     TAU = args.tau
     HIDDEN_LAYERS = parse_hidden_layers(args.hidden_layers)
     TAG = args.tag
+    PRIORITIZED = args.replay == "prioritized"
+    ACTORS = args.actors
+    UPDATES_PER_EPISODE = args.updates_per_episode
+    UPDATES_PER_STEP = args.updates_per_step
+    COLLECT_STEPS = args.collect_steps
+    DISTRIBUTED = args.distributed
+    if ACTORS and DISTRIBUTED:
+        parser.error("--actors and --distributed cannot be combined")
+    if PRIORITIZED and args.prefetch:
+        parser.error("--prefetch cannot be combined with --replay prioritized")
+    rank, world_size = init_distributed() if DISTRIBUTED else (0, 1)
+    MAIN = rank == 0  # the rank that logs, evaluates and saves
 
     def get_epsilon(episode: int) -> float:
         return EPS_END + (EPS_START - EPS_END) * (EPS_DECAY**episode)
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    dummy_game = GeneralaGame(["A", "B"])
-    state_dim = 5 + 5 + 3 + len(dummy_game.scoreboards[0].scores)
-    action_dim = 1 + GeneralaQAgent.HOLD_ACTIONS + len(dummy_game.scoreboards[0].scores)
+    device = torch.device("cuda" if torch.cuda.is_available() and not DISTRIBUTED else "cpu")
+    state_dim = STATE_DIM
+    action_dim = ACTION_DIM
     agent = GeneralaQAgent(state_dim, action_dim, device=device, hidden_layers=HIDDEN_LAYERS)
     target_agent = GeneralaQAgent(state_dim, action_dim, device=device, hidden_layers=HIDDEN_LAYERS)
+    # Under DDP gradients are averaged across ranks, which keeps the online
+    # network, and so every soft target update, identical on all of them
+    model = wrap_model(agent.model) if DISTRIBUTED else agent.model
     target_agent.model.load_state_dict(agent.model.state_dict())
     optimizer = optim.Adam(agent.model.parameters(), lr=LR)
-    memory = deque(maxlen=MEMORY_SIZE)
+    if PRIORITIZED:
+        memory = PrioritizedReplayMemory(
+            MEMORY_SIZE, state_dim, device=device, prefetch=args.prefetch, compact=args.compact_replay,
+            alpha=args.per_alpha, beta=args.per_beta,
+        )
+    else:
+        memory = ReplayMemory(
+            MEMORY_SIZE, state_dim, device=device, prefetch=args.prefetch, compact=args.compact_replay
+        )
     loss_fn = nn.MSELoss()
     epsilon = EPS_START
 
     eval_scores = []  # track mean evaluation scores
     eval_episodes = []  # track episode indices for eval
 
-    for episode in range(1, EPISODES + 1):
-        game = GeneralaGame(["A", "B"])
-        game.start_turn()
-        done = False
-        player = 0
-        prev_scores = [0, 0]
-        state = agent.state_to_tensor(game).to(device)
-        episode_transitions = []
-        step = 0
-        while not game.finished:
-            mask = agent.get_action_mask(game)
-            action = agent.act(game, epsilon)
-            prev_score = game.scoreboards[game.current_player].total_score()
-            # Debug: print state, mask, action
-            if episode <= 3:
-                print(
-                    f"[Ep{episode} Step{step}] Player {game.current_player} | Roll {game.roll_number} | Action: {action} | Mask: {mask}"
-                )
-            # Step in environment
-            if action == 0:
-                held = []
-                game.roll(held)
-            elif 1 <= action <= 32:
-                held = agent.decode_hold_action(game, action)
-                game.roll(held)
-            else:
-                available = [
-                    cat
-                    for cat, score in game.scoreboards[
-                        game.current_player
-                    ].scores.items()
-                    if score is None
-                ]
-                idx = action - (1 + GeneralaQAgent.HOLD_ACTIONS)
-                if 0 <= idx < len(available):
-                    category = available[idx]
-                else:
-                    category = available[0]
-                # Calculate reward: normalized score for this category
-                score = GeneralaRules.score_category(
-                    category, game.dice, game.roll_number
-                )
-                reward = (
-                    score if isinstance(score, int) else 0
-                ) / 50.0  # Normalize max ~1
-                game.score(category)
-                next_state = agent.state_to_tensor(game).to(device)
-                episode_transitions.append(
-                    (state.cpu(), action, reward, next_state.cpu(), False, player)
-                )
-                game.next_player()
-                state = agent.state_to_tensor(game).to(device)
-                player = game.current_player
-                step += 1
-                continue
-            next_state = agent.state_to_tensor(game).to(device)
-            # No reward for non-scoring steps
-            episode_transitions.append(
-                (state.cpu(), action, 0.0, next_state.cpu(), False, player)
-            )
-            state = next_state
-            player = game.current_player
-            step += 1
-        # Mark last transition as terminal and give final normalized total score as reward
-        if episode_transitions:
-            last = episode_transitions[-1]
-            final_score = (
-                game.scoreboards[last[5]].total_score() / 500.0
-            )  # Normalize (max possible ~500)
-            episode_transitions[-1] = (
-                last[0],
-                last[1],
-                final_score,
-                torch.zeros_like(last[0]),
-                True,
-                last[5],
-            )
-        # Add to memory
-        for t in episode_transitions:
-            memory.append(t[:5])
-        # Print rewards for debug
-        if episode <= 3:
-            print(f"[Ep{episode}] Rewards: {[t[2] for t in episode_transitions]}")
-        # Training step
-        if len(memory) >= BATCH_SIZE:
-            batch = random.sample(memory, BATCH_SIZE)
-            states, actions, rewards, next_states, dones = zip(*batch)
-            states = torch.stack(states).to(device)
-            actions = torch.tensor(actions, dtype=torch.long, device=device).unsqueeze(
-                1
-            )
-            rewards = torch.tensor(
-                rewards, dtype=torch.float32, device=device
-            ).unsqueeze(1)
-            next_states = torch.stack(next_states).to(device)
-            dones = torch.tensor(dones, dtype=torch.bool, device=device).unsqueeze(1)
-            q_values = agent.model(states).gather(1, actions)
-            q_values = torch.clamp(q_values, -100, 100)
-            with torch.no_grad():
-                # Double DQN: use main network to select action, target network to evaluate
-                next_actions = agent.model(next_states).argmax(1, keepdim=True)
-                next_q = target_agent.model(next_states).gather(1, next_actions)
-                target = rewards + GAMMA * next_q * (~dones)
-                # Reinstate Q–value clamping to prevent saturation:
-                target = torch.clamp(target, -100, 100)
+    def train_step(episode):
+        # One Double-DQN update from a replay batch; returns (loss, q_values)
+        if PRIORITIZED:
+            memory.beta = args.per_beta + (1.0 - args.per_beta) * episode / EPISODES
+            states, actions, rewards, next_states, dones, weights, indices = memory.sample(BATCH_SIZE)
+        else:
+            states, actions, rewards, next_states, dones = memory.sample(BATCH_SIZE)
+        q_values = model(states).gather(1, actions)
+        q_values = torch.clamp(q_values, -100, 100)
+        with torch.no_grad():
+            # Double DQN: use main network to select action, target network to evaluate
+            next_actions = agent.model(next_states).argmax(1, keepdim=True)
+            next_q = target_agent.model(next_states).gather(1, next_actions)
+            target = rewards + GAMMA * next_q * (~dones)
+            # Reinstate Q–value clamping to prevent saturation:
+            target = torch.clamp(target, -100, 100)
+        if PRIORITIZED:
+            td_errors = target - q_values
+            loss = (weights * td_errors.pow(2)).mean()
+            memory.update_priorities(indices, td_errors.detach().squeeze(1).cpu().numpy())
+        else:
             loss = loss_fn(q_values, target)
-            optimizer.zero_grad()
-            loss.backward()
-            # Gradient clipping
-            torch.nn.utils.clip_grad_norm_(agent.model.parameters(), max_norm=1.0)
-            optimizer.step()
-            # Debug: print loss and mean Q
-            if episode % 50 == 0:
+        optimizer.zero_grad()
+        loss.backward()
+        # Gradient clipping
+        torch.nn.utils.clip_grad_norm_(agent.model.parameters(), max_norm=1.0)
+        optimizer.step()
+        return loss, q_values
+
+    def train_updates(num_updates, episode):
+        # Several updates back to back; returns the last (loss, q_values)
+        for _ in range(num_updates):
+            loss, q_values = train_step(episode)
+        return loss, q_values
+
+    def run_evaluation(episode):
+        avg_eval = evaluate_model(agent, device, args.eval_games, args.eval_ci_width, args.eval_workers)
+        eval_scores.append(avg_eval)
+        eval_episodes.append(episode)
+
+    if ACTORS == 0:
+        env = GeneralaEnv(["A", "B"])
+        steps_pending = episodes_pending = 0
+        update_credit = 0.0
+        # Throughput since the last progress line
+        collect_time = learn_time = 0.0
+        window_steps = window_updates = 0
+        for episode in range(1, EPISODES + 1):
+            started = time.perf_counter()
+            transitions = collect_episode(env, agent, epsilon, debug=episode if MAIN and episode <= 3 else None)
+            game = env.game
+            # Add the whole episode to memory at once
+            memory.push_episode(*map(torch.from_numpy, transitions))
+            collect_time += time.perf_counter() - started
+            steps_pending += len(transitions[1])
+            window_steps += len(transitions[1])
+            episodes_pending += 1
+            # A training phase follows every --collect-steps environment steps
+            num_updates = 0
+            if steps_pending >= COLLECT_STEPS:
+                if UPDATES_PER_STEP is not None:
+                    update_credit += UPDATES_PER_STEP * steps_pending
+                    num_updates = int(update_credit)
+                    update_credit -= num_updates
+                else:
+                    num_updates = (UPDATES_PER_EPISODE or 1) * episodes_pending
+                steps_pending = episodes_pending = 0
+            # Print rewards for debug
+            if MAIN and episode <= 3:
+                print(f"[Ep{episode}] Rewards: {transitions[2].tolist()}")
+            # Training phase; every rank must take the same number of updates
+            ready = len(memory) >= BATCH_SIZE
+            if DISTRIBUTED:
+                ready, num_updates = all_ranks(ready), max_across_ranks(num_updates)
+            if ready and num_updates:
+                started = time.perf_counter()
+                loss, q_values = train_updates(num_updates, episode)
+                learn_time += time.perf_counter() - started
+                window_updates += num_updates
+                # Debug: print loss and mean Q
+                if MAIN and episode % 50 == 0:
+                    print(
+                        f"[Train] Ep{episode} Loss: {loss.item():.4f} | MeanQ: {q_values.mean().item():.2f}"
+                    )
+                if MAIN and episode % 200 == 0:
+                    # Print Q-values for a random state
+                    idx = random.randint(0, len(memory) - 1)
+                    s = memory[idx][0].to(device)
+                    qvals = agent.model(s).detach().cpu().numpy()
+                    print(f"[Debug] Ep{episode} Sample Q-values: {qvals}")
+            # Update target network using soft update
+            if episode % TARGET_UPDATE == 0:
+                soft_update(target_agent.model, agent.model, TAU)
+            epsilon = get_epsilon(episode)  # Replace epsilon update with scheduled epsilon
+            if MAIN and episode % BATCH_SIZE == 0:
                 print(
-                    f"[Train] Ep{episode} Loss: {loss.item():.4f} | MeanQ: {q_values.mean().item():.2f}"
+                    f"Episode {episode}, epsilon={epsilon:.3f}, mean score: {sum([sb.total_score() for sb in game.scoreboards])/len(game.scoreboards):.2f}"
+                    f" | {window_steps / max(collect_time, 1e-9):.0f} env steps/s, "
+                    f"{window_updates / max(learn_time, 1e-9):.0f} updates/s, "
+                    f"{window_updates / window_steps:.2f} updates/step, "
+                    f"{100 * learn_time / (collect_time + learn_time):.0f}% time learning"
                 )
-            if episode % 200 == 0:
-                # Print Q-values for a random state
-                idx = random.randint(0, len(memory) - 1)
-                s = memory[idx][0].to(device)
-                qvals = agent.model(s).detach().cpu().numpy()
-                print(f"[Debug] Ep{episode} Sample Q-values: {qvals}")
-        # Update target network using soft update
-        if episode % TARGET_UPDATE == 0:
-            soft_update(target_agent.model, agent.model, TAU)
-        epsilon = get_epsilon(episode)  # Replace epsilon update with scheduled epsilon
-        if episode % BATCH_SIZE == 0:
-            print(
-                f"Episode {episode}, epsilon={epsilon:.3f}, mean score: {sum([sb.total_score() for sb in game.scoreboards])/len(game.scoreboards):.2f}"
-            )
-        # Periodically run evaluation in greedy mode
-        if episode % 500 == 0:
-            avg_eval = evaluate_model(agent, device, eval_episodes=10)
-            eval_scores.append(avg_eval)
-            eval_episodes.append(episode)
+                collect_time = learn_time = 0.0
+                window_steps = window_updates = 0
+            # Periodically run evaluation in greedy mode
+            if MAIN and episode % 500 == 0:
+                run_evaluation(episode)
+    else:
+        # Actor processes play; this process only learns. The target network
+        # follows learner updates rather than episodes here.
+        pool = ActorPool(agent.model, HIDDEN_LAYERS, ACTORS, (EPS_START, EPS_END, EPS_DECAY))
+        pool.start()
+        episode = updates = received = 0
+        last_time, last_counts, last_updates = time.perf_counter(), pool.actor_counts(), 0
+
+        def update_budget():
+            # Updates allowed so far by --updates-per-step/--updates-per-episode
+            if UPDATES_PER_STEP is not None:
+                return UPDATES_PER_STEP * received
+            if UPDATES_PER_EPISODE is not None:
+                return UPDATES_PER_EPISODE * episode
+            return float("inf")
+
+        try:
+            while episode < EPISODES:
+                wait = len(memory) < BATCH_SIZE or updates >= update_budget()
+                for transitions in pool.drain(block=wait):
+                    memory.push_episode(*map(torch.from_numpy, transitions))
+                    episode += 1
+                    received += len(transitions[1])
+                    if episode % 500 == 0:
+                        run_evaluation(episode)
+                if len(memory) < BATCH_SIZE or updates >= update_budget():
+                    continue
+                loss, q_values = train_step(min(episode, EPISODES))
+                updates += 1
+                if updates % args.broadcast_every == 0:
+                    pool.broadcast(agent.model)
+                if updates % TARGET_UPDATE == 0:
+                    soft_update(target_agent.model, agent.model, TAU)
+                now = time.perf_counter()
+                if now - last_time >= args.report_every:
+                    elapsed = now - last_time
+                    counts = pool.actor_counts()
+                    rates = [(c[0] - p[0]) / elapsed for c, p in zip(counts, last_counts)]
+                    steps = sum(c[1] - p[1] for c, p in zip(counts, last_counts)) / elapsed
+                    print(
+                        f"[Actors] {sum(rates):.1f} episodes/s, {steps:.0f} transitions/s "
+                        f"(per actor: {', '.join(f'{r:.1f}' for r in rates)}) | "
+                        f"[Learner] {(updates - last_updates) / elapsed:.1f} updates/s, "
+                        f"{updates / max(received, 1):.2f} updates/step, "
+                        f"episode {episode}, loss {loss.item():.4f}, MeanQ {q_values.mean().item():.2f}"
+                    )
+                    last_time, last_counts, last_updates = now, counts, updates
+        finally:
+            pool.close()
+    memory.close()
+    if DISTRIBUTED:
+        dist.destroy_process_group()
+    if not MAIN:
+        return
     # Plot evaluation score progression after training
-    hp_str = f"ep{EPISODES}_bs{BATCH_SIZE}_g{GAMMA}_lr{LR}_eps{EPS_START}-{EPS_END}-{EPS_DECAY}_mem{MEMORY_SIZE}_tu{TARGET_UPDATE}_tau{TAU}_hl{'-'.join(map(str,HIDDEN_LAYERS))}{('_'+TAG) if TAG else ''}"
+    hp_str = f"ep{EPISODES}_bs{BATCH_SIZE}_g{GAMMA}_lr{LR}_eps{EPS_START}-{EPS_END}-{EPS_DECAY}_mem{MEMORY_SIZE}_tu{TARGET_UPDATE}_tau{TAU}_hl{'-'.join(map(str,HIDDEN_LAYERS))}{'_per' if PRIORITIZED else ''}{f'_act{ACTORS}' if ACTORS else ''}{f'_ddp{world_size}' if DISTRIBUTED else ''}{('_'+TAG) if TAG else ''}"
     plt.plot(eval_episodes, eval_scores)
     plt.xlabel("Episode")
     plt.ylabel("Average Evaluation Score")
     plt.title("Evaluation Score Progress")
     plt.savefig(f"eval_score_progress_{hp_str}.png")
     plt.show()
-    torch.save(agent.model.state_dict(), f"qagent_generala_{hp_str}.pth")
+    save_checkpoint(agent.model, f"qagent_generala_{hp_str}.pth")
     print(f"Training complete. Model saved as qagent_generala_{hp_str}.pth and plot as eval_score_progress_{hp_str}.png")
 
 
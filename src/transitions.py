@@ -0,0 +1,240 @@
+"""
+Precomputed hold -> outcome transition probabilities for Generala.
+
+For every keepable sub-multiset of dice (462 of them, from nothing up to
+all five dice) this module stores the exact distribution over the 252
+five-dice multisets that rerolling the other dice produces, plus, for
+every five-dice multiset, the distinct sub-multisets that can be kept
+from it. Both are CSR-style NumPy arrays, built once per process and
+optionally cached on disk.
+"""
+import os
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from math import factorial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from generala import DICE_MULTISETS, SCORE_ARRAY, GeneralaCategory, GeneralaRules
+
+# Suggested location for load_transitions' opt-in disk cache
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "generala", "transitions_v1.npz"
+)
+
+# Every multiset of 0..5 dice that can be kept before a reroll.
+KEEPS: List[Tuple[int, ...]] = [
+    keep
+    for size in range(GeneralaRules.DICE_COUNT + 1)
+    for keep in combinations_with_replacement(range(1, 7), size)
+]
+KEEP_INDEX: Dict[Tuple[int, ...], int] = {keep: i for i, keep in enumerate(KEEPS)}
+MULTISET_INDEX: Dict[Tuple[int, ...], int] = {
+    ms: i for i, ms in enumerate(DICE_MULTISETS)
+}
+
+
+def multiset_probability(dice: Tuple[int, ...]) -> float:
+    """Probability that rolling len(dice) dice gives exactly this multiset."""
+    ways = factorial(len(dice))
+    for face in set(dice):
+        ways //= factorial(dice.count(face))
+    return ways / 6 ** len(dice)
+
+
+FIRST_ROLL_PROBS = np.array([multiset_probability(ms) for ms in DICE_MULTISETS])
+
+
+class TransitionMatrix:
+    """Sparse keep -> outcome matrix and multiset -> keeps adjacency.
+
+    Row ``k`` of the transition matrix is
+    ``outcomes[indptr[k]:indptr[k + 1]]`` with probabilities
+    ``probs[indptr[k]:indptr[k + 1]]``. The keeps available from multiset
+    ``d`` are ``hold_keeps[hold_indptr[d]:hold_indptr[d + 1]]``.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        outcomes: np.ndarray,
+        probs: np.ndarray,
+        hold_indptr: np.ndarray,
+        hold_keeps: np.ndarray,
+    ) -> None:
+        self.indptr = indptr
+        self.outcomes = outcomes
+        self.probs = probs
+        self.hold_indptr = hold_indptr
+        self.hold_keeps = hold_keeps
+
+    @classmethod
+    def build(cls) -> "TransitionMatrix":
+        indptr = [0]
+        outcomes: List[int] = []
+        probs: List[float] = []
+        for keep in KEEPS:
+            row: Dict[int, float] = {}
+            rolled = GeneralaRules.DICE_COUNT - len(keep)
+            for roll in combinations_with_replacement(range(1, 7), rolled):
+                result = MULTISET_INDEX[tuple(sorted(keep + roll))]
+                row[result] = row.get(result, 0.0) + multiset_probability(roll)
+            for result in sorted(row):
+                outcomes.append(result)
+                probs.append(row[result])
+            indptr.append(len(outcomes))
+
+        hold_indptr = [0]
+        hold_keeps: List[int] = []
+        for dice in DICE_MULTISETS:
+            keeps = {
+                KEEP_INDEX[tuple(d for j, d in enumerate(dice) if bits >> j & 1)]
+                for bits in range(2**GeneralaRules.DICE_COUNT)
+            }
+            hold_keeps.extend(sorted(keeps))
+            hold_indptr.append(len(hold_keeps))
+
+        return cls(
+            np.array(indptr, dtype=np.int32),
+            np.array(outcomes, dtype=np.int16),
+            np.array(probs, dtype=np.float64),
+            np.array(hold_indptr, dtype=np.int32),
+            np.array(hold_keeps, dtype=np.int16),
+        )
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(
+            path,
+            indptr=self.indptr,
+            outcomes=self.outcomes,
+            probs=self.probs,
+            hold_indptr=self.hold_indptr,
+            hold_keeps=self.hold_keeps,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TransitionMatrix":
+        with np.load(path) as data:
+            try:
+                matrix = cls(
+                    data["indptr"],
+                    data["outcomes"],
+                    data["probs"],
+                    data["hold_indptr"],
+                    data["hold_keeps"],
+                )
+            except KeyError:
+                raise ValueError(f"{path} is not a Generala transition matrix") from None
+        if not matrix._is_valid():
+            raise ValueError(f"{path} is not a Generala transition matrix")
+        return matrix
+
+    def _is_valid(self) -> bool:
+        expected = (
+            (self.indptr, np.int32, len(KEEPS) + 1),
+            (self.outcomes, np.int16, None),
+            (self.probs, np.float64, None),
+            (self.hold_indptr, np.int32, len(DICE_MULTISETS) + 1),
+            (self.hold_keeps, np.int16, None),
+        )
+        if any(a.dtype != dtype or a.ndim != 1 for a, dtype, _ in expected):
+            return False
+        if any(size is not None and len(a) != size for a, _, size in expected):
+            return False
+        return (
+            len(self.outcomes) == len(self.probs) == self.indptr[-1]
+            and len(self.hold_keeps) == self.hold_indptr[-1]
+            and bool((self.outcomes >= 0).all() and (self.outcomes < len(DICE_MULTISETS)).all())
+            and bool((self.hold_keeps >= 0).all() and (self.hold_keeps < len(KEEPS)).all())
+        )
+
+    def distribution(self, keep: Tuple[int, ...]) -> Dict[Tuple[int, ...], float]:
+        """``{resulting multiset: probability}`` after keeping ``keep``."""
+        k = KEEP_INDEX[tuple(sorted(keep))]
+        start, end = self.indptr[k], self.indptr[k + 1]
+        return {
+            DICE_MULTISETS[d]: float(p)
+            for d, p in zip(self.outcomes[start:end], self.probs[start:end])
+        }
+
+    def expect(self, values: np.ndarray) -> np.ndarray:
+        """Expected ``values`` (one per multiset) after each keep, shape (462,)."""
+        return np.add.reduceat(self.probs * values[self.outcomes], self.indptr[:-1])
+
+    def best_keep_values(self, keep_values: np.ndarray) -> np.ndarray:
+        """Best of ``keep_values`` (one per keep) reachable from each multiset."""
+        return np.maximum.reduceat(
+            keep_values[self.hold_keeps], self.hold_indptr[:-1]
+        )
+
+    def padded_hold_keeps(self) -> np.ndarray:
+        """(252, 32) keep indices per multiset, padded by repeating the first."""
+        padded = np.empty(
+            (len(DICE_MULTISETS), 2**GeneralaRules.DICE_COUNT), dtype=np.intp
+        )
+        for d in range(len(DICE_MULTISETS)):
+            keeps = self.hold_keeps[self.hold_indptr[d] : self.hold_indptr[d + 1]]
+            padded[d] = keeps[0]
+            padded[d, : len(keeps)] = keeps
+        return padded
+
+
+_cached: Dict[Optional[str], TransitionMatrix] = {}
+
+
+def load_transitions(cache_path: Optional[str] = None) -> TransitionMatrix:
+    """Load the transition matrix, building it on first use.
+
+    Building takes a fraction of a second, so the disk cache is opt-in:
+    pass ``cache_path`` (for example DEFAULT_CACHE_PATH) to read the matrix
+    from there, or to write it there when the file is missing.
+    """
+    if cache_path in _cached:
+        return _cached[cache_path]
+    if cache_path is not None and os.path.exists(cache_path):
+        matrix = TransitionMatrix.load(cache_path)
+    else:
+        matrix = TransitionMatrix.build()
+        if cache_path is not None:
+            try:
+                matrix.save(cache_path)
+            except OSError:
+                pass  # read-only home; the in-memory copy is still usable
+    _cached[cache_path] = matrix
+    return matrix
+
+
+@lru_cache(maxsize=None)
+def _completion_table(category: GeneralaCategory) -> np.ndarray:
+    # success[r - 1, d]: best probability of holding a hand that scores in
+    # ``category`` by the last roll, from multiset d at roll r.
+    transitions = load_transitions()
+    cat = GeneralaRules.CATEGORIES.index(category)
+    hit = (SCORE_ARRAY[0, :, cat] != 0).astype(np.float64)
+    success = np.empty((GeneralaRules.MAX_ROLLS, len(DICE_MULTISETS)))
+    success[-1] = hit
+    for roll in range(GeneralaRules.MAX_ROLLS - 1, 0, -1):
+        reroll = transitions.best_keep_values(transitions.expect(success[roll]))
+        success[roll - 1] = np.maximum(hit, reroll)
+    return success
+
+
+def completion_probability(
+    category: GeneralaCategory, dice: List[int], roll_number: int
+) -> float:
+    """Exact probability of ending the turn with a hand that scores in
+    ``category``, keeping dice optimally for that goal over the remaining rolls.
+    """
+    if not 1 <= roll_number <= GeneralaRules.MAX_ROLLS:
+        raise ValueError(
+            f"Roll number must be between 1 and {GeneralaRules.MAX_ROLLS}, got {roll_number}"
+        )
+    d = MULTISET_INDEX[tuple(sorted(dice))]
+    return float(_completion_table(category)[roll_number - 1, d])
+
+
+def generala_probability(dice: List[int], roll_number: int) -> float:
+    """Probability of completing a Generala from this state."""
+    return completion_probability(GeneralaCategory.GENERALA, dice, roll_number)
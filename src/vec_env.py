@@ -0,0 +1,176 @@
+"""
+Vectorized Generala environment: N games stepped in lockstep with NumPy
+"""
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from actions import (
+    ACTION_DIM,
+    ACTION_KEEPS,
+    DICE_COUNT,
+    MAX_ROLLS,
+    NUM_CATEGORIES,
+    SCORE_OFFSET,
+    STATE_DIM,
+    build_action_masks,
+)
+from dice import DiceRNG
+from generala import SCORE_WIN, GeneralaRules
+
+_POSITIONS = np.arange(DICE_COUNT)
+
+
+class VecGeneralaEnv:
+    """N independent Generala games held as NumPy arrays.
+
+    Actions use the GeneralaQAgent layout: 0 = ROLL, 1..32 = hold mask
+    ``action - 1`` and roll, 33..43 = score category ``action - 33``.
+    Observations use the GeneralaQAgent.state_to_tensor layout for the
+    player to move.
+
+    The reward of a scoring step is the score written on the board divided
+    by 50, credited to the player that scored (a served Generala counts as
+    its 50 points and ends the game). Finished games are reset
+    automatically; their final totals (and per-category scores) are
+    reported in ``info``, with ``info["served"]`` marking games won
+    outright by a served Generala.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_players: int = 2,
+        rng: Union[None, int, DiceRNG] = None,
+    ) -> None:
+        if num_envs <= 0:
+            raise ValueError(f"Number of environments must be positive, got {num_envs}")
+        if num_players <= 0:
+            raise ValueError(f"Number of players must be positive, got {num_players}")
+        self.num_envs = num_envs
+        self.num_players = num_players
+        self.rng = rng if isinstance(rng, DiceRNG) else DiceRNG(rng)
+        self.dice = np.zeros((num_envs, DICE_COUNT), dtype=np.int8)
+        self.held_count = np.zeros(num_envs, dtype=np.int8)
+        self.roll_number = np.ones(num_envs, dtype=np.int8)
+        self.current_player = np.zeros(num_envs, dtype=np.int64)
+        self.round = np.zeros(num_envs, dtype=np.int64)
+        self.filled = np.zeros((num_envs, num_players, NUM_CATEGORIES), dtype=bool)
+        self.scores = np.zeros((num_envs, num_players, NUM_CATEGORIES), dtype=np.int16)
+        self.totals = np.zeros((num_envs, num_players), dtype=np.int32)
+        self._rows = np.arange(num_envs)
+        self._obs = np.zeros((num_envs, STATE_DIM), dtype=np.float32)
+
+    def reset(self) -> np.ndarray:
+        self._reset_games(self._rows)
+        return self._observe()
+
+    def _reset_games(self, rows: np.ndarray) -> None:
+        self.current_player[rows] = 0
+        self.round[rows] = 0
+        self.filled[rows] = False
+        self.scores[rows] = 0
+        self.totals[rows] = 0
+        self._start_turn(rows)
+
+    def _start_turn(self, rows: np.ndarray) -> None:
+        self.dice[rows] = self.rng.roll_batch(len(rows))
+        self.held_count[rows] = 0
+        self.roll_number[rows] = 1
+
+    def action_masks(self, unique_holds: bool = False) -> np.ndarray:
+        """(N, 44) bool mask of legal actions for the player to move.
+
+        With ``unique_holds`` only one hold action per distinct kept
+        multiset is legal.
+        """
+        return build_action_masks(
+            self.roll_number,
+            self.filled[self._rows, self.current_player],
+            dice=self.dice if unique_holds else None,
+        )
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Apply one action per game.
+
+        Returns ``(observations, rewards, dones, info)``. The observation
+        array is an internal buffer that the next call overwrites; copy it
+        if it has to be kept.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(
+                f"Actions must have shape ({self.num_envs},), got {actions.shape}"
+            )
+        if actions.min() < 0 or actions.max() >= ACTION_DIM:
+            raise ValueError(f"Actions must be between 0 and {ACTION_DIM - 1}")
+        if not self.action_masks()[self._rows, actions].all():
+            raise ValueError("Illegal action for the current game state")
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        final_totals = np.zeros((self.num_envs, self.num_players), dtype=np.int32)
+        final_scores = np.zeros_like(self.scores)
+        served = np.zeros(self.num_envs, dtype=bool)
+
+        rolling = actions < SCORE_OFFSET
+        if rolling.any():
+            self._roll(np.flatnonzero(rolling), actions[rolling])
+        scoring = ~rolling
+        if scoring.any():
+            rows = np.flatnonzero(scoring)
+            done_rows, served_rows = self._score(rows, actions[scoring] - SCORE_OFFSET, rewards)
+            served[served_rows] = True
+            if len(done_rows):
+                dones[done_rows] = True
+                final_totals[done_rows] = self.totals[done_rows]
+                final_scores[done_rows] = self.scores[done_rows]
+                self._reset_games(done_rows)
+
+        return self._observe(), rewards, dones, {"final_totals": final_totals, "final_scores": final_scores, "served": served}
+
+    def _roll(self, rows: np.ndarray, actions: np.ndarray) -> None:
+        keep = ACTION_KEEPS[actions]
+        # Held dice move to the front (in their original order), like
+        # GeneralaRules.roll_dice(held), and the rest are rerolled.
+        order = np.argsort(~keep, axis=1, kind="stable")
+        dice = np.take_along_axis(self.dice[rows], order, axis=1)
+        held_count = keep.sum(axis=1)
+        self.rng.reroll(dice, _POSITIONS < held_count[:, None], out=dice)
+        self.dice[rows] = dice
+        self.held_count[rows] = held_count
+        self.roll_number[rows] += 1
+
+    def _score(
+        self, rows: np.ndarray, categories: np.ndarray, rewards: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        players = self.current_player[rows]
+        scores = GeneralaRules.score_batch_unchecked(
+            self.dice[rows], self.roll_number[rows]
+        )[np.arange(len(rows)), categories]
+        served = scores == SCORE_WIN
+        scores = np.where(served, 50, scores)
+        self.scores[rows, players, categories] = scores
+        self.filled[rows, players, categories] = True
+        self.totals[rows, players] += scores
+        rewards[rows] = scores / 50.0
+
+        # Pass the turn and see which games are over
+        players = (players + 1) % self.num_players
+        self.current_player[rows] = players
+        self.round[rows] += players == 0
+        over = served | (self.round[rows] >= NUM_CATEGORIES)
+        self._start_turn(rows[~over])
+        return rows[over], rows[served]
+
+    def _observe(self) -> np.ndarray:
+        obs = self._obs
+        obs[:, 0:5] = self.dice
+        obs[:, 5:10] = np.where(
+            _POSITIONS < self.held_count[:, None], self.dice, 0
+        )
+        obs[:, 10:13] = self.roll_number[:, None] == np.arange(1, MAX_ROLLS + 1)
+        obs[:, 13:] = self.filled[self._rows, self.current_player]
+        return obs
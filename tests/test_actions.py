@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from actions import (
+    ACTION_CATEGORIES,
+    ACTION_DIM,
+    HOLD_POSITIONS,
+    SCORE_OFFSET,
+    action_mask,
+    build_action_masks,
+    canonical_action,
+    unique_hold_actions,
+)
+from generala import GeneralaRules, pack_dice
+
+
+def test_action_tables_match_layout():
+    assert HOLD_POSITIONS[0] == ()
+    assert HOLD_POSITIONS[1] == ()  # hold mask 0 keeps nothing either
+    assert HOLD_POSITIONS[1 + 0b10110] == (1, 2, 4)
+    assert ACTION_CATEGORIES[:SCORE_OFFSET] == (None,) * SCORE_OFFSET
+    assert list(ACTION_CATEGORIES[SCORE_OFFSET:]) == GeneralaRules.CATEGORIES
+
+
+def test_build_action_masks_matches_single_masks():
+    rng = np.random.default_rng(0)
+    n = 500
+    rolls = rng.integers(1, 4, n)
+    filled = rng.random((n, 11)) < 0.5
+    masks = build_action_masks(rolls, filled)
+    assert masks.shape == (n, ACTION_DIM) and masks.dtype == bool
+    weights = 1 << np.arange(11)
+    for i in range(n):
+        expected = action_mask(rolls[i], int(filled[i] @ weights))
+        np.testing.assert_array_equal(masks[i], expected)
+    with pytest.raises(ValueError):
+        build_action_masks(rolls, filled[:, :10])
+
+
+def test_canonical_holds_deduplicate_kept_multisets():
+    packed = pack_dice([3, 3, 3, 5, 6])
+    holds = unique_hold_actions(packed)
+    # 4 counts of threes x 2 x 2 for the single 5 and 6
+    assert len(holds) == 16
+    assert holds[0] == 0  # ROLL represents keeping nothing
+    assert canonical_action(packed, 1) == 0
+    # Any two of the three 3s is the same hold
+    assert {canonical_action(packed, 1 + bits) for bits in (0b011, 0b101, 0b110)} == {
+        1 + 0b011
+    }
+    assert canonical_action(packed, SCORE_OFFSET + 4) == SCORE_OFFSET + 4
+    assert len(unique_hold_actions(pack_dice([1, 2, 3, 4, 5]))) == 32
+    assert len(unique_hold_actions(pack_dice([6] * 5))) == 6
+
+
+def test_unique_masks_keep_one_action_per_kept_multiset():
+    rng = np.random.default_rng(1)
+    dice = rng.integers(1, 7, (200, 5))
+    rolls = np.full(200, 2)
+    filled = np.zeros((200, 11), dtype=bool)
+    masks = build_action_masks(rolls, filled, dice=dice)
+    for hand, mask in zip(dice, masks):
+        kept = [
+            tuple(sorted(hand[list(HOLD_POSITIONS[a])])) for a in np.flatnonzero(mask[:SCORE_OFFSET])
+        ]
+        assert len(kept) == len(set(kept)) == len(
+            {tuple(sorted(hand[list(p)])) for p in HOLD_POSITIONS}
+        )
+        assert mask[SCORE_OFFSET:].all()
+        np.testing.assert_array_equal(
+            mask, action_mask(2, 0, pack_dice(hand.tolist()))
+        )
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from actor_learner import ActorPool, collect_episode
+from agent import GeneralaQAgent
+from dice import DiceRNG
+from env import ACTION_DIM, STATE_DIM, GeneralaEnv
+
+
+def test_collect_episode_marks_final_transition():
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16])
+    env = GeneralaEnv(rng=DiceRNG(0))
+    states, actions, rewards, next_states, dones = collect_episode(env, agent, epsilon=1.0)
+    steps = len(actions)
+    assert states.shape == next_states.shape == (steps, STATE_DIM)
+    assert dones.tolist() == [False] * (steps - 1) + [True]
+    assert not next_states[-1].any()
+    # The last transition carries the final total of whoever moved last
+    totals = [sb.total_score() / 500.0 for sb in env.game.scoreboards]
+    assert any(rewards[-1] == pytest.approx(total) for total in totals)
+    # Roll steps continue into the next stored state
+    rolls = np.flatnonzero(actions[:-1] < 33)
+    np.testing.assert_array_equal(next_states[rolls], states[rolls + 1])
+    assert (rewards[rolls] == 0).all()
+
+
+def test_actor_pool_streams_episodes_and_broadcasts_weights():
+    torch.manual_seed(0)
+    learner = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16])
+    pool = ActorPool(learner.model, [16], num_actors=2, seed=0, queue_size=4)
+    pool.start()
+    try:
+        episodes = []
+        while len(episodes) < 4:
+            episodes += pool.drain(block=True)
+        assert all(e[4][-1] for e in episodes)
+        with torch.no_grad():
+            for param in learner.model.parameters():
+                param.add_(1.0)
+        pool.broadcast(learner.model)
+        for shared, param in zip(pool.shared_model.parameters(), learner.model.parameters()):
+            assert torch.equal(shared, param)
+        pool.drain(block=True)
+    finally:
+        pool.close()
+    played = pool.actor_counts()
+    assert sum(e for e, _ in played) >= 4 and all(t >= e for e, t in played)
+
+
+def test_blocking_drain_raises_once_every_actor_is_gone():
+    learner = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16])
+    pool = ActorPool(learner.model, [16], num_actors=2, seed=0)
+    pool.start()
+    try:
+        for process in pool._processes:
+            process.terminate()
+            process.join()
+        pool.drain()
+        with pytest.raises(RuntimeError, match="actors have exited"):
+            pool.drain(block=True)
+    finally:
+        pool.close()
@@ -0,0 +1,98 @@
+import os
+import sys
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agent import GeneralaQAgent
+from dice import DiceRNG
+from env import ACTION_DIM, SCORE_OFFSET, STATE_DIM, GeneralaEnv
+
+
+def _positions(n):
+    envs = [GeneralaEnv(rng=DiceRNG(i)) for i in range(n)]
+    for i, env in enumerate(envs):
+        env.reset()
+        for _ in range(i % 3):
+            env.step(0)
+    states = np.stack([env.obs.copy() for env in envs])
+    masks = np.array([env.action_mask() for env in envs])
+    return envs, states, masks
+
+
+def test_act_batch_greedy_matches_act():
+    torch.manual_seed(0)
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM)
+    envs, states, masks = _positions(12)
+    actions = agent.act_batch(states, masks, epsilon=0.0)
+    assert actions.shape == (12,) and actions.dtype == torch.int64
+    assert actions.tolist() == [agent.act(env.game, epsilon=0.0) for env in envs]
+
+
+def test_act_batch_explores_only_legal_actions():
+    torch.manual_seed(0)
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM)
+    _, states, masks = _positions(3)
+    states = np.repeat(states, 200, axis=0)
+    masks = np.repeat(masks, 200, axis=0)
+    actions = agent.act_batch(states, masks, epsilon=1.0).numpy()
+    assert masks[np.arange(len(actions)), actions].all()
+    # Games on their third roll can only score
+    assert (actions[masks[:, 0] == 0] >= SCORE_OFFSET).all()
+    assert len(np.unique(actions)) > 20
+
+
+def test_exploration_samples_unique_holds():
+    torch.manual_seed(0)
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM)
+    env = GeneralaEnv(rng=DiceRNG(0))
+    env.reset()
+    env.game.dice = [2, 2, 2, 2, 5]
+    unique = env.action_mask(unique_holds=True)
+    assert unique.sum() == 5 * 2 + 11
+    actions = {agent.act(env.game, epsilon=1.0) for _ in range(300)}
+    assert all(unique[a] for a in actions)
+    assert len(actions) == unique.sum()
+    masks = np.repeat(env.action_mask()[None], 100, axis=0)
+    explore = np.repeat(unique[None], 100, axis=0)
+    batch = agent.act_batch(np.repeat(env.obs[None], 100, axis=0), masks, 1.0, explore)
+    assert unique[batch.numpy()].all()
+
+
+def test_q_cache_hits_and_invalidates_on_weight_changes():
+    torch.manual_seed(0)
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16], cache_size=2)
+    env = GeneralaEnv(rng=DiceRNG(0))
+    env.reset()
+    game = env.game
+    first = agent.q_values(game)
+    assert agent.q_values(game) is first
+    assert agent.cache_info()[:2] == (1, 1)
+    # Optimizer steps and load_state_dict both change the cached answer
+    optimizer = torch.optim.SGD(agent.model.parameters(), lr=0.1)
+    agent.model(torch.rand(4, STATE_DIM)).sum().backward()
+    optimizer.step()
+    stepped = agent.q_values(game)
+    assert not torch.equal(stepped, first)
+    torch.testing.assert_close(stepped, agent._predict(game))
+    other = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16])
+    agent.model.load_state_dict(other.model.state_dict())
+    torch.testing.assert_close(agent.q_values(game), other.q_values(game))
+    # So do in-place writes under no_grad, the way soft target updates go
+    with torch.no_grad():
+        for p in agent.model.parameters():
+            p.mul_(0.5)
+    torch.testing.assert_close(agent.q_values(game), agent._predict(game))
+    # .data writes bypass version counters and need an explicit invalidation
+    for p in agent.model.parameters():
+        p.data.zero_()
+    agent.invalidate_cache()
+    assert not agent.q_values(game).any()
+    # Bounded LRU
+    for action in (0, 0, SCORE_OFFSET):
+        env.step(action)
+        agent.q_values(game)
+    assert agent.cache_info().currsize == 2
+    assert agent.act(game) == int(np.flatnonzero(env.action_mask())[0])
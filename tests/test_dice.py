@@ -0,0 +1,101 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from dice import DiceRNG
+from generala import GeneralaGame, GeneralaCategory
+
+
+def test_same_seed_same_rolls():
+    a, b = DiceRNG(123), DiceRNG(123)
+    assert [a.roll() for _ in range(50)] == [b.roll() for _ in range(50)]
+
+
+def test_roll_keeps_held_dice_first():
+    rng = DiceRNG(0)
+    dice = rng.roll([6, 6])
+    assert dice[:2] == [6, 6]
+    assert len(dice) == 5
+    assert all(1 <= d <= 6 for d in dice)
+    assert rng.roll([1, 2, 3, 4, 5]) == [1, 2, 3, 4, 5]
+    with pytest.raises(ValueError):
+        rng.roll([1, 2, 3, 4, 5, 6])
+    with pytest.raises(ValueError):
+        rng.roll([0])
+
+
+def test_spawned_streams_are_independent_and_reproducible():
+    first = [child.roll_batch(100) for child in DiceRNG(7).spawn(3)]
+    second = [child.roll_batch(100) for child in DiceRNG(7).spawn(3)]
+    for x, y in zip(first, second):
+        assert np.array_equal(x, y)
+    assert not np.array_equal(first[0], first[1])
+
+
+def test_reroll_only_changes_unheld_dice():
+    rng = DiceRNG(1)
+    dice = rng.roll_batch(1000)
+    held = np.zeros_like(dice, dtype=bool)
+    held[:, :2] = True
+    result = rng.reroll(dice, held)
+    assert np.array_equal(result[:, :2], dice[:, :2])
+    assert not np.array_equal(result[:, 2:], dice[:, 2:])
+    assert result.min() >= 1 and result.max() <= 6
+
+    before = dice.copy()
+    out = rng.reroll(dice, held, out=dice)
+    assert out is dice
+    assert np.array_equal(dice[:, :2], before[:, :2])
+
+
+def test_game_uses_injected_rng():
+    games = [GeneralaGame(["p1"], rng=DiceRNG(42)) for _ in range(2)]
+    for game in games:
+        game.start_turn()
+        game.roll(game.dice[:2])
+        game.score(GeneralaCategory.SIXES)
+        game.next_player()
+    assert games[0].dice == games[1].dice
+    assert games[0].scoreboards[0].total_score() == games[1].scoreboards[0].total_score()
+
+
+def test_rng_state_round_trip_and_copy():
+    rng = DiceRNG(5, buffer_size=16)
+    rng.roll()
+    state = rng.get_state()
+    first = [rng.roll() for _ in range(20)]  # crosses buffer refills
+    rng.set_state(state)
+    assert [rng.roll() for _ in range(20)] == first
+    rng.set_state(state)
+    twin = rng.copy()
+    assert [twin.roll() for _ in range(20)] == first
+    assert [rng.roll() for _ in range(20)] == first
+    assert np.array_equal(twin.roll_batch(3), rng.roll_batch(3))
+
+
+def test_game_snapshot_restore_replays_deterministically():
+    game = GeneralaGame(["p1", "p2"], rng=DiceRNG(3))
+    game.start_turn()
+    game.score(GeneralaCategory.ONES)
+    game.next_player()
+    snap = game.snapshot()
+
+    def play(g):
+        g.roll(g.dice[:1])
+        g.score(GeneralaCategory.FIVES)
+        g.next_player()
+        return g.dice, [sb.total_score() for sb in g.scoreboards], g.current_player
+
+    first = play(game)
+    game.restore(snap)
+    assert game.scoreboards[1].scores[GeneralaCategory.FIVES] is None
+    assert play(game) == first
+    game.restore(snap)
+    clone = game.clone()
+    assert play(clone) == first
+    assert game.scoreboards[1].scores[GeneralaCategory.FIVES] is None
+    assert play(game) == first
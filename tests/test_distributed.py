@@ -0,0 +1,13 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from distributed import benchmark
+
+
+def test_two_ranks_stay_in_sync():
+    result = benchmark(2, [16], batch_size=16, steps=5)
+    assert result["ranks"] == 2
+    assert result["consistent"]
+    assert result["episodes_per_s"] > 0
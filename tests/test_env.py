@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agent import GeneralaQAgent
+from dice import DiceRNG
+from env import ACTION_DIM, SCORE_OFFSET, STATE_DIM, GeneralaEnv, sample_states
+from generala import GeneralaCategory, GeneralaRules
+
+
+def test_observation_matches_state_to_tensor():
+    env = GeneralaEnv(rng=DiceRNG(0))
+    obs = env.reset()
+    assert obs.shape == (STATE_DIM,) and obs.dtype == np.float32
+    rng = np.random.default_rng(1)
+    done = False
+    while not done:
+        expected = GeneralaQAgent.state_to_tensor(env.game).numpy()
+        np.testing.assert_array_equal(obs, expected)
+        mask = env.action_mask()
+        assert mask.tolist() == [bool(m) for m in GeneralaQAgent.get_action_mask(env.game)]
+        action = int(rng.choice(np.flatnonzero(mask)))
+        next_obs, reward, done, info = env.step(action)
+        assert next_obs is obs  # the buffer is reused
+    assert env.game.finished
+
+
+def test_score_action_uses_category_index():
+    env = GeneralaEnv(rng=DiceRNG(0))
+    env.reset()
+    env.game.dice = [3, 3, 3, 1, 2]
+    env.game.roll_number = 2
+    cat = GeneralaRules.CATEGORIES.index(GeneralaCategory.THREES)
+    _, reward, done, info = env.step(SCORE_OFFSET + cat)
+    assert info["player"] == 0 and info["score"] == 9
+    assert info["category"] is GeneralaCategory.THREES
+    assert reward == pytest.approx(9 / 50)
+    assert not done
+    assert env.game.current_player == 1
+    assert env.game.scoreboards[0].scores[GeneralaCategory.THREES] == 9
+    # The acting player's view shows the category they just filled
+    assert info["player_obs"][13 + cat] == 1.0
+
+
+def test_served_generala_ends_game():
+    env = GeneralaEnv(rng=DiceRNG(0))
+    env.reset()
+    env.game.dice = [6] * 5
+    env.game.roll_number = 1
+    cat = GeneralaRules.CATEGORIES.index(GeneralaCategory.GENERALA)
+    _, reward, done, info = env.step(SCORE_OFFSET + cat)
+    assert done and info["served"] and reward == pytest.approx(1.0)
+
+
+def test_invalid_actions_raise():
+    env = GeneralaEnv(rng=DiceRNG(0))
+    env.reset()
+    env.step(0)
+    env.step(1)
+    assert not env.action_mask()[:SCORE_OFFSET].any()
+    with pytest.raises(ValueError):
+        env.step(0)
+    with pytest.raises(ValueError):
+        env.step(ACTION_DIM)
+
+
+def test_sample_states_are_legal_positions():
+    states, masks = sample_states(300, seed=1)
+    assert states.shape == (300, STATE_DIM) and masks.shape == (300, ACTION_DIM)
+    assert masks[:, 33:].any(axis=1).all()
+    # Dice are always rolled
+    assert (states[:, :5] >= 1).all()
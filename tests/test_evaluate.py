@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agent import GeneralaQAgent
+from env import ACTION_DIM, STATE_DIM
+from evaluate import evaluate, play_games, summarize
+from export_model import export_npz
+
+
+def _agent():
+    torch.manual_seed(0)
+    return GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16])
+
+
+def test_summarize_reports_normal_interval():
+    scores = np.array([10.0, 20.0, 30.0, 40.0])
+    summary = summarize(scores, np.array([1.0, 0.0, 0.5, 1.0]), np.zeros((4, 11)))
+    std_error = np.std(scores, ddof=1) / 2
+    assert summary["mean"] == 25.0
+    assert summary["std_error"] == pytest.approx(std_error)
+    assert summary["ci_width"] == pytest.approx(2 * 1.959964 * std_error)
+    assert summary["win_rate"] == 0.625
+    assert 0.0 <= summary["win_rate_ci"][0] <= 0.625 <= summary["win_rate_ci"][1] <= 1.0
+    assert summary["categories"]["ones"]["zero_rate"] == 1.0
+
+
+def test_play_games_scores_and_outcomes():
+    agent = _agent()
+    seed = np.random.SeedSequence(0)
+    scores, outcomes, categories = play_games(agent, None, 64, seed)
+    assert outcomes is None
+    np.testing.assert_allclose(categories.sum(axis=1), scores)
+    scores, outcomes, categories = play_games(agent, "greedy", 64, seed)
+    np.testing.assert_allclose(categories.sum(axis=1), scores)
+    assert set(np.unique(outcomes)) <= {0.0, 0.5, 1.0}
+    # The same seed replays the same games
+    again = play_games(agent, "greedy", 64, seed)
+    np.testing.assert_array_equal(again[0], scores)
+    np.testing.assert_array_equal(again[1], outcomes)
+
+
+def test_evaluate_stops_at_target_ci_width(tmp_path):
+    agent = _agent()
+    summary = evaluate(agent, max_games=5000, min_games=200, target_ci_width=100.0, batch=100, seed=0)
+    assert summary["games"] == 200
+    path = str(tmp_path / "policy.npz")
+    export_npz(agent.model, path)
+    summary = evaluate(
+        path, "random", max_games=300, min_games=300, target_ci_width=100.0,
+        num_workers=2, batch=100, seed=0,
+    )
+    assert summary["games"] >= 300
+    assert 0.0 <= summary["win_rate"] <= 1.0
+    assert summary["ci_low"] < summary["mean"] < summary["ci_high"]
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from expectimax import TurnExpectimax
+from generala import GeneralaCategory, GeneralaGame, GeneralaRules
+from solver import SCORE_OFFSET, SolitaireSolver
+
+
+def test_last_roll_scores_the_best_open_category():
+    engine = TurnExpectimax()
+    game = GeneralaGame(["p1"])
+    game.dice = [3, 3, 3, 2, 2]
+    game.roll_number = 3
+    assert engine.best_action(game) == SCORE_OFFSET + GeneralaRules.CATEGORIES.index(
+        GeneralaCategory.FULL
+    )
+    game.scoreboards[0].set_score(GeneralaCategory.FULL, 0)
+    game.scoreboards[0].set_score(GeneralaCategory.THREES, 0)
+    assert engine.best_action(game) == SCORE_OFFSET + GeneralaRules.CATEGORIES.index(
+        GeneralaCategory.TWOS
+    )
+
+
+def test_cache_is_keyed_on_sorted_dice():
+    engine = TurnExpectimax(cache_size=1000)
+    first = engine.evaluate([1, 2, 6, 6, 3], 2, 0b11111111111)
+    misses = engine.cache_info()["keeps"].misses
+    second = engine.evaluate([6, 3, 2, 1, 6], 2, 0b11111111111)
+    assert first == second
+    assert engine.cache_info()["keeps"].misses == misses
+    engine.clear_cache()
+    assert engine.cache_info()["states"].currsize == 0
+
+
+def test_with_future_values_it_agrees_with_the_solver():
+    solver = SolitaireSolver(None)
+    engine = TurnExpectimax(future_values=solver.turn_values)
+    rng = random.Random(0)
+    game = GeneralaGame(["p1"])
+    for cat in rng.sample(GeneralaRules.CATEGORIES, 6):
+        game.scoreboards[0].set_score(cat, 0)
+    for _ in range(100):
+        game.dice = [rng.randint(1, 6) for _ in range(5)]
+        game.roll_number = rng.randint(1, 3)
+        mask = solver.open_mask(game)
+        _, _, value = engine.evaluate(game.dice, game.roll_number, mask)
+        assert value == pytest.approx(solver.value(game), rel=1e-5)
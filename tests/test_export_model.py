@@ -0,0 +1,54 @@
+import os
+import sys
+
+import warnings
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agent import GeneralaQAgent, GeneralaQNetwork, load_checkpoint, save_checkpoint
+from env import ACTION_DIM, STATE_DIM, sample_states
+from export_model import drift_report, export_model, load_inference_model
+
+
+def test_int8_export_round_trips_with_small_drift(tmp_path):
+    torch.manual_seed(0)
+    model = GeneralaQNetwork(STATE_DIM, ACTION_DIM, [64, 64]).eval()
+    path = str(tmp_path / "model.pt")
+    export_model(model, path)
+    loaded = load_inference_model(path)
+    assert isinstance(loaded, torch.jit.ScriptModule)
+    states, masks = sample_states(500, seed=2)
+    with torch.inference_mode():
+        x = torch.from_numpy(states)
+        report = drift_report(model(x).numpy(), loaded(x).numpy(), masks)
+    assert report["states"] == 500
+    assert report["max_abs_error"] < 0.05
+    assert report["argmax_agreement"] > 0.8
+
+
+def test_plain_checkpoint_loads_eagerly(tmp_path):
+    torch.manual_seed(0)
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[32, 16])
+    path = str(tmp_path / "qagent.pth")
+    save_checkpoint(agent.model, path)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        loaded = load_inference_model(path)
+    assert isinstance(loaded, GeneralaQNetwork)
+    x = torch.rand(4, STATE_DIM)
+    with torch.inference_mode():
+        np.testing.assert_allclose(loaded(x).numpy(), agent.model(x).numpy())
+
+
+def test_untagged_checkpoints_are_flagged(tmp_path):
+    # Checkpoints from before score actions mapped to category action - 33
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=[16])
+    path = str(tmp_path / "legacy.pth")
+    torch.save(agent.model.state_dict(), path)
+    with pytest.warns(UserWarning, match="action layout"):
+        state_dict = load_checkpoint(path)
+    assert state_dict.keys() == agent.model.state_dict().keys()
@@ -370,3 +370,90 @@ def test_three_rolls_allowed():
     # Fourth roll should fail
     with pytest.raises(Exception, match="No rolls left"):
         game.roll()
+
+
+def test_score_table_matches_rules_for_every_hand():
+    """The lookup table must agree with the reference rules on every roll"""
+    from itertools import product
+    from generala import _rule_score
+
+    for dice in product(range(1, 7), repeat=GeneralaRules.DICE_COUNT):
+        for roll in range(1, GeneralaRules.MAX_ROLLS + 1):
+            expected = tuple(
+                _rule_score(cat, dice, roll) for cat in GeneralaRules.CATEGORIES
+            )
+            assert GeneralaRules.score_all_categories(list(dice), roll) == expected
+
+
+def test_score_all_categories_validates_and_unchecked_matches():
+    dice = [3, 3, 3, 5, 5]
+    scores = GeneralaRules.score_all_categories(dice, 1)
+    assert scores == GeneralaRules.score_all_categories_unchecked(dice, 1)
+    for cat, score in zip(GeneralaRules.CATEGORIES, scores):
+        assert GeneralaRules.score_category_unchecked(cat, dice, 1) == score
+    assert scores[GeneralaRules.CATEGORIES.index(GeneralaCategory.FULL)] == 35
+
+    with pytest.raises(ValueError):
+        GeneralaRules.score_all_categories([1, 2, 3], 1)
+    with pytest.raises(ValueError):
+        GeneralaRules.score_all_categories(dice, 4)
+
+
+def test_score_before_start_turn_raises_value_error():
+    game = GeneralaGame(["p1"])
+    with pytest.raises(ValueError):
+        game.score(GeneralaCategory.ONES)
+
+
+def test_score_batch_matches_score_category():
+    import numpy as np
+    from itertools import product
+    from generala import SCORE_WIN
+
+    hands = np.array(list(product(range(1, 7), repeat=GeneralaRules.DICE_COUNT)))
+    for roll in range(1, GeneralaRules.MAX_ROLLS + 1):
+        rolls = np.full(len(hands), roll)
+        batch = GeneralaRules.score_batch(hands, rolls)
+        assert batch.shape == (len(hands), len(GeneralaRules.CATEGORIES))
+        for row, dice in zip(batch, hands.tolist()):
+            for value, cat in zip(row.tolist(), GeneralaRules.CATEGORIES):
+                expected = GeneralaRules.score_category(cat, dice, roll)
+                assert value == (SCORE_WIN if expected == "WIN" else expected)
+
+
+def test_score_batch_invalid_input_should_raise():
+    import numpy as np
+
+    with pytest.raises(ValueError):
+        GeneralaRules.score_batch(np.ones((3, 4), dtype=int), np.ones(3, dtype=int))
+    with pytest.raises(ValueError):
+        GeneralaRules.score_batch(np.zeros((2, 5), dtype=int), np.ones(2, dtype=int))
+    with pytest.raises(ValueError):
+        GeneralaRules.score_batch(np.ones((2, 5), dtype=int), np.array([1, 4]))
+    with pytest.raises(ValueError):
+        GeneralaRules.score_batch(np.ones((2, 5), dtype=int), np.ones(3, dtype=int))
+
+
+def test_compact_core_keeps_running_total_and_mask():
+    sb = GeneralaScoreBoard()
+    sb.set_score(GeneralaCategory.SIXES, 18)
+    sb.set_score(GeneralaCategory.ONES, 0)
+    assert sb.total_score() == 18
+    assert sb.filled_mask == 0b100001
+    assert sb.scores[GeneralaCategory.TWOS] is None
+    assert list(sb.scores.keys()) == GeneralaRules.CATEGORIES
+    with pytest.raises(AttributeError):
+        sb.extra = 1
+
+
+def test_game_dice_are_packed_but_read_as_lists():
+    game = GeneralaGame(["p1", "p2"])
+    game.dice = [6, 5, 4, 3, 2]
+    game.held = [6, 5]
+    assert game.dice == [6, 5, 4, 3, 2]
+    assert game.held == [6, 5]
+    assert isinstance(game.core.dice, int)
+    with pytest.raises(ValueError):
+        game.dice = [1, 2, 3, 4, 5, 6]
+    with pytest.raises(ValueError):
+        game.dice = [0, 1]
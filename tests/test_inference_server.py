@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from dice import DiceRNG
+from env import GeneralaEnv, sample_states
+from inference_server import InferenceClient, InferenceServer
+from numpy_agent import NumpyQAgent, NumpyQNetwork
+
+
+def _policy():
+    rng = np.random.default_rng(0)
+    weights = [rng.normal(size=(32, 24)), rng.normal(size=(44, 32))]
+    return NumpyQAgent(NumpyQNetwork(weights, [np.zeros(32), np.zeros(44)]))
+
+
+def test_concurrent_requests_are_batched_and_answered_correctly():
+    policy = _policy()
+    server = InferenceServer(policy, window=0.05)
+    address = server.start_in_thread()
+    states, masks = sample_states(40, seed=1)
+    expected = policy.act_batch(states, masks).tolist()
+    results = {}
+
+    def client(rows):
+        with InferenceClient(address) as conn:
+            for i in rows:
+                results[i] = conn.act(states[i], masks[i])
+
+    threads = [threading.Thread(target=client, args=(range(k, 40, 4),)) for k in range(4)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        server.stop()
+    assert [results[i] for i in range(40)] == expected
+    assert server.requests == 40
+    assert server.batches < 40
+
+
+def test_unix_socket_serves_game_positions(tmp_path):
+    policy = _policy()
+    server = InferenceServer(policy, window=0.0)
+    address = server.start_in_thread(unix_path=str(tmp_path / "q.sock"))
+    try:
+        env = GeneralaEnv(rng=DiceRNG(2))
+        env.reset()
+        with InferenceClient(address) as conn:
+            while not env.game.finished:
+                action = conn.act_game(env.game)
+                assert action == policy.act(env.game)
+                env.step(action)
+    finally:
+        server.stop()
+
+
+def test_start_errors_reach_the_caller(tmp_path):
+    server = InferenceServer(_policy())
+    with pytest.raises(OSError):
+        server.start_in_thread(unix_path=str(tmp_path / "missing" / "q.sock"))
+    server.stop()
@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from dice import DiceRNG
+from generala import GeneralaCategory, GeneralaGame, GeneralaRules
+from mcts import SCORE_OFFSET, MCTSAgent, apply_action, legal_actions
+
+
+def last_roll_game():
+    game = GeneralaGame(["p1", "p2"], rng=DiceRNG(0))
+    game.start_turn()
+    for cat in GeneralaRules.CATEGORIES:
+        if cat not in (GeneralaCategory.ONES, GeneralaCategory.DOUBLE_GENERALA):
+            game.scoreboards[0].set_score(cat, 0)
+    game.dice = [4, 4, 4, 4, 4]
+    game.roll_number = 3
+    return game
+
+
+def test_legal_actions_follow_rolls_and_open_categories():
+    game = last_roll_game()
+    assert legal_actions(game) == [SCORE_OFFSET + 0, SCORE_OFFSET + 10]
+    game.roll_number = 2
+    assert len(legal_actions(game)) == SCORE_OFFSET + 2
+    # Keeping 0..5 of the five 4s
+    assert len(legal_actions(game, unique_holds=True)) == 6 + 2
+
+
+def test_search_prefers_the_obvious_score():
+    agent = MCTSAgent(rollouts=200, rollout_turns=0, seed=0)
+    game = last_roll_game()
+    assert agent.act(game) == SCORE_OFFSET + 10
+    # Searching must not consume the real dice stream
+    before = game.rng.get_state()
+    agent.search(game)
+    assert game.rng.get_state()[:2] == before[:2]
+
+
+def test_parallel_search_plays_a_full_game():
+    agent = MCTSAgent(rollouts=40, rollout_turns=0, num_workers=2, seed=1)
+    try:
+        game = GeneralaGame(["p1"], rng=DiceRNG(2))
+        game.start_turn()
+        while not game.finished:
+            action = agent.act(game)
+            assert action in legal_actions(game)
+            apply_action(game, action)
+    finally:
+        agent.close()
+    assert game.finished
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import torch
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC)
+
+from agent import GeneralaQAgent
+from dice import DiceRNG
+from env import ACTION_DIM, STATE_DIM, GeneralaEnv, sample_states
+from export_model import export_npz
+from mcts import MCTSAgent
+from numpy_agent import NumpyQAgent, NumpyQNetwork
+
+
+def _exported(tmp_path, hidden_layers=(64, 32)):
+    torch.manual_seed(0)
+    agent = GeneralaQAgent(STATE_DIM, ACTION_DIM, hidden_layers=list(hidden_layers))
+    path = str(tmp_path / "qagent.npz")
+    export_npz(agent.model, path)
+    return agent, path
+
+
+def test_numpy_forward_matches_torch(tmp_path):
+    agent, path = _exported(tmp_path)
+    network = NumpyQNetwork.load(path)
+    assert network.hidden_layers == [64, 32]
+    states, _ = sample_states(200, seed=3)
+    with torch.inference_mode():
+        expected = agent.model(torch.from_numpy(states)).numpy()
+    np.testing.assert_allclose(network(states), expected, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(network(states[0]), expected[0], rtol=1e-5, atol=1e-5)
+
+
+def test_numpy_agent_plays_like_torch_agent(tmp_path):
+    agent, path = _exported(tmp_path)
+    np_agent = NumpyQAgent.load(path, seed=0)
+    env = GeneralaEnv(rng=DiceRNG(4))
+    env.reset()
+    while not env.game.finished:
+        action = np_agent.act(env.game)
+        assert action == agent.act(env.game, epsilon=0.0)
+        env.step(action)
+    states, masks = sample_states(100, seed=5)
+    np.testing.assert_array_equal(
+        np_agent.act_batch(states, masks), agent.act_batch(states, masks).numpy()
+    )
+    explored = np_agent.act_batch(states, masks, epsilon=1.0)
+    assert masks[np.arange(100), explored].all()
+
+
+def test_parallel_mcts_with_numpy_policy(tmp_path):
+    _, path = _exported(tmp_path, (16,))
+    search = MCTSAgent(
+        rollouts=20, num_workers=2, rollout_turns=0, seed=0,
+        policy_agent=NumpyQAgent.load(path), value_scale=10.0,
+    )
+    try:
+        env = GeneralaEnv(rng=DiceRNG(6))
+        env.reset()
+        assert env.action_mask()[search.act(env.game)]
+    finally:
+        search.close()
+
+
+def test_cli_and_numpy_agent_do_not_import_torch():
+    code = "import cli, numpy_agent, mcts, sys; assert 'torch' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=SRC, check=True)
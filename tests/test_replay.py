@@ -0,0 +1,128 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from env import STATE_DIM, sample_states
+from replay import (
+    PrioritizedReplayMemory,
+    ReplayMemory,
+    SumTree,
+    pack_observations,
+    unpack_observations,
+)
+
+
+def _episode(start, length, state_dim=3):
+    ids = torch.arange(start, start + length)
+    states = ids.float().unsqueeze(1).repeat(1, state_dim)
+    return states, ids, ids.float() / 10, states + 0.5, ids % 4 == 0
+
+
+def test_push_episode_wraps_and_keeps_newest():
+    memory = ReplayMemory(5, 3)
+    memory.push_episode(*_episode(0, 3))
+    assert len(memory) == 3
+    memory.push_episode(*_episode(3, 4))
+    assert len(memory) == 5
+    # Oldest first, like a deque(maxlen=5) fed the same transitions
+    assert [memory[i][1] for i in range(5)] == [2, 3, 4, 5, 6]
+    state, action, reward, next_state, done = memory[-1]
+    assert action == 6 and reward == pytest.approx(0.6) and done is False
+    assert torch.equal(next_state, state + 0.5)
+    memory.push_episode(*_episode(10, 12))
+    assert [memory[i][1] for i in range(5)] == [17, 18, 19, 20, 21]
+    with pytest.raises(IndexError):
+        memory[5]
+
+
+def test_append_matches_push_episode():
+    memory = ReplayMemory(4, 3)
+    memory.append((torch.ones(3), 7, 1.5, torch.zeros(3), True))
+    assert len(memory) == 1
+    state, action, reward, next_state, done = memory[0]
+    assert torch.equal(state, torch.ones(3)) and (action, reward, done) == (7, 1.5, True)
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_sample_rows_are_consistent_transitions(prefetch):
+    memory = ReplayMemory(50, 3, prefetch=prefetch, seed=0)
+    with pytest.raises(ValueError):
+        memory.sample(8)
+    memory.push_episode(*_episode(0, 40))
+    try:
+        for _ in range(5):
+            states, actions, rewards, next_states, dones = memory.sample(16)
+            assert states.shape == (16, 3) and next_states.shape == (16, 3)
+            assert actions.shape == rewards.shape == dones.shape == (16, 1)
+            assert actions.dtype == torch.int64 and dones.dtype == torch.bool
+            assert torch.equal(states[:, :1], actions.float())
+            assert torch.allclose(rewards, actions.float() / 10)
+            assert torch.equal(next_states, states + 0.5)
+            assert torch.equal(dones, actions % 4 == 0)
+            assert actions.max() < 40
+    finally:
+        memory.close()
+
+
+def test_sum_tree_updates_and_finds_leaves():
+    tree = SumTree(5)
+    tree.update(np.arange(5), np.array([1.0, 0.0, 2.0, 3.0, 4.0]))
+    assert tree.total == 10.0
+    np.testing.assert_array_equal(
+        tree.find(np.array([0.0, 0.99, 1.0, 2.99, 3.0, 9.99])), [0, 0, 2, 2, 3, 4]
+    )
+    tree.update(np.array([4, 1, 4]), np.array([9.0, 5.0, 0.5]))
+    assert tree.total == 11.5
+    np.testing.assert_array_equal(tree[np.array([1, 4])], [5.0, 0.5])
+
+
+def test_prioritized_sampling_follows_priorities():
+    memory = PrioritizedReplayMemory(8, 3, seed=0, alpha=1.0, beta=1.0, eps=0.0)
+    memory.push_episode(*_episode(0, 8))
+    # Fresh transitions share the max priority
+    np.testing.assert_array_equal(memory.tree[np.arange(8)], np.ones(8))
+    errors = np.zeros(8)
+    errors[5] = 3.0
+    errors[6] = 1.0
+    memory.update_priorities(np.arange(8), errors)
+    states, actions, rewards, next_states, dones, weights, indices = memory.sample(4000)
+    assert set(np.unique(indices)) == {5, 6}
+    assert torch.equal(actions.squeeze(1), torch.from_numpy(indices))
+    assert 0.7 < (indices == 5).mean() < 0.8
+    # The rarer transition carries the full weight, the common one a third
+    assert weights.shape == (4000, 1) and weights.max() == 1.0
+    np.testing.assert_allclose(weights[indices == 5].numpy(), 1 / 3, rtol=1e-6)
+    # New transitions jump to the front of the queue
+    memory.push_episode(*_episode(8, 1))
+    assert memory.tree[np.array([0])][0] == memory.max_priority == 3.0
+    # Prefetched batches would miss these priority updates
+    with pytest.raises(ValueError):
+        PrioritizedReplayMemory(8, 3, prefetch=True)
+
+
+def test_compact_storage_round_trips_observations():
+    states, masks = sample_states(300, seed=1)
+    states = torch.from_numpy(states)
+    assert torch.equal(unpack_observations(pack_observations(states)), states)
+    for memory in (
+        ReplayMemory(200, STATE_DIM, compact=True, seed=0),
+        PrioritizedReplayMemory(200, STATE_DIM, compact=True, seed=0),
+    ):
+        assert memory.states.dtype == torch.int64 and memory.states.shape == (200,)
+        actions = torch.from_numpy(masks.argmax(axis=1))
+        terminal = torch.arange(300) % 50 == 49
+        next_states = torch.where(terminal.unsqueeze(1), torch.zeros_like(states), states.roll(-1, 0))
+        memory.push_episode(states, actions, torch.rand(300), next_states, terminal)
+        assert torch.equal(memory[0][0], states[100]) and memory[0][1] == actions[100]
+        batch = memory.sample(64)
+        rows = batch[1].squeeze(1)
+        assert batch[0].dtype == torch.float32 and rows.dtype == torch.int64
+        # Every decoded state is one of the pushed observations with its own action
+        pushed = {tuple(s.tolist()): int(a) for s, a in zip(states[100:], actions[100:])}
+        for state, action in zip(batch[0], rows):
+            assert pushed[tuple(state.tolist())] == action
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from generala import GeneralaCategory, GeneralaGame, GeneralaRules
+from solver import SCORE_OFFSET, SolitaireSolver, load_table
+
+
+@pytest.fixture(scope="module")
+def solver(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("solver") / "table.npy")
+    SolitaireSolver(path)  # solves and saves
+    return SolitaireSolver(path)  # memory-maps the saved table
+
+
+def test_table_is_memory_mapped(solver):
+    assert isinstance(solver.table, np.memmap)
+
+
+def test_last_category_takes_what_the_dice_give(solver):
+    game = GeneralaGame(["p1"])
+    for cat in GeneralaRules.CATEGORIES[:-1]:
+        game.scoreboards[0].set_score(cat, 0)
+    game.dice = [6, 6, 6, 6, 6]
+    game.roll_number = 3
+    action = solver.best_action(game)
+    assert action == SCORE_OFFSET + GeneralaRules.CATEGORIES.index(
+        GeneralaCategory.DOUBLE_GENERALA
+    )
+    assert solver.value(game) == pytest.approx(100.0)
+
+
+def test_served_generala_is_taken(solver):
+    game = GeneralaGame(["p1"])
+    game.dice = [4, 4, 4, 4, 4]
+    game.roll_number = 1
+    generala = GeneralaRules.CATEGORIES.index(GeneralaCategory.GENERALA)
+    # With everything open, ending the game at 50 is worse than playing on
+    assert solver.best_action(game) != SCORE_OFFSET + generala
+    for cat in GeneralaRules.CATEGORIES:
+        if cat is not GeneralaCategory.GENERALA:
+            game.scoreboards[0].set_score(cat, 0)
+    assert solver.best_action(game) == SCORE_OFFSET + generala
+
+
+def test_hold_actions_keep_the_chosen_dice(solver):
+    game = GeneralaGame(["p1"])
+    game.dice = [2, 6, 6, 1, 6]
+    game.roll_number = 2
+    for cat in GeneralaRules.CATEGORIES:
+        if cat is not GeneralaCategory.SIXES:
+            game.scoreboards[0].set_score(cat, 0)
+    action = solver.best_action(game)
+    held = [d for j, d in enumerate(game.dice) if (action - 1) >> j & 1]
+    assert held == [6, 6, 6]
+
+
+def test_optimal_play_matches_expected_score(solver):
+    from dice import DiceRNG
+
+    rng = DiceRNG(0)
+    totals = []
+    for _ in range(300):
+        game = GeneralaGame(["p1"], rng=rng)
+        game.start_turn()
+        while not game.finished:
+            action = solver.best_action(game)
+            if action < SCORE_OFFSET:
+                mask = action - 1 if action else 0
+                game.roll([d for j, d in enumerate(game.dice) if mask >> j & 1])
+            else:
+                game.score(GeneralaRules.CATEGORIES[action - SCORE_OFFSET])
+                if not game.finished:
+                    game.next_player()
+        totals.append(game.scoreboards[0].total_score())
+    stderr = np.std(totals) / np.sqrt(len(totals))
+    assert abs(np.mean(totals) - solver.expected_score()) < 4 * stderr
+
+
+def test_load_table_rejects_other_arrays(tmp_path):
+    path = str(tmp_path / "bad.npy")
+    np.save(path, np.zeros(3))
+    with pytest.raises(ValueError):
+        load_table(path)
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from generala import DICE_MULTISETS, GeneralaCategory
+from transitions import (
+    FIRST_ROLL_PROBS,
+    KEEPS,
+    TransitionMatrix,
+    completion_probability,
+    generala_probability,
+    load_transitions,
+)
+
+
+def test_rows_are_probability_distributions():
+    matrix = TransitionMatrix.build()
+    assert len(KEEPS) == 462
+    assert len(matrix.indptr) == len(KEEPS) + 1
+    sums = np.add.reduceat(matrix.probs, matrix.indptr[:-1])
+    assert np.allclose(sums, 1.0)
+    assert np.isclose(FIRST_ROLL_PROBS.sum(), 1.0)
+    # Keeping nothing is the same as a first roll
+    first = matrix.distribution(())
+    assert [first[ms] for ms in DICE_MULTISETS] == pytest.approx(FIRST_ROLL_PROBS)
+    values = np.arange(len(DICE_MULTISETS), dtype=np.float64)
+    assert matrix.expect(values)[0] == pytest.approx(FIRST_ROLL_PROBS @ values)
+    assert matrix.distribution((6, 6, 6, 6)) == pytest.approx(
+        {(1, 6, 6, 6, 6): 1 / 6, (2, 6, 6, 6, 6): 1 / 6, (3, 6, 6, 6, 6): 1 / 6,
+         (4, 6, 6, 6, 6): 1 / 6, (5, 6, 6, 6, 6): 1 / 6, (6, 6, 6, 6, 6): 1 / 6}
+    )
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "nested" / "transitions.npz")
+    built = load_transitions(path)
+    assert os.path.exists(path)
+    loaded = TransitionMatrix.load(path)
+    for name in ("indptr", "outcomes", "probs", "hold_indptr", "hold_keeps"):
+        assert np.array_equal(getattr(built, name), getattr(loaded, name))
+
+
+def test_load_rejects_foreign_files(tmp_path):
+    path = str(tmp_path / "bad.npz")
+    matrix = TransitionMatrix.build()
+    np.savez(path, indptr=matrix.indptr[:-1])
+    with pytest.raises(ValueError):
+        TransitionMatrix.load(path)
+    matrix.hold_keeps = matrix.hold_keeps.astype(np.int64)
+    matrix.save(path)
+    with pytest.raises(ValueError):
+        TransitionMatrix.load(path)
+
+
+def test_generala_probabilities():
+    assert generala_probability([6, 6, 6, 6, 6], 3) == 1.0
+    assert generala_probability([6, 6, 6, 6, 1], 3) == 0.0
+    assert generala_probability([6, 6, 6, 6, 1], 2) == pytest.approx(1 / 6)
+    assert generala_probability([6, 6, 6, 6, 1], 1) == pytest.approx(11 / 36)
+    # Known value for chasing five of a kind over a whole turn
+    from_scratch = float(FIRST_ROLL_PROBS @ [
+        generala_probability(list(ms), 1) for ms in DICE_MULTISETS
+    ])
+    assert from_scratch == pytest.approx(0.046029, abs=1e-6)
+
+
+def test_completion_probability_for_other_categories():
+    assert completion_probability(GeneralaCategory.ESCALERA, [1, 2, 3, 4, 6], 2) == (
+        pytest.approx(1 / 6)
+    )
+    assert completion_probability(GeneralaCategory.ESCALERA, [1, 2, 3, 4, 6], 1) == (
+        pytest.approx(11 / 36)
+    )
+    with pytest.raises(ValueError):
+        completion_probability(GeneralaCategory.POKER, [1, 1, 1, 1, 2], 4)
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from generala import GeneralaGame, GeneralaRules
+from vec_env import ACTION_DIM, SCORE_OFFSET, STATE_DIM, VecGeneralaEnv
+
+
+def expected_obs(game):
+    dice = game.dice + [0] * (5 - len(game.dice))
+    held = game.held + [0] * (5 - len(game.held))
+    roll = [int(game.roll_number == r) for r in (1, 2, 3)]
+    filled = game.scoreboards[game.current_player].filled_mask
+    return dice + held + roll + [(filled >> i) & 1 for i in range(11)]
+
+
+def test_vec_env_matches_single_game_rules():
+    n = 16
+    env = VecGeneralaEnv(n, rng=0)
+    obs = env.reset()
+    assert obs.shape == (n, STATE_DIM)
+    games = []
+    for i in range(n):
+        game = GeneralaGame(["A", "B"])
+        game.dice = env.dice[i].tolist()
+        games.append(game)
+    choice = np.random.default_rng(0)
+    finished = 0
+    for _ in range(400):
+        masks = env.action_masks()
+        assert masks.shape == (n, ACTION_DIM)
+        actions = np.array([choice.choice(np.flatnonzero(m)) for m in masks])
+        obs, rewards, dones, info = env.step(actions)
+        for i, (game, action) in enumerate(zip(games, actions.tolist())):
+            if action < SCORE_OFFSET:
+                keep = [(action - 1) >> j & 1 if action else 0 for j in range(5)]
+                held = [d for d, k in zip(game.dice, keep) if k]
+                game.roll(held)
+                assert env.dice[i, : len(held)].tolist() == held
+                game.dice = env.dice[i].tolist()
+            else:
+                category = GeneralaRules.CATEGORIES[action - SCORE_OFFSET]
+                player = game.current_player
+                result = game.score(category)
+                score = 50 if result == "WIN" else result
+                assert rewards[i] == pytest.approx(score / 50.0)
+                if not game.finished:
+                    game.next_player()
+                if game.finished:
+                    assert dones[i]
+                    totals = [sb.total_score() for sb in game.scoreboards]
+                    assert info["final_totals"][i].tolist() == totals
+                    assert info["final_scores"][i].sum(axis=1).tolist() == totals
+                    assert info["served"][i] == (result == "WIN")
+                    finished += 1
+                    game = games[i] = GeneralaGame(["A", "B"])
+                else:
+                    assert not dones[i]
+                game.dice = env.dice[i].tolist()
+                assert env.totals[i, player] == (
+                    0 if dones[i] else game.scoreboards[player].total_score()
+                )
+            assert obs[i].tolist() == expected_obs(game)
+    assert finished > 0
+
+
+def test_vec_env_rejects_illegal_actions():
+    env = VecGeneralaEnv(2, rng=1)
+    env.reset()
+    env.step(np.array([0, 0]))
+    env.step(np.array([0, 0]))
+    with pytest.raises(ValueError):
+        env.step(np.array([0, SCORE_OFFSET]))
+    env.step(np.array([SCORE_OFFSET, SCORE_OFFSET]))  # player A scores ONES
+    env.step(np.array([SCORE_OFFSET, SCORE_OFFSET]))  # player B scores ONES
+    with pytest.raises(ValueError):
+        env.step(np.array([SCORE_OFFSET + 1, SCORE_OFFSET]))
+    with pytest.raises(ValueError):
+        env.step(np.array([0]))